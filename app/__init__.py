@@ -2,26 +2,70 @@
 from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from config import Config
+import os
+
+from config import config_profiles
 from flask_login import LoginManager
 from flask_mail import Mail
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.cache import CatalogCache
+from app.identity import IdentityCache
+from app.passwords import PasswordHasher
+from app.throttle import LoginThrottle
+from app.profiler import SQLProfiler
+from app.database import engine_options, init_engines, log_engine_settings
+from app import metrics, replicas
+from app.replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # reads may go to replicas
 migrate = Migrate()
 login_manager = LoginManager()
 mail = Mail()
+catalog_cache = CatalogCache()
+identity_cache = IdentityCache()
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
+sql_profiler = SQLProfiler()
 
 
-def create_app():
+def create_app(test_config=None, config_name=None):
     app = Flask(__name__, instance_relative_config=True, template_folder="templates")
-    app.config.from_object(Config)
-    app.config.from_pyfile("config.py", silent=True)
+
+    # Config profile: explicit argument, else FLASK_CONFIG (development | production).
+    # Unset means production, so a deployment never runs with development settings by accident
+    if config_name is None:
+        config_name = "testing" if test_config is not None else os.getenv("FLASK_CONFIG", "production")
+    app.config.from_object(config_profiles[config_name])
+    app.config["CONFIG_PROFILE"] = config_name
+    if test_config is None:
+        app.config.from_pyfile("config.py", silent=True)
+    else:
+        # Tests pass their overrides (in-memory DB, TESTING, ...) directly
+        app.config.from_mapping(test_config)
+    app.logger.setLevel(app.config["LOG_LEVEL"])
+
+    # Behind reverse proxies, take the client's address from their X-Forwarded-For;
+    # otherwise every visitor would share the proxy's login throttle bucket
+    if app.config["TRUSTED_PROXIES"]:
+        proxies = app.config["TRUSTED_PROXIES"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
+    # Pool sizes / SQLite PRAGMAs for this backend, before the engines are created
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
 
     # Initialize extensions
     db.init_app(app)
+    init_engines(app, db)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     mail.init_app(app)
+    catalog_cache.init_app(app)
+    identity_cache.init_app(app)
+    password_hasher.init_app(app)
+    login_throttle.init_app(app)
+    replicas.init_app(app)  # replica engines; RoutingSession uses them for read-only views
+    sql_profiler.init_app(app)  # after the engines exist; a no-op unless SQL_PROFILER is set
+    metrics.init_app(app)  # Prometheus /metrics: request latency, pools, checkouts
 
     # Flask-Login settings
     login_manager.login_view = "auth.login"  # redirect unauth users here
@@ -30,12 +74,12 @@ def create_app():
 
     from . import models
     
-    # User loader (required by Flask-Login)
+    # User loader (required by Flask-Login); served from the identity cache when warm.
+    # Deactivated users (e.g. being deleted) are logged out of existing sessions too.
     @login_manager.user_loader
     def load_user(user_id):
-        from .models import User
-
-        return User.query.get(int(user_id))
+        user = identity_cache.load(int(user_id))
+        return user if user is not None and user.is_active else None
 
     
     # Import and register routes
@@ -51,4 +95,32 @@ def create_app():
     app.register_blueprint(wallet_bp)
     app.register_blueprint(admin_bp)
 
+    # Fingerprinted static assets: asset_url() helper and the cached /static view
+    from app import assets
+
+    assets.init_app(app)
+
+    # Product images: <picture>/srcset helper for the product_picture macro
+    from app.images import images_cli, product_image
+
+    app.add_template_global(product_image)
+
+    # CLI commands (flask stats ..., flask outbox ..., flask images ..., flask assets ..., flask search ...,
+    # flask users ..., flask orders ...)
+    from app.stats import stats_cli
+    from app.outbox import outbox_cli
+    from app.main.search import search_cli
+    from app.admin.purge import users_cli
+    from app.archive import orders_cli
+
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(assets.assets_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(orders_cli)
+
+    log_engine_settings(app, db)
+
     return app
\ No newline at end of file
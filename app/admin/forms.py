@@ -9,7 +9,7 @@ from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed  
 # Imports FileField (for uploading files) and FileAllowed (for restricting allowed file types).
 
-from wtforms import StringField, DecimalField, IntegerField, SelectField, TextAreaField, SubmitField  
+from wtforms import StringField, DecimalField, IntegerField, SelectField, TextAreaField, SubmitField, BooleanField, DateField  
 # Imports different types of form fields:
 # - StringField: for text input
 # - DecimalField: for numeric input with decimals
@@ -17,11 +17,17 @@ from wtforms import StringField, DecimalField, IntegerField, SelectField, TextAr
 # - SelectField: for dropdown selection
 # - TextAreaField: for multi-line text input
 # - SubmitField: for the form’s submit button
+# - BooleanField: for a checkbox
+# - DateField: for a date (YYYY-MM-DD)
 
-from wtforms.validators import DataRequired, NumberRange  
+from wtforms.validators import DataRequired, NumberRange, Optional  
 # Imports validators:
 # - DataRequired: ensures the field is not empty
 # - NumberRange: checks that numeric values fall within a given range
+# - Optional: allows a field to be left empty (and skips its other validators)
+
+from app.admin.fulfilment import ORDER_STATUSES
+# The order statuses, in fulfilment order.
 
 # ----------------------------- PRODUCT FORM -----------------------------
 class ProductForm(FlaskForm):  
@@ -71,5 +77,28 @@ class BatchUploadForm(FlaskForm):
     # File upload field restricted to CSV files.
     # DataRequired ensures a file is selected before submission.
 
+    background = BooleanField('Run in background (recommended for large files)')  
+    # When ticked, the import runs on a worker thread and the admin is sent to a progress page.
+
     submit = SubmitField('Upload & Import')  
     # Button to submit the CSV upload form.
+
+# ----------------------------- BULK ORDER STATUS FORM -----------------------------
+class BulkOrderStatusForm(FlaskForm):  
+    # Moves many orders to a new status at once: either the orders ticked on the
+    # orders page (posted as order_ids) or every order matching a status and date range.
+
+    status = SelectField('New status', choices=[(s, s.title()) for s in ORDER_STATUSES],
+                         validators=[DataRequired()])  
+    # The status to move the orders to.
+
+    from_status = SelectField('Current status', choices=[('', 'Any')] + [(s, s.title()) for s in ORDER_STATUSES],
+                              default='', validators=[Optional()])  
+    # Filter: only orders currently in this status ('' = no status filter).
+
+    date_from = DateField('Placed from', validators=[Optional()])  
+    date_to = DateField('Placed until', validators=[Optional()])  
+    # Filter: order dates, both days included.
+
+    submit = SubmitField('Apply')  
+    # Button to submit the bulk change.
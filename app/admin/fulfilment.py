@@ -0,0 +1,113 @@
+# app\admin\fulfilment.py
+# Order status changes in bulk, for fulfilment runs ("mark today's orders shipped").
+#
+# transition_orders() selects orders by id or by current status and date range and
+# moves every order whose status allows it to the new status with one UPDATE. Orders
+# that can't make that move (already shipped, cancelled, ...) are left alone and
+# reported. Statuses are stored in lower case; rows still spelled 'Processing' are
+# matched and rewritten in lower case along the way.
+
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import and_, func, select, update
+
+from app import db, stats
+from app.models import Order
+
+ORDER_STATUSES = ('pending', 'processing', 'shipped', 'completed', 'cancelled')
+
+# Moves a bulk change may make. Single-order edits (update_order_status) may set any
+# status, so mistakes can still be corrected one order at a time.
+TRANSITIONS = {
+    'pending': ('processing', 'cancelled'),
+    'processing': ('shipped', 'cancelled'),
+    'shipped': ('completed',),
+    'completed': (),
+    'cancelled': (),
+}
+
+# An explicit selection beyond this should use the status/date filter instead
+MAX_ORDER_IDS = 10000
+
+
+class BulkStatusError(ValueError):
+    """The requested change or selection is not valid; nothing was written."""
+
+
+class BulkStatusConflict(Exception):
+    """The selected orders changed between counting and updating; nothing was written."""
+
+
+def _selection(order_ids, status, date_from, date_to):
+    if order_ids is None and status is None:
+        raise BulkStatusError('Select some orders, or a current status to filter by.')
+    conditions = []
+    if order_ids is not None:
+        if not order_ids:
+            raise BulkStatusError('No orders selected.')
+        if len(order_ids) > MAX_ORDER_IDS:
+            raise BulkStatusError(f'Select at most {MAX_ORDER_IDS} orders at once, or use the filter.')
+        conditions.append(Order.order_id.in_(set(order_ids)))
+    if status is not None:
+        if status not in ORDER_STATUSES:
+            raise BulkStatusError(f'Unknown status: {status}')
+        # Both spellings, so ix_order_status_date still applies
+        conditions.append(Order.status.in_({status, status.capitalize()}))
+    if date_from is not None:
+        conditions.append(Order.order_date >= datetime.combine(date_from, time.min))
+    if date_to is not None:
+        # The whole of the last day
+        conditions.append(Order.order_date < datetime.combine(date_to + timedelta(days=1), time.min))
+    return and_(*conditions)
+
+
+def transition_orders(new_status, order_ids=None, status=None, date_from=None, date_to=None):
+    """
+    Move the selected orders to ``new_status`` where TRANSITIONS allows it.
+
+    Select orders by ``order_ids``, by current ``status`` (optionally within
+    ``date_from``..``date_to``, both inclusive dates), or both. Runs one GROUP BY to
+    count the selection per status and one UPDATE; the caller commits. Returns
+    {'updated': {old_status: n}, 'skipped': {status: n}} with lower-case keys.
+
+    Raises BulkStatusError for an invalid request and BulkStatusConflict when the
+    UPDATE didn't match the rows counted (a concurrent change); roll back on either.
+    """
+    if new_status not in ORDER_STATUSES:
+        raise BulkStatusError(f'Unknown status: {new_status}')
+    where = _selection(order_ids, status, date_from, date_to)
+
+    # Stored spellings in the selection, with their counts and totals
+    rows = db.session.execute(
+        select(Order.status, func.count(Order.order_id), func.coalesce(func.sum(Order.grand_total), 0))
+        .where(where)
+        .group_by(Order.status)
+    ).all()
+
+    updated, skipped, movable = {}, {}, []
+    expected, completed_revenue = 0, 0
+    for stored, count, total in rows:
+        current = (stored or '').lower()
+        if new_status in TRANSITIONS.get(current, ()) or (current == new_status and stored != current):
+            # Allowed moves, plus old spellings of the target status that only need rewriting
+            movable.append(stored)
+            expected += count
+            updated[current] = updated.get(current, 0) + count
+            if new_status == 'completed' and current != 'completed':
+                completed_revenue += total
+        else:
+            skipped[current] = skipped.get(current, 0) + count
+
+    if movable:
+        changed = db.session.execute(
+            update(Order)
+            .where(where, Order.status.in_(movable))
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if changed != expected:
+            raise BulkStatusConflict('Some of these orders changed while updating. Nothing was changed; please try again.')
+        stats.bump(stats.COMPLETED_REVENUE, completed_revenue)
+        # Completed revenue only grows here: no bulk move leaves 'completed'.
+
+    return {'updated': updated, 'skipped': skipped}
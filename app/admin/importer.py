@@ -0,0 +1,232 @@
+# app\admin\importer.py
+# Streaming CSV product importer used by the batch upload on /admin/products.
+#
+# The upload is saved to disk and read back row by row, so memory stays flat however
+# large the file is. Rows are validated and bulk-inserted in chunks of
+# IMPORT_CHUNK_SIZE (one executemany + commit per chunk), SKUs come from a block
+# reserved up front rather than a COUNT(*) per row, and every rejected row is written
+# to a downloadable error report. Imports can run inline or on a background thread
+# that records its progress in the import_job table.
+
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app
+from sqlalchemy import func, insert, update
+
+from app import db, stats
+from app.images import queue_derivatives
+from app.main.catalog import invalidate_catalog
+from app.models import ImportJob, Product, SkuCounter
+
+ALLOWED_CATEGORIES = ('handbag', 'watch')
+ERROR_REPORT_FIELDS = ['row', 'error', 'name', 'category', 'price', 'stock_level', 'description', 'image_url']
+
+_executor = None
+
+
+class RowError(ValueError):
+    """A CSV row that can't be imported; the message goes into the error report."""
+
+
+# ----------------------------- SKU ALLOCATION -----------------------------
+def reserve_skus(count):
+    """
+    Reserve ``count`` consecutive SKU numbers and return the first one.
+
+    One relative UPDATE on the sku_counter row claims the whole block, so concurrent
+    imports and single adds never hand out the same number.
+    """
+    updated = db.session.execute(
+        update(SkuCounter)
+        .where(SkuCounter.name == 'product')
+        .values(next_value=SkuCounter.next_value + count)
+    ).rowcount
+    if not updated:
+        # First use: start after the highest product id, which is beyond every
+        # number the old COUNT(*)+1 scheme could have produced.
+        start = (db.session.query(func.max(Product.prod_id)).scalar() or 0) + 1
+        db.session.add(SkuCounter(name='product', next_value=start + count))
+        db.session.flush()
+        return start
+    next_value = db.session.query(SkuCounter.next_value).filter_by(name='product').scalar()
+    return next_value - count
+
+
+# ----------------------------- ROW VALIDATION -----------------------------
+def parse_row(row):
+    """
+    Validate one CSV row.
+
+    Returns ``(values, warning)``: the Product column values (minus the SKU) and an
+    optional message for rows that import with a field dropped. Raises RowError for
+    rows that are rejected outright.
+    """
+    name = (row.get('name') or '').strip()
+    category = (row.get('category') or '').strip().lower()
+    price_str = (row.get('price') or '').strip()
+    stock_str = (row.get('stock_level') or '').strip()
+    desc = (row.get('description') or '').strip()
+
+    if not all([name, category, price_str, stock_str]):
+        raise RowError('Missing required fields')
+
+    if category not in ALLOWED_CATEGORIES:
+        raise RowError(f"Invalid category '{category}'")
+
+    try:
+        price = Decimal(price_str)
+        if price < Decimal('0.01'):
+            raise ValueError
+    except (InvalidOperation, ValueError):
+        raise RowError(f"Invalid price '{price_str}'")
+
+    try:
+        stock_level = int(stock_str)
+        if stock_level < 0:
+            raise ValueError
+    except ValueError:
+        raise RowError(f"Invalid stock '{stock_str}'")
+
+    warning = None
+    image_url = (row.get('image_url') or '').strip()
+    if image_url:
+        image_url = image_url.lstrip('/')
+        if image_url.startswith('static/'):
+            image_url = image_url[7:]
+        if not image_url.startswith('uploads/products/'):
+            # As before, a bad image path is reported but the product still imports.
+            warning = 'image_url must be in uploads/products/'
+            image_url = None
+
+    values = {
+        'name': name,
+        'category': category,
+        'price': price,
+        'stock_level': stock_level,
+        'desc': desc or None,
+        'image_url': image_url or None,
+    }
+    return values, warning
+
+
+# ----------------------------- IMPORT RUN -----------------------------
+def import_dir():
+    path = current_app.config['IMPORT_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def upload_path(job_id):
+    return os.path.join(import_dir(), f'{job_id}.csv')
+
+
+def error_report_path(job_id):
+    return os.path.join(import_dir(), f'{job_id}-errors.csv')
+
+
+def create_job(file_storage):
+    """Save an uploaded CSV to disk and register an import job for it."""
+    job = ImportJob(filename=file_storage.filename, status='queued')
+    db.session.add(job)
+    db.session.commit()
+
+    path = upload_path(job.job_id)
+    file_storage.save(path)  # streamed to disk in chunks by Werkzeug
+    job.bytes_total = os.path.getsize(path)
+    db.session.commit()
+    return job
+
+
+def _insert_chunk(values):
+    first = reserve_skus(len(values))
+    for offset, row in enumerate(values):
+        row['sku'] = f"{row['category']}_{first + offset}"
+    db.session.execute(insert(Product), values)
+    stats.bump(stats.PRODUCTS, len(values))
+    db.session.commit()
+
+
+def run_import(job_id):
+    """Import the CSV saved for ``job_id``, updating the job row after every chunk."""
+    job = db.session.get(ImportJob, job_id)
+    job.status = 'running'
+    db.session.commit()
+
+    chunk_size = current_app.config['IMPORT_CHUNK_SIZE']
+    try:
+        with open(upload_path(job_id), 'rb') as raw, \
+                open(error_report_path(job_id), 'w', newline='', encoding='utf-8') as report:
+            text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+            errors = csv.writer(report)
+            errors.writerow(ERROR_REPORT_FIELDS)
+
+            chunk = []
+            image_urls = set()
+            for row_num, row in enumerate(csv.DictReader(text), start=2):  # row 1 is the header
+                try:
+                    values, warning = parse_row(row)
+                except RowError as e:
+                    values, warning = None, str(e)
+                if warning:
+                    errors.writerow([row_num, warning] + [row.get(f, '') for f in ERROR_REPORT_FIELDS[2:]])
+                    job.rows_with_errors += 1
+                if values:
+                    chunk.append(values)
+                    if values['image_url']:
+                        image_urls.add(values['image_url'])
+                job.rows_processed += 1
+
+                if len(chunk) >= chunk_size:
+                    _insert_chunk(chunk)
+                    job.rows_imported += len(chunk)
+                    job.bytes_done = raw.tell()
+                    db.session.commit()
+                    chunk = []
+
+            if chunk:
+                _insert_chunk(chunk)
+                job.rows_imported += len(chunk)
+
+        job.bytes_done = job.bytes_total
+        job.status = 'done'
+        for image_url in image_urls:
+            # Rows point at images already in uploads/products; resize any that are new
+            queue_derivatives(image_url)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'failed'
+        job.message = str(e)[:1000]
+    finally:
+        job.finished_at = datetime.now()
+        db.session.commit()
+        if job.rows_imported:
+            invalidate_catalog()
+        try:
+            os.remove(upload_path(job_id))
+        except OSError:
+            pass
+    return job
+
+
+def _run_in_context(app, job_id):
+    with app.app_context():
+        try:
+            run_import(job_id)
+        finally:
+            db.session.remove()
+
+
+def submit_import(job_id):
+    """Run an import on the background worker pool; returns a Future."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config['IMPORT_WORKERS'], thread_name_prefix='product-import'
+        )
+    return _executor.submit(_run_in_context, current_app._get_current_object(), job_id)
@@ -0,0 +1,209 @@
+# app\admin\purge.py
+# Deleting a user together with their cart and order history.
+#
+# Everything is removed with set-based statements: one DELETE for the order lines of
+# a range of the user's orders (order_id IN (SELECT ...)), one for the orders, one for
+# the cart, whatever the number of rows; archived orders (app/archive.py) go the same
+# way. Accounts with up to USER_PURGE_INLINE_LIMIT orders are deleted inside the
+# admin request. Bigger ones are deactivated right away and purged on a background
+# thread, USER_PURGE_CHUNK_SIZE orders per committed transaction, so no single
+# transaction holds locks on a heavy buyer's whole history. Progress is kept in the
+# user_purge_job table. A run first claims its job (queued -> running with a guarded
+# UPDATE), so each job has one worker at a time. A purge interrupted by a restart is
+# resumed by `flask users purge --resume-running`, carrying on from the orders that
+# are left.
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import case, delete, func, select, update
+
+from app import db, stats
+from app.archive import ORDER_SOURCES
+from app.models import CartItem, Order, User, UserPurgeJob
+
+_executor = None
+
+
+def order_count(user_id):
+    """The user's live and archived orders."""
+    return sum(
+        db.session.scalar(select(func.count(order.order_id)).where(order.user_id == user_id))
+        for order, _ in ORDER_SOURCES
+    )
+
+
+def _purge_orders(user_id, upto=None, order=Order):
+    """Delete the user's orders (those with order_id <= ``upto``, or all) and their lines."""
+    item = dict(ORDER_SOURCES)[order]
+    where = [order.user_id == user_id]
+    if upto is not None:
+        where.append(order.order_id <= upto)
+
+    count, revenue = db.session.execute(
+        select(func.count(order.order_id),
+               func.coalesce(func.sum(case((func.lower(order.status) == 'completed', order.grand_total))), 0))
+        .where(*where)
+    ).one()
+    if not count:
+        return 0
+
+    db.session.execute(
+        delete(item)
+        .where(item.order_id.in_(select(order.order_id).where(*where)))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(delete(order).where(*where).execution_options(synchronize_session=False))
+    stats.bump(stats.ORDERS, -count)
+    stats.bump(stats.COMPLETED_REVENUE, -revenue)
+    return count
+
+
+def delete_user_data(user_id):
+    """
+    Delete the user, their cart and all their orders; returns the number of orders.
+
+    A handful of statements however many orders there are. The caller commits.
+    """
+    deleted = sum(_purge_orders(user_id, order=order) for order, _ in ORDER_SOURCES)
+    db.session.execute(
+        delete(CartItem).where(CartItem.user_id == user_id).execution_options(synchronize_session=False)
+    )
+    user = db.session.get(User, user_id)
+    if user is not None:
+        db.session.delete(user)  # through the session, so the identity cache forgets it
+        stats.bump(stats.USERS, -1)
+    return deleted
+
+
+# ----------------------------- BACKGROUND PURGE -----------------------------
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def active_purge_job(user_id):
+    """The user's queued or running purge, or None."""
+    return UserPurgeJob.query.filter(
+        UserPurgeJob.user_id == user_id, UserPurgeJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+
+
+def create_purge_job(user):
+    """
+    Deactivate ``user`` and queue their deletion; returns ``(job, created)``.
+
+    When a purge is already queued or running that job is returned with
+    created=False, and only a new job should be submitted. Deactivated users are
+    logged out and can't log in while their orders are being removed. Commits.
+    """
+    # Lock the user row so two concurrent requests can't both queue a purge
+    db.session.execute(select(User.user_id).where(User.user_id == user.user_id).with_for_update())
+    job = active_purge_job(user.user_id)
+    if job is not None:
+        db.session.commit()
+        return job, False
+
+    job = UserPurgeJob(user_id=user.user_id, user_email=user.email, status='queued',
+                       orders_total=order_count(user.user_id))
+    db.session.add(job)
+    user.is_active = False
+    db.session.commit()
+    return job, True
+
+
+def claim_job(job_id, statuses=('queued',)):
+    """Mark the job running if its status is one of ``statuses``; True if this caller got it."""
+    claimed = db.session.execute(
+        update(UserPurgeJob)
+        .where(UserPurgeJob.job_id == job_id, UserPurgeJob.status.in_(statuses))
+        .values(status='running', message=None)
+    ).rowcount
+    db.session.commit()
+    return claimed == 1
+
+
+def run_purge(job_id, statuses=('queued',)):
+    """
+    Delete a queued user's orders in chunks, then the user; returns the job.
+
+    Returns None, without touching anything, when the job isn't in one of
+    ``statuses`` (another worker has claimed it, or it has finished). Each chunk is
+    committed with the job's progress, so running the job again after an
+    interruption simply continues with the orders that remain.
+    """
+    if not claim_job(job_id, statuses):
+        return None
+    chunk_size = current_app.config['USER_PURGE_CHUNK_SIZE']
+    job = db.session.get(UserPurgeJob, job_id)
+
+    try:
+        for order, _ in ORDER_SOURCES:
+            while True:
+                # The chunk_size-th oldest remaining order; None when fewer are left
+                upto = db.session.scalar(
+                    select(order.order_id).where(order.user_id == job.user_id)
+                    .order_by(order.order_id).offset(chunk_size - 1).limit(1)
+                )
+                if upto is None:
+                    break
+                job.orders_deleted = (job.orders_deleted or 0) + _purge_orders(job.user_id, upto, order)
+                db.session.commit()
+
+        # The last, partial chunks go together with the cart and the user row
+        job.orders_deleted = (job.orders_deleted or 0) + delete_user_data(job.user_id)
+        job.status = 'done'
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(UserPurgeJob, job_id)
+        job.status = 'failed'
+        job.message = str(e)[:1000]
+        current_app.logger.exception("Purge of user %s failed", job.user_id)
+    finally:
+        job.finished_at = datetime.now()
+        db.session.commit()
+    return job
+
+
+def _run_in_context(app, job_id):
+    with app.app_context():
+        try:
+            run_purge(job_id)
+        finally:
+            db.session.remove()
+
+
+def submit_purge(job_id):
+    """Run a purge on the background worker pool; returns a Future."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config['USER_PURGE_WORKERS'], thread_name_prefix='user-purge'
+        )
+    return _executor.submit(_run_in_context, current_app._get_current_object(), job_id)
+
+
+# ----------------------------- CLI -----------------------------
+users_cli = AppGroup("users", help="Manage user accounts.")
+
+
+@users_cli.command("purge")
+@click.option("--retry-failed", is_flag=True, help="Also rerun purges that failed.")
+@click.option("--resume-running", is_flag=True,
+              help="Also take over purges marked running. Only when no web worker can still be running them "
+                   "(e.g. after a crash or restart).")
+def purge_command(retry_failed, resume_running):
+    """Run queued user deletions, and optionally finish interrupted or failed ones."""
+    statuses = ('queued',) + (('failed',) if retry_failed else ()) + (('running',) if resume_running else ())
+    job_ids = db.session.scalars(
+        select(UserPurgeJob.job_id).where(UserPurgeJob.status.in_(statuses)).order_by(UserPurgeJob.job_id)
+    ).all()
+    ran = 0
+    for job_id in job_ids:
+        job = run_purge(job_id, statuses)
+        if job is not None:  # None: claimed by a web worker in the meantime
+            ran += 1
+            click.echo(f"user {job.user_id}: {job.status}, {job.orders_deleted} orders deleted")
+    if not ran:
+        click.echo("No unfinished purges.")
@@ -0,0 +1,124 @@
+# app\admin\queries.py
+# Set-based queries behind the admin pages. Each helper answers one screen's worth of
+# data in a fixed number of statements, so admin pages stay fast as tables grow.
+
+from sqlalchemy import case, func, or_, select
+
+from app import db
+from app.models import Order, OrderItem, User
+from app.pagination import keyset_paginate
+
+# Newest orders first; order_id breaks ties between orders placed in the same second.
+ORDER_LIST_SORT = [(Order.order_date, False), (Order.order_id, False)]
+
+# Users in sign-up order.
+USER_LIST_SORT = [(User.user_id, True)]
+
+
+def order_status_summary():
+    """
+    Count orders and sum grand_total per status in a single GROUP BY pass.
+
+    Status values are folded to lower case because older rows mix 'Processing' and
+    'processing'. Returns a dict with 'total_orders', 'counts' and 'revenue' (the
+    latter two keyed by lower-case status).
+    """
+    rows = (
+        db.session.query(
+            Order.status,
+            func.count(Order.order_id),
+            func.coalesce(func.sum(Order.grand_total), 0),
+        )
+        .group_by(Order.status)
+        .all()
+    )
+
+    counts, revenue = {}, {}
+    for status, count, total in rows:
+        key = (status or "").lower()
+        counts[key] = counts.get(key, 0) + count
+        revenue[key] = revenue.get(key, 0) + total
+    return {"total_orders": sum(counts.values()), "counts": counts, "revenue": revenue}
+
+
+def order_list_page(per_page, after=None, before=None, status=None):
+    """
+    One page of orders with the customer's name and the number of order lines,
+    fetched by a single query (rows are (Order, customer_name, item_count) tuples).
+
+    The line count is a correlated COUNT rather than a join + GROUP BY, so the database
+    walks ix_order_date (or ix_order_status_date) in page order and stops after one
+    page, instead of grouping and sorting the whole order table first.
+    """
+    item_count = (
+        select(func.count(OrderItem.order_item_id))
+        .where(OrderItem.order_id == Order.order_id)
+        .correlate(Order)
+        .scalar_subquery()
+        .label("item_count")
+    )
+    query = (
+        db.session.query(Order, User.name.label("customer_name"), item_count)
+        .join(User, User.user_id == Order.user_id)
+    )
+    if status:
+        # Match both spellings until every row uses the lower-case form.
+        query = query.filter(Order.status.in_({status.lower(), status.capitalize()}))
+
+    return keyset_paginate(
+        query,
+        ORDER_LIST_SORT,
+        per_page=per_page,
+        after=after,
+        before=before,
+        row_key=lambda row: row.Order,
+    )
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def user_list_page(per_page, after=None, before=None, search=None):
+    """
+    One page of users with their order counts (rows are (User, order_count) tuples).
+
+    The order count is a correlated COUNT over order.user_id, so each page costs one
+    index range probe per listed user rather than aggregating the whole order table.
+    ``search`` is matched case-insensitively as a prefix of email or name, which lets
+    both lookups use an index range (a leading wildcard would force a full scan). On
+    SQLite those are the NOCASE indexes ix_user_email_nocase and ix_user_name_nocase.
+    """
+    order_count = (
+        select(func.count(Order.order_id))
+        .where(Order.user_id == User.user_id)
+        .correlate(User)
+        .scalar_subquery()
+        .label("order_count")
+    )
+    query = db.session.query(User, order_count)
+    if search:
+        pattern = _escape_like(search.strip()) + "%"
+        query = query.filter(
+            or_(User.email.like(pattern, escape="\\"), User.name.like(pattern, escape="\\"))
+        )
+
+    return keyset_paginate(
+        query,
+        USER_LIST_SORT,
+        per_page=per_page,
+        after=after,
+        before=before,
+        row_key=lambda row: row.User,
+    )
+
+
+def user_summary(since):
+    """Total, admin, active and joined-since-``since`` user counts in one query."""
+    total, admins, active, new = db.session.query(
+        func.count(User.user_id),
+        func.coalesce(func.sum(case((User.is_admin.is_(True), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((User.is_active.is_(True), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((User.date_joined >= since, 1), else_=0)), 0),
+    ).one()
+    return {"total": total, "admins": admins, "active": active, "new": new}
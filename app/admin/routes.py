@@ -1,90 +1,97 @@
 # app\admin\routes.py
 # Admin routes for managing dashboard, users, products, and orders.
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort, send_file, jsonify
 # Blueprint: grouping for routes (admin_bp defined elsewhere).
 # render_template: render HTML templates.
 # request: access form and request data.
 # redirect, url_for: redirect responses and build route URLs.
 # flash: store short messages (success/error) to show in templates.
 # current_app: reference to the Flask app instance (used for config/paths).
+# abort: stop with an HTTP error (e.g. 400 for a malformed pagination cursor).
+# send_file: stream a file from disk (CSV import error reports).
+# jsonify: JSON responses (bulk status changes requested with Accept: application/json).
 
 from flask_login import login_required, current_user
 # login_required: decorator that ensures user is authenticated to access the route.
 # current_user: proxy to the currently logged-in user object.
 
-from app.models import User, Product, Order, OrderItem, CartItem  # Add CartItem here
+from app.models import User, Product, Order, OrderItem, CartItem, ImportJob  # Add CartItem here
 # Import database models used in admin routes:
 # User: user records.
 # Product: product records.
 # Order: orders.
 # OrderItem: items inside orders.
 # CartItem: items in user's shopping cart (used when deleting users).
+# ImportJob: progress of CSV product imports.
 
 from app.models import User, Product, Order, OrderItem
 # Duplicate import — redundant and can be removed safely (no change at runtime).
 
-from app.admin.forms import ProductForm, BatchUploadForm
-# Import form classes for single-product add/edit and CSV batch uploads.
+from app.admin.forms import ProductForm, BatchUploadForm, BulkOrderStatusForm
+# Import form classes for single-product add/edit, CSV batch uploads and bulk order status changes.
 
-from app import db
+from app.admin.fulfilment import ORDER_STATUSES, BulkStatusConflict, BulkStatusError, transition_orders
+# Set-based order status transitions (see fulfilment.py).
+
+from app.admin.importer import create_job, run_import, submit_import, reserve_skus, error_report_path
+# Streaming CSV importer and SKU block allocation (see importer.py).
+
+from app.admin.purge import active_purge_job, create_purge_job, delete_user_data, order_count, submit_purge
+# Set-based user deletion, with a chunked background purge for big accounts (see purge.py).
+
+from app.admin.queries import order_list_page, order_status_summary, user_list_page, user_summary
+# Set-based queries for the admin listings (see queries.py).
+
+from app.pagination import InvalidCursor
+# Raised when a pagination cursor in the query string has been tampered with.
+
+from app.archive import find_order
+# Looks an order up in the live table, then in the archive.
+
+from app.replicas import read_only
+# Marks report views whose GET requests may be served from a read replica.
+
+from app import stats
+# Running totals for the dashboard, bumped in the same transaction as each change.
+
+from app import db, identity_cache, sql_profiler
 # Import SQLAlchemy database instance to query/commit/rollback.
+# sql_profiler: per-request SQL timings behind the /admin/perf page (see profiler.py).
+
+from app.profiler import summarize, slowest_statements
+# Aggregate the profiler's ring buffer of recent requests per endpoint.
+
+from app.main.catalog import invalidate_catalog
+# Drops cached storefront pages/products after any admin change to the catalogue.
 
 import os
 # Standard library module for filesystem path operations and directory creation.
 
-from werkzeug.utils import secure_filename
-# Utility to sanitize uploaded filenames (avoid path traversal / unsafe characters).
+from app.images import store_upload
+# Content-addressed image storage and derivative pipeline (see images.py).
 
-from sqlalchemy import func
+from sqlalchemy import func, update
 # Import SQL functions/aggregators like func.sum used in queries.
+# update: set-based UPDATE statements (e.g. bumping cart versions).
 
 from . import admin_bp
 # Import the Blueprint instance (admin_bp) defined in this package's __init__.py.
 
-import csv
-# Standard library CSV module to parse uploaded CSV files.
-
-from io import StringIO
-# String buffer wrapper used to read the uploaded CSV bytes as a text stream.
-
 from decimal import Decimal
 # Decimal type for precise monetary arithmetic and validation.
 
 # ----------------------------- FILE UPLOAD HANDLER -----------------------------
 def save_product_image(file):
     # Accepts a FileStorage object and saves it to static/uploads/products.
-    # Returns a relative path to store in DB (e.g., 'uploads/products/20250101_...jpg') or None.
+    # Returns a relative path to store in DB (e.g., 'uploads/products/3f2a...e1.jpg') or None.
 
     if file and file.filename:
         # Ensure there's a file and the filename is not empty.
 
-        filename = secure_filename(file.filename)
-        # Sanitize the filename to remove dangerous characters.
-
-        from datetime import datetime
-        # Import datetime locally to timestamp the filename (keeps top-level imports tidy).
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_")
-        # Create a timestamp string: YYYYMMDD_HHMMSS_ used to make filenames unique.
-
-        unique_filename = timestamp + filename
-        # Prepend timestamp to sanitized filename to avoid collisions.
-
-        upload_folder = os.path.join(current_app.root_path, 'static', 'uploads', 'products')
-        # Build the absolute path to the uploads folder inside the app's static folder.
-
-        os.makedirs(upload_folder, exist_ok=True)
-        # Create the folder (and parents) if it doesn't exist; exist_ok avoids exception if it does.
-
-        file_path = os.path.join(upload_folder, unique_filename)
-        # Full filesystem path where the file will be saved.
-
-        file.save(file_path)
-        # Save the uploaded file to disk.
-
-        return f"uploads/products/{unique_filename}"
-        # Return the relative path used by templates/DB (no leading 'static/').
+        return store_upload(file)
+        # Stored under its content hash (identical re-uploads share one file); the
+        # resized thumb/card/detail variants are built on the image worker pool.
 
     return None
     # If no file provided, return None (caller can handle absence of image).
@@ -92,6 +99,7 @@ def save_product_image(file):
 # ----------------------------- ADMIN DASHBOARD -----------------------------
 @admin_bp.route('/admin')
 @login_required
+@read_only
 def admin_dashboard():
     # Route: /admin — main admin dashboard. Requires login.
 
@@ -104,35 +112,25 @@ def admin_dashboard():
         return redirect(url_for('main.index'))
         # Redirect non-admins back to the main index page.
 
-    total_users = User.query.count()
-    # Count total users in the database.
-
-    total_products = Product.query.count()
-    # Count total products in the database.
-
-    total_orders = Order.query.count()
-    # Count total orders in the database.
-
-    revenue = db.session.query(func.sum(Order.grand_total)).filter(
-        Order.status == 'completed'
-    ).scalar() or 0
-    # Sum grand_total for orders with status 'completed'. scalar() returns None if no rows,
-    # so 'or 0' ensures revenue is numeric zero instead of None.
+    totals = stats.read_stats()
+    # Users, products, orders and completed revenue from the site_stat counter rows,
+    # kept up to date at each write site instead of counting whole tables per view.
 
     recent_orders = Order.query.order_by(Order.order_date.desc()).limit(5).all()
     # Retrieve the 5 most recent orders sorted by order_date descending.
 
     return render_template('admin/dashboard.html', 
-                         total_users=total_users,
-                         total_products=total_products,
-                         total_orders=total_orders,
-                         revenue=revenue,
+                         total_users=totals[stats.USERS],
+                         total_products=totals[stats.PRODUCTS],
+                         total_orders=totals[stats.ORDERS],
+                         revenue=totals[stats.COMPLETED_REVENUE],
                          recent_orders=recent_orders)
     # Render admin dashboard template with the computed statistics.
 
 # ----------------------------- MANAGE USERS -----------------------------
 @admin_bp.route('/admin/users')
 @login_required
+@read_only
 def manage_users():
     # Route: /admin/users — list and stats for all users. Requires admin.
 
@@ -140,33 +138,37 @@ def manage_users():
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('main.index'))
 
-    users = User.query.all()
-    # Retrieve all user objects.
-
-    total_users = User.query.count()
-    # Total users count.
+    search = request.args.get('q', '').strip()
+    # Optional prefix search on email or name (?q=...).
 
-    admin_users = User.query.filter_by(is_admin=True).count()
-    # Count how many users have is_admin True.
-
-    active_users = User.query.filter_by(is_active=True).count()
-    # Count active users (is_active True).
+    try:
+        page = user_list_page(
+            per_page=current_app.config['ADMIN_USERS_PAGE_SIZE'],
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            search=search or None,
+        )
+    except InvalidCursor:
+        abort(400)
+    # One page of users with their order counts, from a single query.
 
-    from datetime import datetime, timedelta
+    from datetime import datetime
     # Local import for datetime utilities (used to compute month start).
 
     first_day_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     # Compute the first instant of the current month.
 
-    new_this_month = User.query.filter(User.date_joined >= first_day_of_month).count()
-    # Count users whose date_joined is on/after the first day of this month.
+    summary = user_summary(since=first_day_of_month)
+    # Total/admin/active/new-this-month counts from one conditional-aggregate query.
 
     return render_template('admin/users.html', 
-                         users=users,
-                         total_users=total_users,
-                         admin_users=admin_users,
-                         active_users=active_users,
-                         new_this_month=new_this_month)
+                         users=page.items,
+                         page=page,
+                         search=search,
+                         total_users=summary['total'],
+                         admin_users=summary['admins'],
+                         active_users=summary['active'],
+                         new_this_month=summary['new'])
     # Render the users management template with data and stats.
 
 # ----------------------------- MANAGE PRODUCTS -----------------------------
@@ -203,17 +205,23 @@ def manage_products():
             stock_level=form.stock_level.data,
             desc=form.description.data,
             image_url=image_path,
-            sku=f"{form.category.data}_{Product.query.count() + 1}"
+            sku=f"{form.category.data}_{reserve_skus(1)}"
         )
         # Construct a Product model instance with data from the form.
-        # SKU is generated using category and current product count + 1 (simple approach).
+        # SKU is category + the next number from the shared SKU counter.
 
         db.session.add(product)
         # Stage the new product for insertion.
 
+        stats.bump(stats.PRODUCTS, 1)
+        # Count it on the dashboard in the same transaction.
+
         db.session.commit()
         # Commit the transaction (persist product to DB).
 
+        invalidate_catalog()
+        # The new product must show up on the storefront straight away.
+
         flash('Product added successfully!', 'success')
         # Notify admin that product was added.
 
@@ -224,124 +232,29 @@ def manage_products():
     if batch_form.validate_on_submit() and request.form.get('submit') == 'batch':
         # Check that batch upload form passed validation and submit type is 'batch'.
 
-        file = batch_form.csv_file.data
-        # Get the uploaded FileStorage object from the form.
-
-        stream = StringIO(file.stream.read().decode("UTF-8"), newline=None)
-        # Read bytes from file.stream, decode to text, and wrap in StringIO for CSV reader.
-
-        csv_reader = csv.DictReader(stream)
-        # DictReader maps each CSV row to a dict using header row as keys.
-
-        imported = 0
-        # Counter for successfully imported rows.
-
-        errors = []
-        # List to accumulate row-level error messages.
-
-        for row_num, row in enumerate(csv_reader, start=2):  # start=2 → skip header
-            # Iterate CSV rows with a row number (start=2 since row 1 is header).
-
-            try:
-                name = row.get('name', '').strip()
-                # Get 'name' column; default to empty string and strip whitespace.
-
-                category = row.get('category', '').strip().lower()
-                # Get category, strip whitespace, normalize to lowercase.
-
-                price_str = row.get('price', '').strip()
-                stock_str = row.get('stock_level', '').strip()
-                desc = row.get('description', '').strip()
-                # Extract other fields (price, stock_level, description).
-
-                if not all([name, category, price_str, stock_str]):
-                    errors.append(f"Row {row_num}: Missing required fields")
-                    continue
-                # If any required field missing or empty, record error and skip row.
-
-                if category not in ['handbag', 'watch']:
-                    errors.append(f"Row {row_num}: Invalid category '{category}'")
-                    continue
-                # Validate category against allowed list.
-
-                try:
-                    price = Decimal(price_str)
-                    if price < 0.01:
-                        raise ValueError
-                except:
-                    errors.append(f"Row {row_num}: Invalid price '{price_str}'")
-                    continue
-                # Parse price as Decimal and ensure minimum price threshold.
-
-                try:
-                    stock_level = int(stock_str)
-                    if stock_level < 0:
-                        raise ValueError
-                except:
-                    errors.append(f"Row {row_num}: Invalid stock '{stock_str}'")
-                    continue
-                # Parse stock level and ensure non-negative integer.
-
-                image_url = row.get('image_url', '').strip()
-                # Optional image_path column from CSV.
-
-                if image_url:
-                    image_url = image_url.lstrip('/')
-                    # Remove leading slash if user included one.
-
-                    if image_url.startswith('static/'):
-                        image_url = image_url[7:]
-                    # Strip leading 'static/' if present to normalize path.
-
-                    if not image_url.startswith('uploads/products/'):
-                        errors.append(f"Row {row_num}: image_url must be in uploads/products/")
-                        image_url = None
-                    # Enforce that CSV image_url points to uploads/products/ to avoid arbitrary paths.
-
-                else:
-                    image_url = None
-                # If no image_url provided, keep it None.
-
-                sku = f"{category}_{Product.query.count() + imported + 1}"
-                # Generate SKU using current product count plus imported offset to avoid collisions.
-
-                product = Product(
-                    name=name,
-                    category=category,
-                    price=price,
-                    stock_level=stock_level,
-                    desc=desc or None,
-                    image_url=image_url or None,
-                    sku=sku
-                )
-                # Create Product instance from validated CSV row.
-
-                db.session.add(product)
-                # Stage product for insertion.
-
-                imported += 1
-                # Increment imported counter for successful staging.
-
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-                # Catch-all: record unexpected exceptions per row and continue.
-
-        # After processing all rows, commit if at least one product staged.
-        if imported > 0:
-            try:
-                db.session.commit()
-                flash(f'Successfully imported {imported} products!', 'success')
-            except Exception as e:
-                db.session.rollback()
-                flash(f'Error saving to database: {e}', 'danger')
-            # Commit transaction; rollback and flash error if commit fails.
+        job = create_job(batch_form.csv_file.data)
+        # Stream the upload to disk and register an import job for it.
+
+        if batch_form.background.data:
+            submit_import(job.job_id)
+            flash('Import started in the background.', 'info')
+            return redirect(url_for('admin.import_status', job_id=job.job_id))
+        # Large files: hand off to the background worker and show the progress page.
+
+        job = run_import(job.job_id)
+        # Small files: import right away (still streamed, validated and inserted in chunks).
+
+        if job.status == 'failed':
+            flash(f'Error saving to database: {job.message}', 'danger')
+        elif job.rows_imported > 0:
+            flash(f'Successfully imported {job.rows_imported} products!', 'success')
         else:
             flash('No products imported.', 'warning')
-            # Inform admin if nothing was imported.
 
-        if errors:
-            flash(f'Errors: {" | ".join(errors[:5])}' + (f" (+{len(errors)-5} more)" if len(errors)>5 else ""), 'danger')
-        # If errors exist, flash up to first 5 and show count of remaining.
+        if job.rows_with_errors:
+            flash(f'{job.rows_with_errors} row(s) had errors. See the error report on the import page.', 'danger')
+            return redirect(url_for('admin.import_status', job_id=job.job_id))
+        # Point the admin at the downloadable error report instead of a truncated flash.
 
         return redirect(url_for('admin.manage_products'))
         # Redirect to avoid re-submission and show flash messages.
@@ -360,39 +273,80 @@ def manage_products():
     )
     # Render products management template with list and both forms.
 
-# ----------------------------- MANAGE ORDERS -----------------------------
-@admin_bp.route('/admin/orders')
+# ----------------------------- IMPORT STATUS -----------------------------
+@admin_bp.route('/admin/imports/<int:job_id>')
 @login_required
-def manage_orders():
-    # Route: /admin/orders — list orders and provide order statistics.
+def import_status(job_id):
+    # Route: progress/status page for a CSV product import.
 
     if not current_user.is_admin:
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('main.index'))
 
-    orders = Order.query.order_by(Order.order_date.desc()).all()
-    # Fetch all orders ordered by most recent first.
+    job = ImportJob.query.get_or_404(job_id)
+    # Load the import job or 404.
 
-    total_revenue = db.session.query(func.sum(Order.grand_total)).filter(
-        Order.status == 'completed'
-    ).scalar() or 0
-    # Compute total revenue from completed orders (safe default 0).
+    return render_template('admin/import_status.html', job=job)
+    # The template refreshes itself while the job is still queued/running.
 
-    pending_orders = Order.query.filter_by(status='pending').count()
-    # Count orders with status 'pending'.
+@admin_bp.route('/admin/imports/<int:job_id>/errors.csv')
+@login_required
+def import_errors(job_id):
+    # Route: download the rows an import rejected, with the reason for each.
+
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.', 'error')
+        return redirect(url_for('main.index'))
+
+    job = ImportJob.query.get_or_404(job_id)
+    path = error_report_path(job.job_id)
+    if not os.path.exists(path):
+        abort(404)
+    # No report until the import has started.
 
-    completed_orders = Order.query.filter_by(status='completed').count()
-    # Count orders with status 'completed'.
+    return send_file(path, mimetype='text/csv', as_attachment=True,
+                     download_name=f'import-{job.job_id}-errors.csv')
 
-    processing_orders = Order.query.filter_by(status='Processing').count()
-    # Count orders with status 'Processing' (note capitalization may be inconsistent).
+# ----------------------------- MANAGE ORDERS -----------------------------
+@admin_bp.route('/admin/orders')
+@login_required
+@read_only
+def manage_orders():
+    # Route: /admin/orders — list orders and provide order statistics.
 
-    return render_template('admin/orders.html', 
-                         orders=orders,
-                         total_revenue=total_revenue,
-                         pending_orders=pending_orders,
-                         completed_orders=completed_orders,
-                         processing_orders=processing_orders)
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.', 'error')
+        return redirect(url_for('main.index'))
+
+    status = request.args.get('status') or None
+    # Optional status filter (?status=pending, ?status=completed, ...).
+
+    try:
+        page = order_list_page(
+            per_page=current_app.config['ADMIN_ORDERS_PAGE_SIZE'],
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            status=status,
+        )
+    except InvalidCursor:
+        abort(400)
+    # One page of orders (newest first) with customer name and item count, all from a
+    # single joined/grouped query instead of per-row user and item lookups.
+
+    summary = order_status_summary()
+    # All status counts and per-status revenue from one GROUP BY status query.
+
+    return render_template('admin/orders.html',
+                         orders=page.items,
+                         page=page,
+                         status=status,
+                         statuses=ORDER_STATUSES,
+                         bulk_form=BulkOrderStatusForm(from_status=status if status in ORDER_STATUSES else ''),
+                         total_orders=summary['total_orders'],
+                         total_revenue=summary['revenue'].get('completed', 0),
+                         pending_orders=summary['counts'].get('pending', 0),
+                         completed_orders=summary['counts'].get('completed', 0),
+                         processing_orders=summary['counts'].get('processing', 0))
     # Render orders template with orders list and stats.
 
 # ----------------------------- EDIT PRODUCT -----------------------------
@@ -429,6 +383,9 @@ def edit_product(product_id):
         db.session.commit()
         # Persist changes to DB.
 
+        invalidate_catalog()
+        # Cached listings/detail pages still show the old values; retire them.
+
         flash('Product updated successfully!', 'success')
         return redirect(url_for('admin.manage_products'))
         # Redirect after successful update.
@@ -449,12 +406,31 @@ def delete_product(product_id):
     product = Product.query.get_or_404(product_id)
     # Load product or 404 if not found.
 
+    affected = [user_id for (user_id,) in
+                db.session.query(CartItem.user_id).filter_by(prod_id=product_id).distinct()]
+    db.session.execute(
+        update(User)
+        .where(User.user_id.in_(affected))
+        .values(cart_version=User.cart_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    for user_id in affected:
+        identity_cache.forget(user_id)
+    # Carts holding this product shrink, so their cached navbar counts are stale
+    # (and so are the cached users carrying the old cart_version).
+
     db.session.delete(product)
     # Mark product for deletion.
 
+    stats.bump(stats.PRODUCTS, -1)
+    # Keep the dashboard product count in step.
+
     db.session.commit()
     # Commit deletion.
 
+    invalidate_catalog()
+    # Stop serving the deleted product from the storefront cache.
+
     flash('Product deleted successfully!', 'success')
     return redirect(url_for('admin.manage_products'))
     # Redirect back to products list.
@@ -472,10 +448,16 @@ def update_order_status(order_id):
     order = Order.query.get_or_404(order_id)
     # Load order or 404.
 
-    new_status = request.form.get('status')
-    # Get the new status value from the submitted form.
+    new_status = (request.form.get('status') or '').lower()
+    # Get the new status value from the submitted form (stored in lower case).
+
+    if new_status in ORDER_STATUSES:
+        was_completed = (order.status or '').lower() == 'completed'
+        now_completed = new_status == 'completed'
+        if was_completed != now_completed:
+            stats.bump(stats.COMPLETED_REVENUE, order.grand_total if now_completed else -order.grand_total)
+        # Completed revenue only changes when an order moves into or out of 'completed'.
 
-    if new_status in ['pending', 'processing', 'shipped', 'completed', 'cancelled', 'Processing']:
         order.status = new_status
         db.session.commit()
         flash(f'Order #{order.order_id} status updated to {new_status}', 'success')
@@ -486,6 +468,66 @@ def update_order_status(order_id):
     return redirect(url_for('admin.manage_orders'))
     # Redirect back to orders list.
 
+# ----------------------------- BULK ORDER STATUS -----------------------------
+@admin_bp.route('/admin/orders/bulk_status', methods=['POST'])
+@login_required
+def bulk_update_order_status():
+    # Route: move many orders to a new status with one UPDATE. Takes the ticked
+    # order_ids from the orders page and/or a filter (current status + date range).
+    # Answers JSON when asked for it (Accept: application/json), else flashes the
+    # counts and redirects back to the orders list.
+
+    wants_json = request.accept_mimetypes.best == 'application/json'
+
+    if not current_user.is_admin:
+        if wants_json:
+            abort(403)
+        flash('Access denied. Admin privileges required.', 'error')
+        return redirect(url_for('main.index'))
+
+    form = BulkOrderStatusForm()
+    order_ids = request.form.getlist('order_ids', type=int)
+    # Validated status/filter fields; ticked orders arrive as repeated order_ids fields.
+
+    def refused(message, code=400):
+        db.session.rollback()
+        if wants_json:
+            return jsonify(error=message), code
+        flash(message, 'error')
+        return redirect(url_for('admin.manage_orders', status=form.from_status.data or None))
+    # Errors leave the orders untouched.
+
+    if not form.validate_on_submit():
+        return refused('; '.join(f'{form[name].label.text}: {errors[0]}' for name, errors in form.errors.items()))
+
+    try:
+        result = transition_orders(
+            form.status.data,
+            order_ids=order_ids or None,
+            status=form.from_status.data or None,
+            date_from=form.date_from.data,
+            date_to=form.date_to.data,
+        )
+        db.session.commit()
+    except BulkStatusError as e:
+        return refused(str(e))
+    except BulkStatusConflict as e:
+        return refused(str(e), 409)
+    # One GROUP BY to count the selection per status, one UPDATE for the allowed moves.
+
+    if wants_json:
+        return jsonify(status=form.status.data, **result)
+
+    moved = sum(result['updated'].values())
+    flash(f"{moved} order(s) marked {form.status.data}.", 'success' if moved else 'warning')
+    if result['skipped']:
+        skipped = ', '.join(f"{n} {status or 'no status'}" for status, n in sorted(result['skipped'].items()))
+        flash(f"Left unchanged (can't move to {form.status.data}): {skipped}.", 'warning')
+    # Per-status counts of what moved and what was skipped.
+
+    return redirect(url_for('admin.manage_orders', status=form.from_status.data or None))
+    # Back to the list the admin was working through.
+
 # ----------------------------- ADD PRODUCT (EMPTY FORM) -----------------------------
 @admin_bp.route('/admin/add_product')
 @login_required
@@ -505,6 +547,7 @@ def add_product():
 # ----------------------------- ORDER DETAILS PAGE -----------------------------
 @admin_bp.route('/admin/orders/<int:order_id>')
 @login_required
+@read_only
 def order_details(order_id):
     # Route: show detailed view for a specific order.
 
@@ -512,10 +555,12 @@ def order_details(order_id):
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('main.index'))
 
-    order = Order.query.get_or_404(order_id)
-    # Load order and return 404 if not found.
+    order = find_order(order_id)
+    if order is None:
+        abort(404)
+    # Load the order, from the archive if it has been archived (see app/archive.py), or 404.
 
-    return render_template('admin/order_details.html', order=order)
+    return render_template('admin/order_details.html', order=order, statuses=ORDER_STATUSES)
     # Render order details template with the order object.
 
 # ----------------------------- DELETE USER -----------------------------
@@ -537,32 +582,65 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     # Load the user or return 404.
 
-    try:
-        CartItem.query.filter_by(user_id=user_id).delete()
-        # Delete all cart items belonging to the user in a single query.
-
-        user_orders = Order.query.filter_by(user_id=user_id).all()
-        # Fetch all orders for the user to delete their items first.
+    job = active_purge_job(user_id)
+    if job is not None:
+        flash(f'User {user.name} is already being deleted ({job.orders_deleted or 0} of {job.orders_total} orders so far).', 'info')
+        return redirect(url_for('admin.manage_users'))
+    # A purge is under way: don't start a second one, inline or in the background.
 
-        for order in user_orders:
-            OrderItem.query.filter_by(order_id=order.order_id).delete()
-            db.session.delete(order)
-        # For each order: delete its OrderItem rows, then delete the Order record itself.
+    if order_count(user_id) > current_app.config['USER_PURGE_INLINE_LIMIT']:
+        job, created = create_purge_job(user)
+        if created:
+            submit_purge(job.job_id)
+        flash(f'User {user.name} has been deactivated; their {job.orders_total} orders are being deleted in the background.', 'info')
+        return redirect(url_for('admin.manage_users'))
+    # Heavy buyers: lock the account now and delete it in chunks on the purge worker
+    # (only a newly queued job is submitted).
 
-        db.session.delete(user)
-        # Delete the user record.
+    try:
+        delete_user_data(user_id)
+        # Delete the user's order lines, orders, cart and user row with set-based
+        # DELETEs (a few statements however many orders there are).
 
         db.session.commit()
         # Commit transaction (deleting cart items, order items, orders, and user).
 
         flash(f'User {user.name} has been deleted successfully.', 'success')
-    except Exception as e:
+    except Exception:
         db.session.rollback()
         # Rollback any partial changes if an error occurred.
 
         flash('Error deleting user. Please try again.', 'error')
-        print(f"Error deleting user: {e}")
-        # Print/log the exception for debugging (server-side).
+        current_app.logger.exception("Error deleting user %s", user_id)
+        # Log the exception with its traceback for debugging (server-side).
 
     return redirect(url_for('admin.manage_users'))
     # Redirect back to manage users page after attempt.
+
+# ----------------------------- PERFORMANCE -----------------------------
+@admin_bp.route('/admin/perf')
+@login_required
+def perf():
+    # Route: per-endpoint timings and slowest statements of the recent requests this
+    # worker served, from the SQL profiler's ring buffer (only when SQL_PROFILER is on).
+
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.', 'error')
+        return redirect(url_for('main.index'))
+
+    if not sql_profiler.enabled():
+        return render_template('admin/perf.html', enabled=False)
+    # Nothing is recorded while the profiler is off; the page explains how to turn it on.
+
+    recent = sql_profiler.recent()
+    # Snapshot of the buffer, oldest first (other requests keep appending to it).
+
+    return render_template(
+        'admin/perf.html',
+        enabled=True,
+        endpoints=summarize(recent),
+        statements=slowest_statements(recent),
+        recent=recent[::-1][:50],
+        history=current_app.config['SQL_PROFILER_HISTORY'],
+    )
+    # Render endpoint aggregates, the slowest statements and the latest 50 requests.
@@ -0,0 +1,96 @@
+# app/archive.py
+# Order archival: keeps the order and order_item tables a bounded size.
+#
+#     flask orders archive            # e.g. nightly
+#
+# moves orders that are finished (completed or cancelled) and older than
+# ORDER_ARCHIVE_AFTER_DAYS, with their lines, into order_archive and
+# order_item_archive. Rows keep their ids. Each chunk of ORDER_ARCHIVE_CHUNK_SIZE
+# orders is copied and deleted in its own transaction (INSERT ... SELECT, then
+# DELETE), so an interrupted run leaves every order in exactly one place and the next
+# run carries on with what is left.
+#
+# Archived orders still count towards the dashboard totals. Customers' order history
+# and the admin order page read both places (find_order(), ORDER_SOURCES); the admin
+# order list and its status counts only cover the live table.
+
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, insert, select
+
+from app import db
+from app.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+# Statuses an order never leaves (no moves out of them in admin/fulfilment.py)
+TERMINAL_STATUSES = ('completed', 'cancelled')
+# ... as stored: older rows may still use the capitalised spelling
+_STORED_TERMINAL_STATUSES = TERMINAL_STATUSES + tuple(s.capitalize() for s in TERMINAL_STATUSES)
+
+ORDER_COLUMNS = ('order_id', 'user_id', 'order_date', 'status', 'payment_method',
+                 'sub_total', 'grand_total', 'shipping_cost')
+ITEM_COLUMNS = ('order_item_id', 'order_id', 'prod_id', 'qty', 'price_at_purchase')
+
+# (order model, item model) for the live table and the archive, newest first
+ORDER_SOURCES = ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+
+
+def find_order(order_id):
+    """The order with ``order_id``, live or archived, or None."""
+    return db.session.get(Order, order_id) or db.session.get(ArchivedOrder, order_id)
+
+
+def archive_orders(older_than, chunk_size, max_chunks=None):
+    """
+    Move finished orders placed before ``older_than`` to the archive; returns the count.
+
+    Commits once per chunk. Stops after ``max_chunks`` chunks when given.
+    """
+    moved = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        # ix_order_status_date covers this (an IN list, not lower(status), keeps it usable)
+        order_ids = db.session.scalars(
+            select(Order.order_id)
+            .where(Order.status.in_(_STORED_TERMINAL_STATUSES), Order.order_date < older_than)
+            .order_by(Order.order_id)
+            .limit(chunk_size)
+        ).all()
+        if not order_ids:
+            break
+
+        db.session.execute(insert(ArchivedOrder).from_select(
+            ORDER_COLUMNS,
+            select(*(getattr(Order, c) for c in ORDER_COLUMNS)).where(Order.order_id.in_(order_ids)),
+        ))
+        db.session.execute(insert(ArchivedOrderItem).from_select(
+            ITEM_COLUMNS,
+            select(*(getattr(OrderItem, c) for c in ITEM_COLUMNS)).where(OrderItem.order_id.in_(order_ids)),
+        ))
+        db.session.execute(
+            delete(OrderItem).where(OrderItem.order_id.in_(order_ids)).execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            delete(Order).where(Order.order_id.in_(order_ids)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        moved += len(order_ids)
+        chunks += 1
+    return moved
+
+
+orders_cli = AppGroup("orders", help="Maintain the order tables.")
+
+
+@orders_cli.command("archive")
+@click.option("--days", type=int, default=None, help="Archive orders older than this (ORDER_ARCHIVE_AFTER_DAYS).")
+@click.option("--chunk-size", type=int, default=None, help="Orders per transaction (ORDER_ARCHIVE_CHUNK_SIZE).")
+@click.option("--max-chunks", type=int, default=None, help="Stop after this many chunks; rerun to continue.")
+def archive_command(days, chunk_size, max_chunks):
+    """Move old completed and cancelled orders to the archive tables."""
+    days = days if days is not None else current_app.config["ORDER_ARCHIVE_AFTER_DAYS"]
+    older_than = datetime.now() - timedelta(days=days)
+    moved = archive_orders(older_than, chunk_size or current_app.config["ORDER_ARCHIVE_CHUNK_SIZE"], max_chunks)
+    click.echo(f"Archived {moved} orders placed before {older_than:%Y-%m-%d}.")
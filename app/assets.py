@@ -0,0 +1,137 @@
+# app/assets.py
+# Fingerprinted, precompressed static assets.
+#
+# At startup (or with `flask assets build`) every file under static/css and static/js
+# is copied to static/dist/ under a content-hashed name, e.g.
+#
+#     css/base.css  ->  dist/css/base.3f2a9c1d04e7.css  (+ .gz and, with brotli, .br)
+#
+# and dist/manifest.json maps one to the other. Templates link assets through
+# asset_url(), a drop-in for url_for('static', ...) that swaps in the hashed name.
+# Hashed files never change, so they are served with a one-year immutable
+# Cache-Control, and the precompressed sibling that matches Accept-Encoding is sent
+# instead of compressing on every request.
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip siblings are written
+    brotli = None
+
+ASSET_DIRS = ("css", "js")
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MIN_COMPRESS_SIZE = 256  # smaller files aren't worth a compressed sibling
+
+# Encoding name -> file suffix, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    with os.fdopen(fd, "wb") as out:
+        out.write(data)
+    os.replace(tmp_path, path)
+
+
+def build(static_folder):
+    """
+    Fingerprint and precompress every asset; returns the manifest.
+
+    Safe to run from several workers at once: files are written atomically and
+    already-built hashes are skipped.
+    """
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        root = os.path.join(static_folder, asset_dir)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                source = os.path.join(dirpath, filename)
+                logical = os.path.relpath(source, static_folder).replace(os.sep, "/")
+                with open(source, "rb") as f:
+                    data = f.read()
+
+                stem, ext = os.path.splitext(logical)
+                hashed = f"{DIST_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+                manifest[logical] = hashed
+
+                target = os.path.join(static_folder, hashed)
+                if os.path.exists(target):
+                    continue
+                if len(data) >= MIN_COMPRESS_SIZE:
+                    _write_atomic(target + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+                    if brotli is not None:
+                        _write_atomic(target + ".br", brotli.compress(data, quality=11))
+                # The plain file goes last: its presence means the siblings are done
+                _write_atomic(target, data)
+
+    _write_atomic(
+        os.path.join(static_folder, DIST_DIR, MANIFEST),
+        json.dumps(manifest, indent=2, sort_keys=True).encode(),
+    )
+    return manifest
+
+
+def asset_url(endpoint, **values):
+    """url_for() that points static assets at their fingerprinted copies."""
+    if endpoint == "static":
+        manifest = current_app.extensions.get("assets", {})
+        values["filename"] = manifest.get(values.get("filename"), values.get("filename"))
+    return url_for(endpoint, **values)
+
+
+def send_static(filename):
+    """Static view: far-future caching and precompressed variants for dist/ files."""
+    if not filename.startswith(DIST_DIR + "/"):
+        return current_app.send_static_file(filename)
+
+    static_folder = current_app.static_folder
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    response = None
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(
+            os.path.join(static_folder, filename + suffix)
+        ):
+            response = send_from_directory(
+                static_folder, filename + suffix, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE
+            )
+            response.content_encoding = encoding
+            break
+    if response is None:
+        response = send_from_directory(static_folder, filename, max_age=IMMUTABLE_MAX_AGE)
+
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_app(app):
+    app.add_template_global(asset_url)
+    # Take over the built-in /static/<path:filename> endpoint
+    app.view_functions["static"] = send_static
+    if app.config["ASSETS_FINGERPRINT"]:
+        app.extensions["assets"] = build(app.static_folder)
+        app.logger.info("Fingerprinted %d static assets", len(app.extensions["assets"]))
+
+
+assets_cli = AppGroup("assets", help="Static asset pipeline.")
+
+
+@assets_cli.command("build")
+def build_command():
+    """Fingerprint and precompress static assets into static/dist."""
+    manifest = build(current_app.static_folder)
+    click.echo(f"Built {len(manifest)} assets (brotli {'on' if brotli else 'off'})")
@@ -1,6 +1,7 @@
 # File: app/auth/routes.py
-from flask import Blueprint, render_template, redirect, url_for, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+import math
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from app.auth.forms import RegistrationForm, LoginForm
 from . import auth_bp
 from app.models import User, db
@@ -10,6 +11,15 @@ from flask_login import (
     logout_user,
 )  
 from app.tasks import send_welcome_email
+from app import stats, password_hasher, login_throttle
+from app.passwords import HashingBusy
+from app.cart.basket import cart_badge_count
+
+
+def _try_again_later(template, form, retry_after, status):
+    # Throttled (429) or hashing pool full (503): same form, with a Retry-After
+    flash("Too many attempts right now. Please wait a moment and try again.", "danger")
+    return render_template(template, form=form), status, {"Retry-After": str(max(1, math.ceil(retry_after)))}
 
 
 # --- A. Registration Route ---
@@ -17,6 +27,11 @@ from app.tasks import send_welcome_email
 def register():
     form = RegistrationForm()
     if form.validate_on_submit():
+        # Sign-ups hash a password too, so they share the per-IP bucket with logins
+        wait = login_throttle.check(request.remote_addr)
+        if wait:
+            return _try_again_later("auth/register.html", form, wait, 429)
+
         # Check if user already exists
         user = User.query.filter_by(email=form.email.data).first()
         if user:
@@ -25,9 +40,10 @@ def register():
             return redirect(url_for("auth.register"))
 
         # Create new user
-        hashed_password = generate_password_hash(
-            form.password.data, method="pbkdf2:sha256"
-        )
+        try:
+            hashed_password = password_hasher.hash(form.password.data)
+        except HashingBusy:
+            return _try_again_later("auth/register.html", form, 1, 503)
         new_user = User(
             name=form.name.data,
             email=form.email.data,
@@ -35,9 +51,10 @@ def register():
             wallet_balance=0.00,  # Initialise the wallet balance
         )
 
-        # Save to database
+        # Save to database (the welcome email is queued in the same transaction)
         send_welcome_email(form.email.data, form.name.data) 
         db.session.add(new_user)
+        stats.bump(stats.USERS, 1)
         db.session.commit()
         
 
@@ -55,9 +72,31 @@ def login():
 
     form = LoginForm()
     if form.validate_on_submit():
+        # Refuse before hashing anything if this IP or account is over its budget
+        wait = login_throttle.check(request.remote_addr, form.email.data)
+        if wait:
+            return _try_again_later("auth/login.html", form, wait, 429)
+
         user = User.query.filter_by(email=form.email.data).first()
-        if user and check_password_hash(user.password_hash, form.password.data):
-            login_user(user)
+        try:
+            valid = user is not None and password_hasher.verify(user.password_hash, form.password.data)
+        except HashingBusy:
+            return _try_again_later("auth/login.html", form, 1, 503)
+
+        if valid:
+            login_throttle.succeeded(form.email.data)
+            if password_hasher.needs_rehash(user.password_hash):
+                # Hashed at an older cost; we have the plain password now, so upgrade it
+                try:
+                    user.password_hash = password_hasher.hash(form.password.data)
+                    db.session.commit()
+                except HashingBusy:
+                    pass  # busy: keep the old hash and upgrade on a later login
+            if not login_user(user):
+                # Deactivated, e.g. while the account is being deleted
+                flash("This account has been deactivated.", "danger")
+                return render_template("auth/login.html", form=form)
+            cart_badge_count()  # count the cart once now; pages reuse it until it changes
             flash("Welcome back!", "info")
             return redirect(url_for("main.index")) 
         else:
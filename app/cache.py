@@ -0,0 +1,407 @@
+# app/cache.py
+# Read-through cache for the storefront catalogue.
+#
+# The catalogue changes only when an admin edits products, yet every storefront hit
+# used to go straight to the database. CatalogCache sits in front of those reads:
+#
+#   * Pluggable backends: an in-process LRU with TTL ("memory"), pickled files in a
+#     directory shared by worker processes ("filesystem"), and a Redis-protocol
+#     backend ("redis") that accepts any client with get/set/delete/incr.
+#   * Invalidation by generation: every key is prefixed with a generation counter and
+#     invalidate() just increments it, so one O(1) write retires every cached page
+#     without having to enumerate keys. Backends that keep retired entries around
+#     (the file cache has no TTL sweeper of its own) drop them in clear().
+#   * Single-flight loading: on a miss only one caller per key runs the loader; the
+#     others wait on a lock and then read the freshly stored value, so a cold key
+#     under load costs one database query instead of hundreds.
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+# Returned by backends on a miss, so that a cached None is still a hit.
+MISS = object()
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._counters = {}  # kept apart so LRU eviction never resets a generation
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def lock(self, key, timeout):
+        # Nothing outside this process can see our entries, so the process-local
+        # single-flight lock in CatalogCache is already sufficient.
+        return nullcontext()
+
+
+class FileSystemBackend:
+    """
+    Pickled entries in a directory, shareable between worker processes on one host.
+
+    Holds at most ``max_entries`` entries: each write beyond that deletes the oldest
+    files, so a stream of distinct keys (page cursors, ...) can't fill the disk.
+    """
+
+    def __init__(self, directory, max_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix=".cache"):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + suffix)
+
+    def _write(self, path, payload):
+        # Write to a temp file and rename so readers never see a half-written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                expires_at, value = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return MISS
+        if expires_at is not None and expires_at <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return MISS
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        self._write(self._path(key), (expires_at, value))
+        self._evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for path, _ in self._entry_files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _entry_files(self):
+        """(path, mtime) of every entry file; counters and locks are left out."""
+        files = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".cache"):
+                    try:
+                        files.append((entry.path, entry.stat().st_mtime))
+                    except OSError:
+                        pass  # removed by another worker meanwhile
+        return files
+
+    def _evict(self):
+        files = self._entry_files()
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda f: f[1])
+        for path, _ in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get_counter(self, key):
+        try:
+            with open(self._path(key, ".counter"), "r") as fh:
+                return int(fh.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def incr(self, key):
+        with self.lock("counter:" + key, timeout=5):
+            value = self.get_counter(key) + 1
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "w") as fh:
+                fh.write(str(value))
+            os.replace(tmp_path, self._path(key, ".counter"))
+            return value
+
+    @contextmanager
+    def lock(self, key, timeout):
+        # O_EXCL lock file: portable across platforms and visible to other processes.
+        # A lock older than `timeout` is assumed to belong to a crashed worker.
+        path = self._path(key, ".lock")
+        deadline = time.time() + timeout
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > timeout:
+                        os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                if time.time() >= deadline:
+                    # Give up waiting and load anyway rather than fail the request.
+                    yield
+                    return
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class RedisBackend:
+    """
+    Backend for any Redis-protocol server (Redis, Valkey, KeyDB, ...).
+
+    ``client`` only needs get/set(ex=, nx=, px=)/delete/incr, so a local stand-in
+    server or an in-process fake can be swapped in for development and tests.
+    """
+
+    def __init__(self, client, prefix="catalog-cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis  # optional dependency, only needed for this backend
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return MISS
+        return pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(self.prefix + key, raw, ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        # Retired entries expire on their TTL (or to the server's maxmemory policy)
+        pass
+
+    def get_counter(self, key):
+        raw = self.client.get(self.prefix + "counter:" + key)
+        return int(raw) if raw is not None else 0
+
+    def incr(self, key):
+        return int(self.client.incr(self.prefix + "counter:" + key))
+
+    @contextmanager
+    def lock(self, key, timeout):
+        # SET NX PX lock so only one worker process loads a cold key. The token
+        # guards against deleting a lock that expired and was taken by someone else.
+        lock_key = self.prefix + "lock:" + key
+        token = uuid.uuid4().hex
+        deadline = time.time() + timeout
+        acquired = False
+        while not acquired:
+            acquired = bool(self.client.set(lock_key, token, nx=True, px=int(timeout * 1000)))
+            if acquired or time.time() >= deadline:
+                break
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            if acquired:
+                current = self.client.get(lock_key)
+                if current is not None and (
+                    current.decode() if isinstance(current, bytes) else current
+                ) == token:
+                    self.client.delete(lock_key)
+
+
+class NullBackend:
+    """Caching disabled: every lookup is a miss."""
+
+    def get(self, key):
+        return MISS
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def get_counter(self, key):
+        return 0
+
+    def incr(self, key):
+        return 0
+
+    def lock(self, key, timeout):
+        return nullcontext()
+
+
+class CatalogCache:
+    """Flask extension wrapping a cache backend with generations and single-flight."""
+
+    GENERATION_KEY = "generation"
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("CATALOG_CACHE_BACKEND", "memory")
+        app.config.setdefault("CATALOG_CACHE_TTL", 300)
+        app.config.setdefault("CATALOG_CACHE_MAX_ENTRIES", 1024)
+        app.config.setdefault(
+            "CATALOG_CACHE_DIR", os.path.join(app.instance_path, "catalog_cache")
+        )
+        app.config.setdefault("CATALOG_CACHE_REDIS_URL", "redis://localhost:6379/0")
+        app.config.setdefault("CATALOG_CACHE_LOCK_TIMEOUT", 10)
+        app.extensions["catalog_cache"] = _CacheState(app.config, _make_backend(app.config))
+
+    @staticmethod
+    def _state():
+        from flask import current_app
+
+        return current_app.extensions["catalog_cache"]
+
+    @property
+    def backend(self):
+        return self._state().backend
+
+    def _namespaced(self, state, key):
+        generation = state.backend.get_counter(self.GENERATION_KEY)
+        return f"{generation}:{key}"
+
+    def get_or_set(self, key, loader, ttl=None):
+        """Return the cached value for ``key``, calling ``loader()`` once on a miss."""
+        state = self._state()
+        ttl = state.config["CATALOG_CACHE_TTL"] if ttl is None else ttl
+        full_key = self._namespaced(state, key)
+
+        value = state.backend.get(full_key)
+        if value is not MISS:
+            return value
+
+        timeout = state.config["CATALOG_CACHE_LOCK_TIMEOUT"]
+        with state.flight(full_key), state.backend.lock(full_key, timeout):
+            # Someone else may have filled the key while we waited for the lock.
+            value = state.backend.get(full_key)
+            if value is not MISS:
+                return value
+            value = loader()
+            state.backend.set(full_key, value, ttl)
+            return value
+
+    def delete(self, key):
+        state = self._state()
+        state.backend.delete(self._namespaced(state, key))
+
+    def invalidate(self):
+        """Retire every cached catalogue entry by moving to a new generation."""
+        backend = self._state().backend
+        backend.incr(self.GENERATION_KEY)
+        backend.clear()  # the old generation's entries can never be read again
+
+
+class _CacheState:
+    """Per-app backend plus the process-local single-flight lock table."""
+
+    def __init__(self, config, backend):
+        self.config = config
+        self.backend = backend
+        self._locks = {}  # key -> [lock, waiters]
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def flight(self, key):
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(key, None)
+
+
+def _make_backend(config):
+    kind = config["CATALOG_CACHE_BACKEND"]
+    if kind == "memory":
+        return MemoryBackend(max_entries=config["CATALOG_CACHE_MAX_ENTRIES"])
+    if kind == "filesystem":
+        return FileSystemBackend(config["CATALOG_CACHE_DIR"], max_entries=config["CATALOG_CACHE_MAX_ENTRIES"])
+    if kind == "redis":
+        return RedisBackend.from_url(config["CATALOG_CACHE_REDIS_URL"])
+    if kind in ("null", "none", None):
+        return NullBackend()
+    raise ValueError(f"Unknown CATALOG_CACHE_BACKEND: {kind!r}")
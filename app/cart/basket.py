@@ -0,0 +1,216 @@
+# app/cart/basket.py
+# Cart summary and batched cart changes.
+#
+# cart_summary() is what view_cart renders and what the JSON cart API returns, and
+# apply_cart_ops() applies a list of add / set / remove operations in one transaction
+# so the front end can send several changes in a single round trip.
+#
+# The navbar badge (cart_badge_count) is cached in the session next to the user's
+# cart_version. Every cart change bumps that version through touch_cart(), and the
+# user row is loaded on each request anyway, so pages that don't touch the cart show
+# the badge without any cart query.
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from flask import session
+from flask_login import current_user
+from sqlalchemy import func, inspect, update
+from sqlalchemy.orm import contains_eager
+
+from app import db, identity_cache
+from app.models import CartItem, Product, User
+
+FREE_SHIPPING_THRESHOLD = Decimal("100.00")
+FLAT_SHIPPING = Decimal("5.00")
+MAX_OPS = 100
+
+CART_OPS = ("add", "set", "remove")
+
+
+class CartOpError(ValueError):
+    """A malformed cart operation; nothing in the batch is applied."""
+
+
+def shipping_for(subtotal):
+    """Flat-rate shipping for orders under the free-shipping threshold."""
+    return FLAT_SHIPPING if Decimal("0.00") < subtotal < FREE_SHIPPING_THRESHOLD else Decimal("0.00")
+
+
+@dataclass
+class CartLine:
+    item: CartItem
+    product: Product
+    item_total: Decimal
+
+
+@dataclass
+class CartSummary:
+    lines: list = field(default_factory=list)
+    subtotal: Decimal = Decimal("0.00")
+    shipping: Decimal = Decimal("0.00")
+    grand_total: Decimal = Decimal("0.00")
+
+    @property
+    def item_count(self):
+        return sum(line.item.qty for line in self.lines)
+
+    def to_dict(self):
+        """JSON-friendly form (money as strings, so no float rounding)."""
+        return {
+            "lines": [
+                {
+                    "cart_item_id": line.item.cart_item_id,
+                    "prod_id": line.product.prod_id,
+                    "name": line.product.name,
+                    "qty": line.item.qty,
+                    "stock_level": line.product.stock_level,
+                    "unit_price": f"{line.product.price:.2f}",
+                    "item_total": f"{line.item_total:.2f}",
+                }
+                for line in self.lines
+            ],
+            "item_count": self.item_count,
+            "subtotal": f"{self.subtotal:.2f}",
+            "shipping": f"{self.shipping:.2f}",
+            "grand_total": f"{self.grand_total:.2f}",
+        }
+
+
+def cart_lines(user_id):
+    """A user's cart items with their products loaded by the same (joined) query."""
+    # Inner join: lines whose product has been deleted drop out, as before
+    return (
+        CartItem.query.join(CartItem.product)
+        .options(contains_eager(CartItem.product))
+        .filter(CartItem.user_id == user_id)
+        .order_by(CartItem.cart_item_id)
+    )
+
+
+def cart_summary(user_id):
+    """Lines, subtotal, shipping and grand total for a user's cart, in one query."""
+    summary = CartSummary()
+    for item in cart_lines(user_id):
+        item_total = item.product.price * item.qty
+        summary.lines.append(CartLine(item, item.product, item_total))
+        summary.subtotal += item_total
+
+    summary.shipping = shipping_for(summary.subtotal)
+    summary.grand_total = summary.subtotal + summary.shipping
+    if current_user and current_user.is_authenticated and current_user.user_id == user_id:
+        _remember_badge(summary.item_count)
+    return summary
+
+
+# ----------------------------- NAVBAR BADGE -----------------------------
+def touch_cart(user_id):
+    """Mark a user's cart as changed; call in the same transaction as the change."""
+    db.session.execute(
+        update(User).where(User.user_id == user_id).values(cart_version=User.cart_version + 1)
+    )
+    # A bulk UPDATE, so the identity cache can't see it by itself
+    identity_cache.forget(user_id)
+
+
+def _remember_badge(count):
+    # Keyed by user as well as version: two accounts can share a browser
+    session["cart_badge"] = [current_user.user_id, current_user.cart_version, count]
+
+
+def cart_badge_count():
+    """Items in the current user's cart, recounted only after the cart changes."""
+    if not current_user.is_authenticated:
+        return 0
+    cached = session.get("cart_badge")
+    if cached and cached[:2] == [current_user.user_id, current_user.cart_version]:
+        return cached[2]
+
+    count = (
+        db.session.query(func.coalesce(func.sum(CartItem.qty), 0))
+        .join(CartItem.product)
+        .filter(CartItem.user_id == current_user.user_id)
+        .scalar()
+    )
+    _remember_badge(count)
+    return count
+
+
+def _parse_ops(ops):
+    if not isinstance(ops, list) or not ops:
+        raise CartOpError("'ops' must be a non-empty list")
+    if len(ops) > MAX_OPS:
+        raise CartOpError(f"At most {MAX_OPS} operations per request")
+
+    parsed = []
+    for index, op in enumerate(ops):
+        if not isinstance(op, dict) or op.get("op") not in CART_OPS:
+            raise CartOpError(f"Operation {index}: 'op' must be one of {', '.join(CART_OPS)}")
+        prod_id, qty = op.get("prod_id"), op.get("qty", 1)
+        if not isinstance(prod_id, int) or isinstance(prod_id, bool):
+            raise CartOpError(f"Operation {index}: 'prod_id' must be an integer")
+        if op["op"] != "remove" and (not isinstance(qty, int) or isinstance(qty, bool) or qty < 0):
+            raise CartOpError(f"Operation {index}: 'qty' must be a non-negative integer")
+        parsed.append((op["op"], prod_id, qty))
+    return parsed
+
+
+def apply_cart_ops(user_id, ops):
+    """
+    Apply a batch of cart operations for ``user_id`` and commit once.
+
+    Each op is a dict: {"op": "add", "prod_id": 3, "qty": 1} adds to the quantity,
+    "set" replaces it (0 removes the line) and "remove" drops the line. Quantities are
+    capped at the product's stock. Returns a list of warnings for ops that were
+    adjusted or skipped; raises CartOpError, applying nothing, if any op is malformed.
+    """
+    parsed = _parse_ops(ops)
+    prod_ids = {prod_id for _, prod_id, _ in parsed}
+
+    # Two queries for the whole batch: the products involved and the user's lines for them
+    # (at most one line per product, enforced by uq_cart_item_user_prod)
+    products = {p.prod_id: p for p in Product.query.filter(Product.prod_id.in_(prod_ids))}
+    lines = {
+        item.prod_id: item
+        for item in CartItem.query.filter(CartItem.user_id == user_id, CartItem.prod_id.in_(prod_ids))
+    }
+
+    def drop(prod_id):
+        item = lines.pop(prod_id, None)
+        if item is None:
+            return
+        if inspect(item).pending:
+            db.session.expunge(item)  # added earlier in this batch, never written
+        else:
+            db.session.delete(item)
+
+    warnings = []
+    for op, prod_id, qty in parsed:
+        product = products.get(prod_id)
+        item = lines.get(prod_id)
+
+        if op == "remove" or (op == "set" and qty == 0):
+            drop(prod_id)
+            continue
+        if product is None:
+            warnings.append(f"Product {prod_id} no longer exists.")
+            continue
+
+        new_qty = qty + (item.qty if item is not None and op == "add" else 0)
+        if new_qty > product.stock_level:
+            warnings.append(f"Only {product.stock_level} of {product.name} in stock.")
+            new_qty = product.stock_level
+        if new_qty <= 0:
+            drop(prod_id)
+            continue
+
+        if item is None:
+            item = CartItem(user_id=user_id, prod_id=prod_id, qty=new_qty)
+            db.session.add(item)
+            lines[prod_id] = item
+        else:
+            item.qty = new_qty
+
+    touch_cart(user_id)
+    db.session.commit()
+    return warnings
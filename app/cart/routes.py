@@ -1,11 +1,32 @@
 # app/cart/routes.py
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, abort, current_app, jsonify
 from flask_login import current_user, login_required
 from . import cart_bp
-from app import db
-from app.models import Product, CartItem, Order, OrderItem # Import your new models!
+from app import db, identity_cache
+from app.models import User, Product, CartItem, Order, OrderItem # Import your new models!
 from decimal import Decimal
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from app.pagination import keyset_paginate_union, InvalidCursor
+from app.archive import ORDER_SOURCES
 from app.tasks import send_order_confirmation_email
+from app.main.catalog import forget_products
+from app.metrics import checkout_outcome
+from app import stats
+from .basket import (
+    CartOpError, apply_cart_ops, cart_badge_count, cart_lines, cart_summary, shipping_for, touch_cart
+)
+
+class CheckoutError(Exception):
+    """A checkout precondition (stock, funds, basket) no longer held when writing."""
+
+
+@cart_bp.app_context_processor
+def inject_cart_badge():
+    # Passed uncalled: only templates that show the badge pay for it
+    return {'cart_badge_count': cart_badge_count}
+
 
 @cart_bp.route('/cart/add/<int:product_id>', methods=['POST'])
 @login_required # Ensure only logged-in users can add to cart
@@ -30,7 +51,20 @@ def add_to_cart(product_id):
         )
         db.session.add(cart_item)
 
-    db.session.commit()
+    touch_cart(current_user.user_id)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request (a double click) inserted this product's line first;
+        # the unique (user_id, prod_id) index refused ours, so add to that line instead
+        db.session.rollback()
+        db.session.execute(
+            update(CartItem)
+            .where(CartItem.user_id == current_user.user_id, CartItem.prod_id == product.prod_id)
+            .values(qty=CartItem.qty + 1)
+        )
+        touch_cart(current_user.user_id)
+        db.session.commit()
     flash(f'Added {product.name} to your cart!', 'success')
     return redirect(url_for('main.product_list'))
 
@@ -40,41 +74,53 @@ def add_to_cart(product_id):
 @login_required
 def view_cart():
     """Displays the user's current shopping cart and calculates the total."""
-    cart_items = CartItem.query.filter_by(user_id=current_user.user_id).all()
-    
-    # Calculate subtotal, handling items that might have been deleted from Product table (though unlikely)
-    subtotal = Decimal('0.00')
-    
-    # Use a dictionary to store product data alongside cart items to avoid N+1 queries later
-    cart_data = []
-    
-    for item in cart_items:
-        # The relationship (item.product) makes fetching the product efficient
-        product = item.product 
-        
-        if product:
-            item_total = product.price * item.qty
-            subtotal += item_total
-            cart_data.append({
-                'item': item,
-                'product': product,
-                'item_total': item_total
-            })
-
-    # Basic shipping calculation (e.g., £5.00 flat rate for orders under £100)
-    shipping = Decimal('5.00') if subtotal < Decimal('100.00') and subtotal > 0 else Decimal('0.00')
-    grand_total = subtotal + shipping
+    summary = cart_summary(current_user.user_id)
 
     context = {
-        'cart_data': cart_data,
-        'subtotal': subtotal,
-        'shipping': shipping,
-        'grand_total': grand_total
+        'cart_data': summary.lines,
+        'subtotal': summary.subtotal,
+        'shipping': summary.shipping,
+        'grand_total': summary.grand_total
     }
     
     return render_template('cart/cart.html', **context)
 
 
+@cart_bp.route('/cart/api', methods=['GET'])
+@login_required
+def cart_state():
+    """Returns the current cart summary as JSON."""
+    return jsonify(cart=cart_summary(current_user.user_id).to_dict())
+
+
+@cart_bp.route('/cart/api/batch', methods=['POST'])
+@login_required
+def cart_batch():
+    """
+    Applies a list of cart operations in one transaction and returns the new summary.
+
+    Body: {"ops": [{"op": "add" | "set" | "remove", "prod_id": 3, "qty": 2}, ...]}.
+    Only JSON bodies are accepted, which also keeps cross-site form posts out.
+    """
+    if not request.is_json:
+        abort(415)
+    payload = request.get_json(silent=True)
+    ops = payload.get('ops') if isinstance(payload, dict) else None
+
+    try:
+        try:
+            warnings = apply_cart_ops(current_user.user_id, ops)
+        except IntegrityError:
+            # Raced another request adding the same product; apply again on top of its line
+            db.session.rollback()
+            warnings = apply_cart_ops(current_user.user_id, ops)
+    except CartOpError as e:
+        db.session.rollback()
+        return jsonify(error=str(e)), 400
+
+    return jsonify(warnings=warnings, cart=cart_summary(current_user.user_id).to_dict())
+
+
 @cart_bp.route('/cart/remove/<int:cart_item_id>', methods=['POST'])
 @login_required
 def remove_from_cart(cart_item_id):
@@ -88,6 +134,7 @@ def remove_from_cart(cart_item_id):
     product_name = item_to_remove.product.name if item_to_remove.product else "Item"
     
     db.session.delete(item_to_remove)
+    touch_cart(current_user.user_id)
     db.session.commit()
     
     flash(f'{product_name} was removed from your basket.', 'info')
@@ -125,6 +172,7 @@ def update_cart_item_quantity(cart_item_id):
         cart_item.qty = new_qty
         flash(f'Quantity for {product.name} updated.', 'success')
 
+    touch_cart(current_user.user_id)
     db.session.commit()
     return redirect(url_for('cart.view_cart'))
 
@@ -134,21 +182,23 @@ def checkout():
     """
     Processes the order:
     1. Validates stock and funds.
-    2. Deducts amount from the user's wallet.
-    3. Creates Order and OrderItem records.
-    4. Reduces product stock.
-    5. Clears the cart.
+    2. Claims (clears) the cart.
+    3. Reduces product stock and deducts the wallet with guarded atomic updates.
+    4. Creates Order and OrderItem records.
+    5. Rolls everything back if any guard fails.
     """
-    # 1. Fetch Cart Data
-    cart_items = CartItem.query.filter_by(user_id=current_user.user_id).all()
+    # 1. Fetch Cart Data (lines and their products in one query)
+    cart_items = cart_lines(current_user.user_id).all()
 
     if not cart_items:
         flash('Your basket is empty and cannot be checked out.', 'warning')
+        checkout_outcome('rejected')
         return redirect(url_for('cart.view_cart'))
 
     payment_method = request.form.get('payment_method')
     if not payment_method:
         flash('Please select a payment method.', 'danger')
+        checkout_outcome('rejected')
         return redirect(url_for('cart.view_cart'))
     
     # Prepare for recalculation and transaction setup
@@ -162,6 +212,7 @@ def checkout():
         # Stock Check
         if product.stock_level < item.qty:
             flash(f'Sorry, not enough stock for {product.name}. Only {product.stock_level} remaining.', 'danger')
+            checkout_outcome('rejected')
             return redirect(url_for('cart.view_cart'))
             
         item_total = product.price * item.qty
@@ -175,21 +226,62 @@ def checkout():
         })
 
     # Shipping/Total Calculation (consistent with view_cart)
-    shipping = Decimal('5.00') if subtotal < Decimal('100.00') and subtotal > 0 else Decimal('0.00')
+    shipping = shipping_for(subtotal)
     grand_total = subtotal + shipping
     
     # Wallet Balance Check
     if payment_method == "Wallet" and current_user.wallet_balance < grand_total:
         flash(f'Insufficient funds. Your wallet balance is £{current_user.wallet_balance:.2f}, but the total is £{grand_total:.2f}. Please top up your wallet.', 'danger')
+        checkout_outcome('rejected')
         return redirect(url_for('cart.view_cart'))
     
     # 3. Transaction Processing (Atomic)
+    # Stock, wallet and cart are changed with guarded UPDATE/DELETE statements whose
+    # row counts tell us whether the values read above still hold. Concurrent
+    # checkouts therefore can't oversell stock or lose a wallet debit, and no lock is
+    # held while this request is doing its Python work.
     try:
-        # a. Deduct from user wallet
+        # a. Claim the cart lines. If another checkout (e.g. a double click) got here
+        #    first, fewer rows are deleted and this attempt backs out.
+        claimed = db.session.execute(
+            delete(CartItem)
+            .where(
+                CartItem.user_id == current_user.user_id,
+                CartItem.cart_item_id.in_([item.cart_item_id for item in cart_items]),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed != len(cart_items):
+            raise CheckoutError('Your basket changed while checking out. Please review it and try again.')
+        touch_cart(current_user.user_id)
+
+        # b. Reduce Product Stock: UPDATE ... SET stock_level = stock_level - :qty
+        #    WHERE stock_level >= :qty. Products are updated in id order so two
+        #    checkouts sharing products always lock them in the same order.
+        for data in sorted(order_items_to_create, key=lambda d: d['product'].prod_id):
+            product = data['product']
+            updated = db.session.execute(
+                update(Product)
+                .where(Product.prod_id == product.prod_id, Product.stock_level >= data['qty'])
+                .values(stock_level=Product.stock_level - data['qty'])
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if updated != 1:
+                raise CheckoutError(f'Sorry, {product.name} has just sold out. Your order was not placed.')
+
+        # c. Deduct from user wallet, guarded the same way against concurrent spends
         if payment_method == "Wallet":
-            current_user.wallet_balance -= grand_total
-        
-        # b. Create new Order - UPDATED to match your Order model
+            debited = db.session.execute(
+                update(User)
+                .where(User.user_id == current_user.user_id, User.wallet_balance >= grand_total)
+                .values(wallet_balance=User.wallet_balance - grand_total)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if debited != 1:
+                raise CheckoutError('Insufficient funds. Please top up your wallet.')
+            identity_cache.forget(current_user.user_id)
+
+        # d. Create new Order - UPDATED to match your Order model
         new_order = Order(
             user_id=current_user.user_id,
             sub_total=subtotal,  # Changed from total_amount
@@ -201,7 +293,7 @@ def checkout():
         db.session.add(new_order)
         db.session.flush() # Needed to get new_order.order_id
 
-        # c. Create OrderItems and update stock
+        # e. Create OrderItems
         for data in order_items_to_create:
             order_item = OrderItem(
                 order_id=new_order.order_id,
@@ -210,14 +302,12 @@ def checkout():
                 price_at_purchase=data['price_at_purchase']
             )
             db.session.add(order_item)
-            
-            # Reduce Product Stock
-            data['product'].stock_level -= data['qty']
-        
-        # d. Delete CartItems
-        CartItem.query.filter_by(user_id=current_user.user_id).delete()
 
-        # 4. Commit Transaction
+        # Keep the admin dashboard's running order count in step
+        stats.bump(stats.ORDERS, 1)
+
+        # 4. Queue the confirmation email and commit it together with the order;
+        # the outbox worker sends it, so the mail server can't stall checkout
         order_items = OrderItem.query.filter_by(order_id=new_order.order_id).all()
         send_order_confirmation_email(
             user=current_user,
@@ -225,23 +315,55 @@ def checkout():
             order_items=order_items
         )
         db.session.commit()
+        # Stock levels changed, so the cached detail pages for these products are stale
+        forget_products(data['product'].prod_id for data in order_items_to_create)
+        checkout_outcome('placed')
         flash(f'Order #{new_order.order_id} successfully placed! The amount of £{grand_total:.2f} has been deducted from your wallet.', 'success')
         
         # Redirect to the homepage or an order history page
         return redirect(url_for('main.index')) 
-        
-    except Exception as e:
+
+    except CheckoutError as e:
+        # Lost a race for stock, funds or the cart: nothing was written
+        db.session.rollback()
+        flash(str(e), 'danger')
+        checkout_outcome('conflict')
+        return redirect(url_for('cart.view_cart'))
+
+    except Exception:
         # 5. Rollback on failure
         db.session.rollback()
         flash('A critical error occurred during checkout. Your order was not placed. Funds have not been deducted.', 'danger')
-        print(f"Checkout error: {e}")
+        current_app.logger.exception("Checkout failed; order not placed")
+        checkout_outcome('error')
         return redirect(url_for('cart.view_cart'))
 
 @cart_bp.route('/orders')
 @login_required
 def user_orders():
-    """Fetches and displays the user's past order history."""
-    # Fetch all orders for the current user, ordered by most recent first
-    orders = Order.query.filter_by(user_id=current_user.user_id).order_by(Order.order_date.desc()).all()
-    
-    return render_template('cart/order_history.html', orders=orders)
\ No newline at end of file
+    """Fetches and displays the user's past order history, one page at a time."""
+    # Orders for the current user, most recent first, from the live order table and
+    # the archive together (see app/archive.py): each is seeked with the same cursor
+    # and the two pages are merged. Items and their products are batch-loaded with one
+    # IN query each, so a page costs a fixed number of queries no matter how many
+    # orders or lines it contains.
+    sources = [
+        (
+            order.query.filter_by(user_id=current_user.user_id).options(
+                selectinload(order.items).selectinload(item.product)
+            ),
+            [(order.order_date, False), (order.order_id, False)],
+        )
+        for order, item in ORDER_SOURCES
+    ]
+    try:
+        page = keyset_paginate_union(
+            sources,
+            per_page=current_app.config['ORDER_HISTORY_PAGE_SIZE'],
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+        )
+    except InvalidCursor:
+        abort(400)
+
+    return render_template('cart/order_history.html', orders=page.items, page=page)
\ No newline at end of file
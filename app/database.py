@@ -0,0 +1,108 @@
+# app/database.py
+# Engine tuning per database backend.
+#
+# engine_options() turns the DB_* / SQLITE_* settings of the selected config profile
+# into SQLALCHEMY_ENGINE_OPTIONS for the configured URI:
+#
+#   * MySQL (mysqlclient): a connection pool sized by DB_POOL_SIZE / DB_MAX_OVERFLOW,
+#     connections recycled after DB_POOL_RECYCLE seconds (below the server's
+#     wait_timeout, so a dropped idle connection is never handed out) and checked
+#     with a cheap ping on checkout.
+#   * SQLite: install_sqlite_pragmas() runs PRAGMAs on every new connection. WAL lets
+#     readers carry on while a write commits. synchronous=NORMAL fsyncs at checkpoints
+#     instead of on every commit, which is still safe from corruption in WAL mode.
+#     busy_timeout makes writers wait for the lock instead of failing at once, and
+#     mmap_size reads the database through memory-mapped pages.
+#
+# Anything set in SQLALCHEMY_ENGINE_OPTIONS itself wins over the computed values.
+# log_engine_settings() logs what was actually applied once the app is up.
+
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import make_url
+
+SQLITE_PRAGMAS = (
+    ("journal_mode", "SQLITE_JOURNAL_MODE"),
+    ("synchronous", "SQLITE_SYNCHRONOUS"),
+    ("busy_timeout", "SQLITE_BUSY_TIMEOUT_MS"),
+    ("mmap_size", "SQLITE_MMAP_SIZE"),
+)
+
+
+def backend_of(uri):
+    return make_url(uri).get_backend_name()
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for config's database, merged over the tuned defaults."""
+    backend = backend_of(config["SQLALCHEMY_DATABASE_URI"])
+    if backend == "sqlite":
+        # Python's sqlite3 has its own lock wait; keep it in step with busy_timeout
+        options = {"connect_args": {"timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000}}
+    elif backend == "mysql":
+        options = {
+            "pool_size": config["DB_POOL_SIZE"],
+            "max_overflow": config["DB_MAX_OVERFLOW"],
+            "pool_recycle": config["DB_POOL_RECYCLE"],
+            "pool_timeout": config["DB_POOL_TIMEOUT"],
+            "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        }
+    else:
+        options = {}
+
+    overrides = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    if "connect_args" in overrides and "connect_args" in options:
+        overrides["connect_args"] = {**options["connect_args"], **overrides["connect_args"]}
+    return {**options, **overrides}
+
+
+def install_sqlite_pragmas(engine, config):
+    """Run the SQLITE_* PRAGMAs on every connection ``engine`` opens."""
+    pragmas = [(name, config[key]) for name, key in SQLITE_PRAGMAS if config.get(key) is not None]
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def init_engines(app, db):
+    """Apply the per-backend tuning to every engine Flask-SQLAlchemy created for ``app``."""
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                install_sqlite_pragmas(engine, app.config)
+
+
+def log_engine_settings(app, db):
+    """Log the profile, database and the pool/PRAGMA settings in effect."""
+    if not app.logger.isEnabledFor(logging.INFO):
+        return
+    options = {k: v for k, v in app.config["SQLALCHEMY_ENGINE_OPTIONS"].items() if k != "connect_args"}
+    with app.app_context():
+        engines = {**db.engines, **app.extensions.get("db_replicas", {})}
+        for bind, engine in engines.items():
+            settings = [f"pool={type(engine.pool).__name__}"]
+            settings += [f"{name}={value}" for name, value in sorted(options.items())]
+            if engine.dialect.name == "sqlite":
+                # Read back what SQLite actually applied (an in-memory DB refuses WAL, say)
+                try:
+                    with engine.connect() as conn:
+                        for name, _ in SQLITE_PRAGMAS:
+                            settings.append(f"{name}={conn.exec_driver_sql(f'PRAGMA {name}').scalar()}")
+                except DBAPIError as exc:
+                    # Startup must not depend on the database being reachable yet
+                    settings.append(f"pragmas unknown ({exc.orig})")
+            app.logger.info(
+                "Database%s [%s profile]: %s (%s)",
+                f" bind {bind!r}" if bind else "",
+                app.config["CONFIG_PROFILE"],
+                engine.url.render_as_string(hide_password=True),
+                ", ".join(settings),
+            )
@@ -0,0 +1,134 @@
+# app/identity.py
+# Short-lived cache of user rows for Flask-Login's user_loader.
+#
+# Every authenticated request resolves current_user, which used to be a primary-key
+# SELECT on the user table each time. IdentityCache keeps a column snapshot of each
+# user for IDENTITY_CACHE_TTL seconds, in process memory by default or in Redis
+# (shared by all workers), and rebuilds current_user from it without a query. The
+# rebuilt User is merged into the session as a persistent object, but its columns are
+# only as fresh as the snapshot: with the per-process backend another worker may have
+# changed the row since (a checkout debiting the wallet, ...). So never write a value
+# computed from current_user back to the row; use a relative UPDATE
+# (wallet_balance = wallet_balance + x) or re-select the user with
+# db.session.get(User, id, populate_existing=True) first.
+#
+# Entries are dropped as soon as the row changes:
+#   * changes made through a User instance (is_admin = True, db.session.delete(user))
+#     are picked up automatically at flush time;
+#   * bulk UPDATE/DELETE statements call identity_cache.forget(user_id) themselves.
+# Either way the key is deleted straight away and again after the commit, so a
+# request racing the transaction can't put the old row back for long. The TTL bounds
+# anything else, such as scripts like make_admin.py run from another process.
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.cache import MISS, MemoryBackend, NullBackend, RedisBackend
+from app.replicas import use_primary
+
+# Never cached (and so lazy-loaded on the rare request that needs it)
+EXCLUDED_COLUMNS = ("password_hash",)
+
+
+class IdentityCache:
+    """Flask extension caching User column snapshots keyed by user id."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("IDENTITY_CACHE_BACKEND", "memory")
+        app.config.setdefault("IDENTITY_CACHE_TTL", 60)
+        app.config.setdefault("IDENTITY_CACHE_MAX_ENTRIES", 10000)
+        app.config.setdefault("IDENTITY_CACHE_REDIS_URL", "redis://localhost:6379/0")
+        app.extensions["identity_cache"] = _make_backend(app.config)
+
+    @staticmethod
+    def _backend():
+        from flask import current_app
+
+        return current_app.extensions["identity_cache"]
+
+    @staticmethod
+    def _key(user_id):
+        return f"user:{user_id}"
+
+    def load(self, user_id):
+        """Return the User for ``user_id`` (attached to db.session), or None."""
+        from flask import current_app
+
+        from app import db
+        from app.models import User
+
+        backend = self._backend()
+        snapshot = backend.get(self._key(user_id))
+        if snapshot is MISS:
+            with use_primary():  # a lagging replica's copy would be cached for the TTL
+                user = db.session.get(User, user_id)
+            if user is not None:
+                backend.set(self._key(user_id), _snapshot(user), current_app.config["IDENTITY_CACHE_TTL"])
+            return user
+
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        # load=False: trust the snapshot instead of re-selecting the row
+        return db.session.merge(user, load=False)
+
+    def forget(self, user_id, session=None):
+        """Drop ``user_id`` now and again when the current transaction commits."""
+        from app import db
+
+        self._backend().delete(self._key(user_id))
+        (session or db.session()).info.setdefault("identity_forget", set()).add(user_id)
+
+
+def _snapshot(user):
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(user).mapper.column_attrs
+        if attr.key not in EXCLUDED_COLUMNS
+    }
+
+
+def _make_backend(config):
+    kind = config["IDENTITY_CACHE_BACKEND"]
+    if kind == "memory":
+        return MemoryBackend(max_entries=config["IDENTITY_CACHE_MAX_ENTRIES"])
+    if kind == "redis":
+        return RedisBackend.from_url(config["IDENTITY_CACHE_REDIS_URL"], prefix="identity:")
+    if kind in ("null", "none", None):
+        return NullBackend()
+    raise ValueError(f"Unknown IDENTITY_CACHE_BACKEND: {kind!r}")
+
+
+# Session hooks. They are registered once for every Session and do nothing outside an
+# app context (e.g. scripts that never call create_app).
+@event.listens_for(Session, "after_flush")
+def _forget_changed_users(session, flush_context):
+    from flask import current_app, has_app_context
+
+    from app.models import User
+
+    if not has_app_context() or "identity_cache" not in current_app.extensions:
+        return
+    # Still the pre-flush view here: what this flush just wrote
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and (obj in session.deleted or session.is_modified(obj)):
+            IdentityCache().forget(obj.user_id, session=session)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_users(session):
+    from flask import current_app, has_app_context
+
+    user_ids = session.info.pop("identity_forget", None)
+    if user_ids and has_app_context() and "identity_cache" in current_app.extensions:
+        backend = current_app.extensions["identity_cache"]
+        for user_id in user_ids:
+            backend.delete(IdentityCache._key(user_id))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_forgets(session):
+    session.info.pop("identity_forget", None)
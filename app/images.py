@@ -0,0 +1,236 @@
+# app/images.py
+# Product image storage and derivative pipeline.
+#
+# Uploads are stored under their content hash (uploads/products/<sha256>.jpg), so the
+# same picture uploaded twice is kept once. Each original is then resized into
+# thumb/card/detail variants, in JPEG and WebP, by a small worker pool off the request
+# path:
+#
+#     uploads/products/derived/<stem>-<variant>.<jpg|webp>
+#     uploads/products/derived/<stem>.json      (variant widths, written last)
+#
+# Templates render product images through the product_picture macro, which emits a
+# <picture> with srcset once the derivatives exist and falls back to the original
+# until then. `flask images build` backfills derivatives for existing products.
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import click
+from flask import current_app, url_for
+from flask.cli import AppGroup
+from PIL import Image, ImageOps
+from werkzeug.utils import secure_filename
+
+log = logging.getLogger(__name__)
+
+UPLOAD_DIR = "uploads/products"
+DERIVED_DIR = "uploads/products/derived"
+
+# (name, max width in px), smallest first
+VARIANTS = (("thumb", 160), ("card", 480), ("detail", 1200))
+FORMATS = (("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+           ("webp", "WEBP", {"quality": 80, "method": 6}))
+
+# How long product_image() trusts a missing manifest before looking again
+MANIFEST_RETRY_SECONDS = 5
+
+_executor = None
+_manifests = {}  # image_url -> {variant: width}; derivatives never change once built
+_missing = {}  # image_url -> time.monotonic() when its manifest may be looked for again
+
+
+# ----------------------------- STORING UPLOADS -----------------------------
+def _extension(filename):
+    ext = os.path.splitext(secure_filename(filename or ""))[1].lower()
+    return ".jpg" if ext == ".jpeg" else ext
+
+
+def store_upload(file):
+    """
+    Save an uploaded image under its content hash and queue its derivatives.
+
+    Returns the path to store in Product.image_url (relative to static/). Re-uploading
+    an image that is already stored reuses the existing file.
+    """
+    upload_folder = os.path.join(current_app.static_folder, UPLOAD_DIR)
+    os.makedirs(upload_folder, exist_ok=True)
+
+    # Hash while copying to a temp file so large uploads are never held in memory
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: file.stream.read(64 * 1024), b""):
+                digest.update(chunk)
+                out.write(chunk)
+
+        image_url = f"{UPLOAD_DIR}/{digest.hexdigest()}{_extension(file.filename)}"
+        final_path = os.path.join(current_app.static_folder, image_url)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)  # duplicate upload
+        else:
+            os.replace(tmp_path, final_path)
+    except BaseException:
+        # A dropped connection or full disk mid-copy: don't leave the .part behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    queue_derivatives(image_url)
+    return image_url
+
+
+# ----------------------------- DERIVATIVES -----------------------------
+def _stem(image_url):
+    return os.path.splitext(os.path.basename(image_url))[0]
+
+
+def derivative_url(image_url, variant, ext):
+    return f"{DERIVED_DIR}/{_stem(image_url)}-{variant}.{ext}"
+
+
+def manifest_url(image_url):
+    return f"{DERIVED_DIR}/{_stem(image_url)}.json"
+
+
+def _write_atomic(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            write(out)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def build_derivatives(static_folder, image_url):
+    """
+    Resize one original into every variant and format.
+
+    Runs without an app context so it can go straight onto the worker pool. Returns
+    the {variant: width} manifest, or None if the original is missing or unreadable.
+    Already-built images are skipped.
+    """
+    manifest_path = os.path.join(static_folder, manifest_url(image_url))
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    source = os.path.join(static_folder, image_url)
+    try:
+        with Image.open(source) as original:
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ("RGB", "L"):
+                # Flatten transparency onto white; JPEG has no alpha channel
+                rgba = original.convert("RGBA")
+                original = Image.new("RGB", rgba.size, (255, 255, 255))
+                original.paste(rgba, mask=rgba.getchannel("A"))
+            else:
+                original = original.convert("RGB")
+
+            os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+            manifest = {}
+            for variant, width in VARIANTS:
+                resized = original.copy()
+                resized.thumbnail((width, width * 4), Image.LANCZOS)  # never upscales
+                manifest[variant] = resized.width
+                for ext, fmt, options in FORMATS:
+                    path = os.path.join(static_folder, derivative_url(image_url, variant, ext))
+                    _write_atomic(path, lambda out: resized.save(out, fmt, **options))
+    except (OSError, Image.DecompressionBombError) as e:
+        log.warning("Could not build derivatives for %s: %s", image_url, e)
+        return None
+
+    # The manifest goes last: once it exists every variant is in place
+    _write_atomic(manifest_path, lambda out: out.write(json.dumps(manifest).encode()))
+    _missing.pop(image_url, None)  # this process picks it up on the next render
+    return manifest
+
+
+def queue_derivatives(image_url):
+    """
+    Build derivatives for ``image_url`` on the worker pool; returns a Future.
+
+    IMAGE_WORKERS = 0 builds them inline instead (tests, one-off scripts).
+    """
+    global _executor
+    static_folder = current_app.static_folder
+    workers = current_app.config["IMAGE_WORKERS"]
+    if not workers:
+        future = Future()
+        future.set_result(build_derivatives(static_folder, image_url))
+        return future
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="product-images")
+    return _executor.submit(build_derivatives, static_folder, image_url)
+
+
+# ----------------------------- TEMPLATE HELPER -----------------------------
+class ProductImage:
+    """URLs for one image's derivatives, as used by the product_picture macro."""
+
+    def __init__(self, image_url, manifest):
+        self.image_url = image_url
+        self.manifest = manifest
+
+    def url(self, variant="card", ext="jpg"):
+        return url_for("static", filename=derivative_url(self.image_url, variant, ext))
+
+    def srcset(self, ext="jpg"):
+        entries, seen = [], set()
+        for variant, _ in VARIANTS:
+            width = self.manifest[variant]
+            if width not in seen:  # small originals produce identical variants
+                seen.add(width)
+                entries.append(f"{self.url(variant, ext)} {width}w")
+        return ", ".join(entries)
+
+
+def product_image(image_url):
+    """Return a ProductImage once derivatives exist for ``image_url``, else None."""
+    if not image_url:
+        return None
+    manifest = _manifests.get(image_url)
+    if manifest is None:
+        # Misses are remembered briefly too, or every render of a page full of
+        # not-yet-built images would go back to the disk for each of them
+        if _missing.get(image_url, 0) > time.monotonic():
+            return None
+        path = os.path.join(current_app.static_folder, manifest_url(image_url))
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            # Still being built (or the original is unreadable)
+            _missing[image_url] = time.monotonic() + MANIFEST_RETRY_SECONDS
+            return None
+        _missing.pop(image_url, None)
+        _manifests[image_url] = manifest
+    return ProductImage(image_url, manifest)
+
+
+# ----------------------------- CLI -----------------------------
+images_cli = AppGroup("images", help="Product image derivatives.")
+
+
+@images_cli.command("build")
+def build_command():
+    """Build missing derivatives for every product image."""
+    from app import db
+    from app.models import Product
+
+    image_urls = [
+        url for (url,) in db.session.query(Product.image_url).filter(Product.image_url.isnot(None)).distinct()
+    ]
+    built = sum(
+        1 for url in image_urls
+        if build_derivatives(current_app.static_folder, url) is not None
+    )
+    click.echo(f"{built} of {len(image_urls)} images have derivatives")
@@ -0,0 +1,112 @@
+# app/main/catalog.py
+# Storefront catalogue queries. Both the homepage and the product listing go through
+# catalog_page() so they share one paged, index-friendly query path, and every read
+# is served through the catalogue cache (see app/cache.py). Cache fills read from the
+# primary database even though the storefront views are read-only: an entry loaded
+# from a lagging replica would stay stale for the whole TTL.
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from flask import current_app
+
+from app import catalog_cache
+from app.models import Product
+from app.pagination import keyset_paginate
+from app.replicas import use_primary
+
+# Sort options exposed in the query string (?sort=...). Every key ends with the
+# primary key so the ordering is total and cursors never skip or repeat a product.
+CATALOG_SORTS = {
+    "newest": [(Product.prod_id, False)],
+    "price_asc": [(Product.price, True), (Product.prod_id, True)],
+    "price_desc": [(Product.price, False), (Product.prod_id, False)],
+    "name": [(Product.name, True), (Product.prod_id, True)],
+}
+DEFAULT_SORT = "newest"
+
+
+@dataclass(frozen=True)
+class CatalogProduct:
+    """
+    Read-only copy of a Product row as stored in the cache.
+
+    ORM instances are bound to a session and can't safely be shared between requests
+    or pickled to another process, so the cache holds these plain snapshots instead.
+    Templates use the same attribute names as the model.
+    """
+
+    prod_id: int
+    name: str
+    sku: str
+    desc: str | None
+    price: Decimal
+    stock_level: int
+    category: str
+    image_url: str | None
+
+    @classmethod
+    def from_model(cls, product):
+        return cls(
+            prod_id=product.prod_id,
+            name=product.name,
+            sku=product.sku,
+            desc=product.desc,
+            price=product.price,
+            stock_level=product.stock_level,
+            category=product.category,
+            image_url=product.image_url,
+        )
+
+
+def resolve_page_size(requested=None):
+    """Clamp a requested page size to the configured bounds."""
+    default = current_app.config["CATALOG_PAGE_SIZE"]
+    maximum = current_app.config["CATALOG_MAX_PAGE_SIZE"]
+    if not requested or requested < 1:
+        return default
+    return min(requested, maximum)
+
+
+def catalog_page(sort=DEFAULT_SORT, after=None, before=None, per_page=None):
+    """Return one KeysetPage of CatalogProduct snapshots for the storefront."""
+    if sort not in CATALOG_SORTS:
+        sort = DEFAULT_SORT
+    per_page = resolve_page_size(per_page)
+
+    def load():
+        with use_primary():
+            page = keyset_paginate(
+                Product.query,
+                CATALOG_SORTS[sort],
+                per_page=per_page,
+                after=after,
+                before=before,
+            )
+        page.items = [CatalogProduct.from_model(p) for p in page.items]
+        return page
+
+    key = f"page:{sort}:{per_page}:{after or ''}:{before or ''}"
+    return catalog_cache.get_or_set(key, load)
+
+
+def get_product(prod_id):
+    """Return a CatalogProduct snapshot for ``prod_id``, or None if it doesn't exist."""
+
+    def load():
+        with use_primary():
+            product = Product.query.get(prod_id)
+        return CatalogProduct.from_model(product) if product else None
+
+    return catalog_cache.get_or_set(f"product:{prod_id}", load)
+
+
+def forget_products(prod_ids):
+    """Drop cached detail entries for products whose stock just changed."""
+    for prod_id in prod_ids:
+        catalog_cache.delete(f"product:{prod_id}")
+
+
+def invalidate_catalog():
+    """Call after any admin change to products so listings and details are rebuilt."""
+    catalog_cache.invalidate()
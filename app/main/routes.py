@@ -1,25 +1,69 @@
 # app/main/routes.py
-from flask import render_template
+from flask import render_template, request, abort
 from . import main_bp
-from app.models import Product # Import your new models!
+from .catalog import CATALOG_SORTS, DEFAULT_SORT, catalog_page, get_product
+from .search import CATEGORIES, search_products
+from app.pagination import InvalidCursor
+from app.replicas import read_only_blueprint
+
+# Storefront pages only read, so they may be served from a read replica
+read_only_blueprint(main_bp)
 
 @main_bp.route('/')
 def index():
-    # Fetch products for the homepage/listing
-    products = Product.query.limit(8).all()
-    return render_template('main/index.html', products=products)
+    # Fetch products for the homepage/listing (first page of the shared catalogue query)
+    page = catalog_page(per_page=8)
+    return render_template('main/index.html', products=page.items)
 
 @main_bp.route('/products')
 def product_list():
-    products = Product.query.all()
-    return render_template('main/product_list.html', products=products)
+    sort = request.args.get('sort', DEFAULT_SORT)
+    if sort not in CATALOG_SORTS:
+        sort = DEFAULT_SORT
+
+    try:
+        page = catalog_page(
+            sort=sort,
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            per_page=request.args.get('per_page', type=int),
+        )
+    except InvalidCursor:
+        # A mangled or hand-edited cursor is a client error, not a server error
+        abort(400)
+
+    return render_template(
+        'main/product_list.html',
+        products=page.items,
+        page=page,
+        sort=sort,
+        sorts=CATALOG_SORTS,
+    )
 
 @main_bp.route('/product/<int:prod_id>')
 def product_detail(prod_id):
     """Displays detailed information for a single product."""
-    # Fetches the product or returns a 404 Not Found error
-    product = Product.query.get_or_404(prod_id)
+    # Fetches the product (through the catalogue cache) or returns a 404 Not Found error
+    product = get_product(prod_id)
+    if product is None:
+        abort(404)
     return render_template('main/product_detail.html', product=product)
 
+@main_bp.route('/search')
+def search():
+    """Full-text search over product name, description and SKU."""
+    category = request.args.get('category')
+    if category not in dict(CATEGORIES):
+        category = None
 
-
+    results = search_products(
+        request.args.get('q', ''),
+        category=category,
+        page=request.args.get('page', 1, type=int),
+    )
+    return render_template(
+        'main/search.html',
+        results=results,
+        category=category,
+        categories=CATEGORIES,
+    )
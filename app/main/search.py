@@ -0,0 +1,159 @@
+# app/main/search.py
+# Full-text product search over name, description and SKU.
+#
+# SQLite uses an FTS5 external-content table (product_fts) that indexes the product
+# table in place; triggers on product keep it in step with every INSERT, UPDATE and
+# DELETE, so admin edits, CSV imports and deletions need no extra code. MySQL uses a
+# native FULLTEXT index, which the server maintains itself. Both are created with the
+# product table (db.create_all) and can be added to an existing database with
+#
+#     flask search reindex
+
+import re
+from dataclasses import dataclass
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import DDL, event, select, text
+
+from app import db
+from app.models import Product
+
+MAX_TERMS = 8
+CATEGORIES = (("watch", "Watches"), ("handbag", "Handbags"))
+
+SQLITE_DDL = [
+    # category is indexed too so a category filter intersects posting lists instead of
+    # joining every hit to product; prefix='2 3' keeps prefix queries ("wat*") cheap
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, "desc", sku, category,
+        content='product', content_rowid='prod_id', prefix='2 3'
+    )""",
+    # Default ranking: a hit in the name counts most, then the SKU, then the description
+    """INSERT INTO product_fts(product_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0, 0.0)')""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, "desc", sku, category)
+        VALUES (new.prod_id, new.name, new."desc", new.sku, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, "desc", sku, category)
+        VALUES ('delete', old.prod_id, old.name, old."desc", old.sku, old.category);
+    END""",
+    # Only text changes touch the index; stock updates at checkout don't
+    """CREATE TRIGGER IF NOT EXISTS product_fts_au
+    AFTER UPDATE OF name, "desc", sku, category ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, "desc", sku, category)
+        VALUES ('delete', old.prod_id, old.name, old."desc", old.sku, old.category);
+        INSERT INTO product_fts(rowid, name, "desc", sku, category)
+        VALUES (new.prod_id, new.name, new."desc", new.sku, new.category);
+    END""",
+]
+
+MYSQL_DDL = [
+    "ALTER TABLE product ADD FULLTEXT INDEX ix_product_fulltext (name, `desc`, sku)",
+]
+
+for statement in SQLITE_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in MYSQL_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="mysql"))
+
+
+@dataclass
+class SearchResults:
+    """One page of search hits, best match first."""
+
+    items: list
+    query: str
+    page: int
+    per_page: int
+    has_next: bool
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+
+def search_terms(query):
+    """Split free text into at most MAX_TERMS lowercase word tokens."""
+    return re.findall(r"\w+", (query or "").lower())[:MAX_TERMS]
+
+
+def _sqlite_search(terms, category, limit, offset):
+    # Every term must match. Terms are quoted, so users can't inject FTS syntax, and
+    # only the last one is prefix-matched (it's the one still being typed).
+    match = " ".join(f'"{t}"' for t in terms) + "*"
+    if category:
+        match = f'({match}) AND category:"{re.sub(r"[^a-z]", "", category)}"'
+    sql = text(
+        """SELECT product.* FROM product_fts
+           JOIN product ON product.prod_id = product_fts.rowid
+           WHERE product_fts MATCH :match
+           ORDER BY product_fts.rank, product_fts.rowid
+           LIMIT :limit OFFSET :offset"""
+    )
+    return sql, {"match": match, "limit": limit, "offset": offset}
+
+
+def _mysql_search(terms, category, limit, offset):
+    match = " ".join(f"+{t}" for t in terms) + "*"
+    params = {"match": match, "limit": limit, "offset": offset}
+    where = ""
+    if category:
+        where = "AND category = :category"
+        params["category"] = category
+    score = "MATCH(name, `desc`, sku) AGAINST (:match IN BOOLEAN MODE)"
+    sql = text(
+        f"""SELECT * FROM product
+            WHERE {score} {where}
+            ORDER BY {score} DESC, prod_id
+            LIMIT :limit OFFSET :offset"""
+    )
+    return sql, params
+
+
+def search_products(query, category=None, page=1, per_page=None):
+    """Return one page of products matching ``query``, ranked by relevance."""
+    per_page = per_page or current_app.config["CATALOG_PAGE_SIZE"]
+    page = max(page or 1, 1)
+    terms = search_terms(query)
+    if not terms:
+        return SearchResults([], query or "", page, per_page, has_next=False)
+
+    build = _mysql_search if db.engine.dialect.name == "mysql" else _sqlite_search
+    # One extra row tells us whether there's another page
+    sql, params = build(terms, category, per_page + 1, (page - 1) * per_page)
+    items = db.session.execute(select(Product).from_statement(sql), params).scalars().all()
+    return SearchResults(items[:per_page], query, page, per_page, has_next=len(items) > per_page)
+
+
+def rebuild_index():
+    """Create the full-text index if it's missing and (re)build it from product."""
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as conn:
+        if dialect == "sqlite":
+            for statement in SQLITE_DDL:
+                conn.execute(text(statement))
+            conn.execute(text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')"))
+        elif dialect == "mysql":
+            exists = conn.execute(
+                text("SELECT COUNT(*) FROM information_schema.statistics "
+                     "WHERE table_schema = DATABASE() AND table_name = 'product' "
+                     "AND index_name = 'ix_product_fulltext'")
+            ).scalar()
+            if not exists:
+                for statement in MYSQL_DDL:
+                    conn.execute(text(statement))
+        else:
+            raise click.ClickException(f"Full-text search isn't supported on {dialect}")
+
+
+search_cli = AppGroup("search", help="Product full-text search index.")
+
+
+@search_cli.command("reindex")
+def reindex_command():
+    """Create the search index if needed and rebuild it from the product table."""
+    rebuild_index()
+    click.echo(f"Indexed {Product.query.count()} products")
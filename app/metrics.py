@@ -0,0 +1,154 @@
+# app/metrics.py
+# Prometheus metrics at /metrics.
+#
+#   http_request_duration_seconds{blueprint,endpoint,method}   histogram
+#   http_requests_total{blueprint,endpoint,method,status}      counter
+#   db_pool_checked_out{bind} / db_pool_overflow{bind}          gauges (QueuePool engines)
+#   email_outbox_messages{status}                              pending/failed rows, read at scrape time
+#   checkouts_total{outcome}                                   placed | rejected | conflict | error
+#
+# Each process only ever writes its own values. With several worker processes
+# (gunicorn -w 4), set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by the
+# workers *before* they start: prometheus_client then keeps every process's values in
+# its own memory-mapped file there, and /metrics, whichever worker serves it, adds up
+# the files of all workers. The process manager should empty the directory at startup
+# and call mark_process_dead(pid) when a worker exits, e.g. in gunicorn.conf.py:
+#
+#     def child_exit(server, worker):
+#         from app.metrics import mark_process_dead
+#         mark_process_dead(worker.pid)
+#
+# Without the variable, /metrics reports the serving process alone, which is right
+# for the development server and single-process deployments.
+#
+# Set METRICS_TOKEN to require "Authorization: Bearer <token>" on /metrics.
+
+import hmac
+import os
+import time
+
+from flask import Response, abort, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, func, select
+
+# Seconds; finer at the bottom, where cached pages and API calls land
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time spent handling a request.",
+    ["blueprint", "endpoint", "method"], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    "http_requests_total", "Requests handled, by response status.",
+    ["blueprint", "endpoint", "method", "status"],
+)
+# Gauges are summed over the live workers: each reports its own pool
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Database connections currently in use.", ["bind"], multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections open beyond pool_size (negative while the pool is filling).",
+    ["bind"], multiprocess_mode="livesum",
+)
+CHECKOUTS = Counter("checkouts_total", "Checkout attempts by outcome.", ["outcome"])
+
+OUTBOX_STATUSES = ("pending", "failed")
+
+
+def checkout_outcome(outcome):
+    """Count a checkout: placed, rejected (before writing), conflict (lost a race) or error."""
+    CHECKOUTS.labels(outcome).inc()
+
+
+def init_app(app):
+    """Time requests, watch the engines' pools and serve /metrics."""
+    from app import db
+
+    app.config.setdefault("METRICS_TOKEN", None)
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+
+    with app.app_context():
+        engines = {bind or "default": engine for bind, engine in db.engines.items()}
+    engines.update(app.extensions.get("db_replicas", {}))
+    for bind, engine in engines.items():
+        if hasattr(engine.pool, "checkedout"):  # QueuePool; SQLite memory/static pools have no size
+            _watch_pool(bind, engine)
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _record_request(response):
+    started = g.pop("metrics_started", None)
+    if started is None or request.endpoint in ("static", "metrics"):
+        return response
+    endpoint = request.endpoint or "(unmatched)"
+    blueprint = request.blueprint or ""
+    REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+    REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+    return response
+
+
+def _watch_pool(bind, engine):
+    pool = engine.pool
+
+    def update(*args):
+        POOL_CHECKED_OUT.labels(bind).set(pool.checkedout())
+        POOL_OVERFLOW.labels(bind).set(pool.overflow())
+
+    event.listen(engine, "checkout", update)
+    event.listen(engine, "checkin", update)
+    update()
+
+
+class OutboxCollector:
+    """Outstanding email_outbox rows, counted when /metrics is scraped."""
+
+    def collect(self):
+        from app import db
+        from app.models import EmailOutbox
+
+        counts = dict(db.session.execute(
+            select(EmailOutbox.status, func.count())
+            .where(EmailOutbox.status.in_(OUTBOX_STATUSES))
+            .group_by(EmailOutbox.status)
+        ).all())
+        family = GaugeMetricFamily("email_outbox_messages", "Emails waiting to be sent, or given up on.",
+                                   labels=["status"])
+        for status in OUTBOX_STATUSES:
+            family.add_metric([status], counts.get(status, 0))
+        yield family
+
+
+def metrics_view():
+    token = current_app.config["METRICS_TOKEN"]
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        abort(401)
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # every worker's files
+    else:
+        registry = REGISTRY
+    outbox = CollectorRegistry(auto_describe=False)
+    outbox.register(OutboxCollector())
+    return Response(generate_latest(registry) + generate_latest(outbox), content_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead(pid):
+    """Drop an exited worker's live gauges (call from the process manager)."""
+    multiprocess.mark_process_dead(pid)
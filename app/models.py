@@ -8,8 +8,14 @@ from decimal import Decimal
 class User(UserMixin, db.Model):
     __tablename__ = "user"
     user_id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)  # indexed for admin prefix search
     email = db.Column(db.String(120), unique=True, nullable=False)
+    __table_args__ = (
+        # SQLite's LIKE ignores case, so the admin prefix search can only use an index
+        # built with NOCASE (MySQL's default collations already ignore case)
+        db.Index("ix_user_email_nocase", db.collate(email, "NOCASE")).ddl_if(dialect="sqlite"),
+        db.Index("ix_user_name_nocase", db.collate(name, "NOCASE")).ddl_if(dialect="sqlite"),
+    )
     password_hash = db.Column(db.String(128))
     # Wallet balance initialised to 0.00
     wallet_balance = db.Column(db.Numeric(10, 2), default=0.00)
@@ -19,6 +25,9 @@ class User(UserMixin, db.Model):
     is_active = db.Column(db.Boolean, default=True)  
     date_joined = db.Column(db.DateTime, default=db.func.now())  
 
+    # Bumped on every cart change so the cached navbar cart count knows it's stale
+    cart_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     # Note: Flask-Login expects a method named 'get_id()', but UserMixin provides it.
     # To keep your existing column name, you need to override the default:
     def get_id(self):
@@ -28,6 +37,12 @@ class User(UserMixin, db.Model):
 # --- 2. Product Table ---
 class Product(db.Model):
     __tablename__ = "product"
+    __table_args__ = (
+        # Storefront keyset sorts (see CATALOG_SORTS) and the category/price filters
+        db.Index("ix_product_price", "price", "prod_id"),
+        db.Index("ix_product_name", "name", "prod_id"),
+        db.Index("ix_product_category_price", "category", "price", "prod_id"),
+    )
     prod_id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     sku = db.Column(db.String(50), unique=True, nullable=False)
@@ -41,6 +56,12 @@ class Product(db.Model):
 # --- 3. Cart Items Table ---
 class CartItem(db.Model):
     __tablename__ = "cart_item"
+    __table_args__ = (
+        # One line per product in a cart; also serves every lookup by user_id
+        db.Index("uq_cart_item_user_prod", "user_id", "prod_id", unique=True),
+        # Carts holding a product, when the product is deleted
+        db.Index("ix_cart_item_prod_id", "prod_id"),
+    )
     cart_item_id = db.Column(db.Integer, primary_key=True)
 
     # Foreign Keys
@@ -57,23 +78,39 @@ class CartItem(db.Model):
 # --- 4. Order Table ---
 class Order(db.Model):
     __tablename__ = "order"
+    __table_args__ = (
+        # Order history (newest first per user) and per-user order counts
+        db.Index("ix_order_user_date", "user_id", "order_date", "order_id"),
+        # Admin order list, unfiltered and filtered by status
+        db.Index("ix_order_date", "order_date", "order_id"),
+        db.Index("ix_order_status_date", "status", "order_date", "order_id"),
+        # Never hand out an id again once it is used: archived orders keep theirs
+        {"sqlite_autoincrement": True},
+    )
     order_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.user_id"), nullable=False)
     order_date = db.Column(db.DateTime, default=db.func.now())
-    status = db.Column(db.String(50), default="Processing")
+    status = db.Column(db.String(50), default="processing")  # lower case, see admin/fulfilment.py
     payment_method = db.Column(db.String(50), nullable=False)
 
-    # Relationship to get all items in this order
-    items = db.relationship("OrderItem", backref="order", lazy="dynamic")
+    # Relationship to get all items in this order. A plain (non-dynamic) collection so
+    # listings can batch-load it with selectinload() instead of one query per order.
+    items = db.relationship("OrderItem", backref="order", order_by="OrderItem.order_item_id")
     user = db.relationship("User")
     sub_total = db.Column(db.Numeric(10, 2), nullable=False)
     grand_total = db.Column(db.Numeric(10, 2), nullable=False)
     shipping_cost = db.Column(db.Numeric(10, 2), default=Decimal('0.00'))
 
+    archived = False  # see ArchivedOrder
+
 
 # --- 5. Order Items Table ---
 class OrderItem(db.Model):
     __tablename__ = "order_item"
+    __table_args__ = (
+        db.Index("ix_order_item_order_id", "order_id"),
+        {"sqlite_autoincrement": True},  # as Order
+    )
     order_item_id = db.Column(db.Integer, primary_key=True)
 
     # Foreign Keys
@@ -85,4 +122,150 @@ class OrderItem(db.Model):
     price_at_purchase = db.Column(db.Numeric(10, 2), nullable=False)
 
     product = db.relationship("Product")
-    
\ No newline at end of file
+    
+
+# --- 6. Site Statistics Table ---
+class SiteStat(db.Model):
+    """
+    Running totals shown on the admin dashboard (users, products, orders, revenue).
+
+    Each statistic is split over a few shard rows so concurrent checkouts don't all
+    queue on one row lock; its value is the SUM over its shards. Maintained by
+    app/stats.py and corrected periodically by `flask stats reconcile`.
+    """
+
+    __tablename__ = "site_stat"
+    name = db.Column(db.String(50), primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    value = db.Column(db.Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+
+
+# --- 7. Email Outbox Table ---
+class EmailOutbox(db.Model):
+    """
+    Transactional emails waiting to be sent.
+
+    Rows are written in the same transaction as the user/order they belong to and
+    delivered later by `flask outbox drain` (see app/outbox.py), so a slow or
+    unreachable mail server never holds a request or a database transaction open.
+    """
+
+    __tablename__ = "email_outbox"
+    email_id = db.Column(db.Integer, primary_key=True)
+    sender = db.Column(db.String(255))
+    recipients = db.Column(db.Text, nullable=False)  # comma-separated addresses
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text)
+    html = db.Column(db.Text)
+
+    # 'pending' -> 'sent', or 'failed' once the retry budget is used up
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False)  # UTC
+    last_error = db.Column(db.Text)
+
+    # Lease taken by a worker while it is sending this row
+    locked_by = db.Column(db.String(32))
+    locked_until = db.Column(db.DateTime)  # UTC
+
+    created_at = db.Column(db.DateTime, default=db.func.now())
+    sent_at = db.Column(db.DateTime)  # UTC
+
+
+# --- 8. SKU Counter Table ---
+class SkuCounter(db.Model):
+    """
+    Next free number for generated SKUs ('<category>_<n>').
+
+    Importers reserve a whole block of numbers with one UPDATE instead of running
+    COUNT(*) on the product table for every row.
+    """
+
+    __tablename__ = "sku_counter"
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False)
+
+
+# --- 9. Product Import Job Table ---
+class ImportJob(db.Model):
+    """Progress and outcome of a CSV product import (see app/admin/importer.py)."""
+
+    __tablename__ = "import_job"
+    job_id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255))
+    # 'queued' -> 'running' -> 'done' (or 'failed' on an unexpected error)
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    bytes_total = db.Column(db.Integer, default=0)
+    bytes_done = db.Column(db.Integer, default=0)
+    rows_processed = db.Column(db.Integer, default=0)
+    rows_imported = db.Column(db.Integer, default=0)
+    rows_with_errors = db.Column(db.Integer, default=0)
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+    finished_at = db.Column(db.DateTime)
+
+    @property
+    def percent(self):
+        if self.status == "done":
+            return 100
+        if not self.bytes_total:
+            return 0
+        return min(99, int(100 * (self.bytes_done or 0) / self.bytes_total))
+
+
+# --- 10. User Purge Job Table ---
+class UserPurgeJob(db.Model):
+    """Background deletion of a user with many orders (see app/admin/purge.py)."""
+
+    __tablename__ = "user_purge_job"
+    job_id = db.Column(db.Integer, primary_key=True)
+    # No foreign key: the job outlives the user it deletes
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    user_email = db.Column(db.String(120))
+    # 'queued' -> 'running' -> 'done' (or 'failed'; `flask users purge` picks it up again)
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    orders_total = db.Column(db.Integer, default=0)
+    orders_deleted = db.Column(db.Integer, default=0)
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+    finished_at = db.Column(db.DateTime)
+
+
+# --- 11. Order Archive Tables ---
+# Completed and cancelled orders past ORDER_ARCHIVE_AFTER_DAYS, moved here by
+# `flask orders archive` (see app/archive.py) with their ids, so the order and
+# order_item tables only hold recent and open orders. Same columns as Order/OrderItem.
+class ArchivedOrder(db.Model):
+    __tablename__ = "order_archive"
+    __table_args__ = (
+        # Order history (newest first per user)
+        db.Index("ix_order_archive_user_date", "user_id", "order_date", "order_id"),
+    )
+    archived = True  # Order.archived is False; templates can tell the two apart
+
+    order_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.user_id"), nullable=False)
+    order_date = db.Column(db.DateTime)
+    status = db.Column(db.String(50))
+    payment_method = db.Column(db.String(50), nullable=False)
+
+    items = db.relationship("ArchivedOrderItem", backref="order", order_by="ArchivedOrderItem.order_item_id")
+    user = db.relationship("User")
+    sub_total = db.Column(db.Numeric(10, 2), nullable=False)
+    grand_total = db.Column(db.Numeric(10, 2), nullable=False)
+    shipping_cost = db.Column(db.Numeric(10, 2), default=Decimal('0.00'))
+    archived_at = db.Column(db.DateTime, default=db.func.now())
+
+
+class ArchivedOrderItem(db.Model):
+    __tablename__ = "order_item_archive"
+    __table_args__ = (
+        db.Index("ix_order_item_archive_order_id", "order_id"),
+    )
+    order_item_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("order_archive.order_id"), nullable=False)
+    prod_id = db.Column(db.Integer, db.ForeignKey("product.prod_id"), nullable=False)
+    qty = db.Column(db.Integer, default=1)
+    price_at_purchase = db.Column(db.Numeric(10, 2), nullable=False)
+
+    product = db.relationship("Product")
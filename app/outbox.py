@@ -0,0 +1,177 @@
+# app/outbox.py
+# Transactional email outbox.
+#
+# Requests never talk to the mail server. enqueue() stores the message in the
+# email_outbox table as part of the caller's transaction (so an order and its
+# confirmation email commit or roll back together), and a separate worker process,
+#
+#     flask outbox drain --loop
+#
+# delivers pending rows in batches over a single reused SMTP connection, retrying
+# failures with exponential backoff. For local testing point MAIL_SERVER/MAIL_PORT at
+# a debugging server, e.g. `python -m aiosmtpd -n -l localhost:1025`.
+
+import random
+import smtplib
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_mail import Message
+from sqlalchemy import or_, update
+
+from app import db, mail
+from app.models import EmailOutbox
+
+
+def _now():
+    # Naive UTC, matching how the DateTime columns are stored.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue(msg):
+    """Stage a Flask-Mail Message for delivery; committed with the caller's session."""
+    row = EmailOutbox(
+        sender=msg.sender if isinstance(msg.sender, str) else None,
+        recipients=", ".join(msg.recipients),
+        subject=msg.subject,
+        body=msg.body,
+        html=msg.html,
+        status="pending",
+        attempts=0,
+        next_attempt_at=_now(),
+    )
+    db.session.add(row)
+    return row
+
+
+def _to_message(row):
+    return Message(
+        subject=row.subject,
+        recipients=[r.strip() for r in row.recipients.split(",") if r.strip()],
+        body=row.body,
+        html=row.html,
+        sender=row.sender or current_app.config.get("MAIL_DEFAULT_SENDER"),
+    )
+
+
+def _claim_batch(batch_size):
+    """Lease up to ``batch_size`` due rows to this worker and return them."""
+    now = _now()
+    lease = timedelta(seconds=current_app.config["OUTBOX_LEASE_SECONDS"])
+    unleased = or_(EmailOutbox.locked_until.is_(None), EmailOutbox.locked_until < now)
+
+    ids = [
+        email_id
+        for (email_id,) in db.session.query(EmailOutbox.email_id)
+        .filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now, unleased)
+        .order_by(EmailOutbox.email_id)
+        .limit(batch_size)
+    ]
+    if not ids:
+        return []
+
+    # Only rows nobody else leased in the meantime are taken, so several workers
+    # can drain the same outbox without sending anything twice.
+    token = uuid.uuid4().hex
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.email_id.in_(ids), unleased)
+        .values(locked_by=token, locked_until=now + lease)
+    )
+    db.session.commit()
+    return EmailOutbox.query.filter_by(locked_by=token).order_by(EmailOutbox.email_id).all()
+
+
+def _release(row):
+    row.locked_by = None
+    row.locked_until = None
+
+
+def _record_failure(row, error):
+    config = current_app.config
+    row.attempts += 1
+    row.last_error = str(error)[:1000]
+    _release(row)
+    if row.attempts >= config["OUTBOX_MAX_ATTEMPTS"]:
+        row.status = "failed"
+        return "failed"
+    delay = min(
+        config["OUTBOX_BACKOFF_SECONDS"] * 2 ** (row.attempts - 1),
+        config["OUTBOX_MAX_BACKOFF_SECONDS"],
+    )
+    # A little jitter stops a burst of failures from retrying in lockstep.
+    row.next_attempt_at = _now() + timedelta(seconds=delay * random.uniform(1.0, 1.1))
+    return "retry"
+
+
+def drain(batch_size=None):
+    """
+    Send every due outbox row, one batch per SMTP connection.
+
+    Returns counts of 'sent', 'retry' and 'failed' rows. Stops early if the mail
+    server can't be reached or drops the connection; the untouched rows stay due.
+    """
+    batch_size = batch_size or current_app.config["OUTBOX_BATCH_SIZE"]
+    results = {"sent": 0, "retry": 0, "failed": 0}
+
+    while True:
+        rows = _claim_batch(batch_size)
+        if not rows:
+            return results
+
+        try:
+            with mail.connect() as conn:
+                for index, row in enumerate(rows):
+                    try:
+                        conn.send(_to_message(row))
+                    except (smtplib.SMTPServerDisconnected, OSError) as e:
+                        # Connection-level problem: count it against this row only and
+                        # hand the rest of the batch back for the next pass.
+                        results[_record_failure(row, e)] += 1
+                        for rest in rows[index + 1:]:
+                            _release(rest)
+                        db.session.commit()
+                        return results
+                    except Exception as e:
+                        results[_record_failure(row, e)] += 1
+                    else:
+                        row.status = "sent"
+                        row.sent_at = _now()
+                        row.last_error = None
+                        _release(row)
+                        results["sent"] += 1
+        except (smtplib.SMTPException, OSError) as e:
+            # Couldn't connect (or log in) at all: every row in the batch retries.
+            for row in rows:
+                if row.status == "pending" and row.locked_by is not None:
+                    results[_record_failure(row, e)] += 1
+            db.session.commit()
+            return results
+
+        db.session.commit()
+
+
+outbox_cli = AppGroup("outbox", help="Deliver queued transactional emails.")
+
+
+@outbox_cli.command("drain")
+@click.option("--batch-size", type=int, default=None, help="Emails per SMTP connection.")
+@click.option("--loop", is_flag=True, help="Keep polling for new emails until stopped.")
+@click.option("--interval", type=float, default=None, help="Seconds between polls with --loop.")
+def drain_command(batch_size, loop, interval):
+    """Send pending outbox emails."""
+    interval = interval or current_app.config["OUTBOX_POLL_INTERVAL"]
+    while True:
+        results = drain(batch_size)
+        if any(results.values()):
+            click.echo(
+                f"sent={results['sent']} retry={results['retry']} failed={results['failed']}"
+            )
+        if not loop:
+            return
+        db.session.remove()
+        time.sleep(interval)
@@ -0,0 +1,170 @@
+# app/pagination.py
+# Keyset (seek) pagination shared by the storefront and the account/admin listings.
+#
+# Instead of OFFSET (which makes the database walk and throw away every row before
+# the requested page), each page is fetched with a WHERE clause that "seeks" past
+# the last row the client saw. The position is carried in an opaque cursor token in
+# the query string, so page N costs the same index range scan as page 1.
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token from the query string cannot be decoded."""
+
+
+@dataclass
+class KeysetPage:
+    """One page of results plus the cursors needed to build next/prev links."""
+
+    items: list
+    per_page: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _encode_value(value):
+    # JSON has no Decimal/datetime, so store them as strings and coerce back on decode.
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is Decimal:
+        return Decimal(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    """Turn a row's sort-key values into a URL-safe cursor token."""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, order_by):
+    """Inverse of encode_cursor; values are coerced to each column's Python type."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(order_by):
+            raise ValueError("cursor arity does not match sort key")
+        return [_decode_value(col, v) for (col, _), v in zip(order_by, values)]
+    except (ValueError, TypeError, ArithmeticError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def _seek_condition(order_by, values, forward):
+    # Lexicographic "row comes after (or before) the cursor" predicate, e.g. for
+    # (price ASC, prod_id ASC): price > :p OR (price = :p AND prod_id > :id).
+    # Written as an OR-chain rather than a row-value comparison so it works on
+    # SQLite and MySQL alike and supports mixed ASC/DESC keys.
+    clauses = []
+    for i, ((column, ascending), value) in enumerate(zip(order_by, values)):
+        equal_prefix = [col == val for (col, _), val in zip(order_by[:i], values[:i])]
+        if ascending == forward:
+            step = column > value
+        else:
+            step = column < value
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def _row_key(row, order_by):
+    return [getattr(row, column.key) for column, _ in order_by]
+
+
+def keyset_paginate(query, order_by, per_page, after=None, before=None, row_key=None):
+    """
+    Fetch one page of ``query`` ordered by ``order_by``.
+
+    ``order_by`` is a list of ``(column, ascending)`` pairs; the last column must be
+    unique (normally the primary key) so that the ordering is total and cursors are
+    stable. ``after``/``before`` are cursor tokens taken from a previous page's
+    ``next_cursor``/``prev_cursor``. Raises ``InvalidCursor`` for tampered tokens.
+
+    ``row_key`` extracts the sort-key values from a result row; it defaults to reading
+    the columns' attributes, which suits single-entity queries. Pass one when the query
+    returns tuples, e.g. ``lambda row: row.Order``.
+    """
+    return keyset_paginate_union([(query, order_by)], per_page, after, before, row_key)
+
+
+def keyset_paginate_union(sources, per_page, after=None, before=None, row_key=None):
+    """
+    Fetch one page of several queries' rows merged into a single ordering.
+
+    ``sources`` is a list of ``(query, order_by)`` pairs, e.g. the same listing over a
+    live table and its archive. Every ``order_by`` must have the same sort-key
+    attribute names, types and directions, and the key must be unique across all
+    sources. Each query is seeked and limited on its own (one statement per source)
+    and the rows are merged here, so a cursor from any page works for all of them.
+    """
+    # A ``before`` cursor means "walk backwards"; otherwise we walk forwards.
+    forward = not before or bool(after)
+    token = after if forward else before
+    order_by = sources[0][1]
+
+    def key_of(row):
+        return _row_key(row_key(row) if row_key else row, order_by)
+
+    rows = []
+    for query, source_order_by in sources:
+        if token:
+            query = query.filter(
+                _seek_condition(source_order_by, decode_cursor(token, source_order_by), forward)
+            )
+        # When walking backwards we flip every sort direction, then reverse the rows.
+        ordering = [
+            column.asc() if ascending == forward else column.desc()
+            for column, ascending in source_order_by
+        ]
+        # Fetch one extra row to learn whether another page exists without a COUNT(*).
+        rows.extend(query.order_by(*ordering).limit(per_page + 1).all())
+
+    if len(sources) > 1:
+        # Stable sorts from the last key to the first give the combined ordering.
+        for i in reversed(range(len(order_by))):
+            rows.sort(key=lambda row: key_of(row)[i], reverse=order_by[i][1] != forward)
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    page = KeysetPage(items=rows, per_page=per_page)
+    if not rows:
+        return page
+
+    first_key = encode_cursor(key_of(rows[0]))
+    last_key = encode_cursor(key_of(rows[-1]))
+    if forward:
+        page.next_cursor = last_key if has_more else None
+        page.prev_cursor = first_key if token else None
+    else:
+        page.prev_cursor = first_key if has_more else None
+        page.next_cursor = last_key
+    return page
@@ -0,0 +1,110 @@
+# app/passwords.py
+# Password hashing off the request threads, with a hard cap on how much of it runs.
+#
+# pbkdf2 is deliberately expensive (hundreds of milliseconds of CPU per hash), and
+# login/register used to run it inline. A burst of logins, or a credential-stuffing
+# run, then had every worker hashing at once and catalogue pages queued behind them.
+#
+# PasswordHasher runs hashes on a small pool of PASSWORD_HASH_WORKERS threads per
+# process. hashlib releases the GIL while it hashes, so the pool uses at most that
+# many cores and the rest of the process keeps serving pages. At most
+# PASSWORD_HASH_QUEUE_LIMIT more hashes may wait for a thread. Past that, hash() and
+# verify() raise HashingBusy straight away and the caller answers 503 instead of
+# queueing more work than the pool can ever catch up on.
+#
+# PASSWORD_HASH_METHOD is the cost for new hashes. verify() reports stored hashes
+# made with another method or iteration count, so login can re-hash them the next
+# time the user signs in (see needs_rehash).
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """The hashing pool and its queue are full; try again shortly."""
+
+
+class PasswordHasher:
+    """Flask extension running password hashes on a bounded thread pool."""
+
+    def __init__(self, app=None):
+        self._pools = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PASSWORD_HASH_METHOD", f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}")
+        app.config.setdefault("PASSWORD_HASH_WORKERS", 2)
+        app.config.setdefault("PASSWORD_HASH_QUEUE_LIMIT", 8)
+        app.config.setdefault("PASSWORD_HASH_TIMEOUT", 10)
+        app.extensions["password_hasher"] = self
+
+    @staticmethod
+    def _config():
+        from flask import current_app
+
+        return current_app.config
+
+    def _pool(self, config):
+        # Created on first use, one per app, so importing the app starts no threads
+        key = id(config)
+        with self._lock:
+            if key not in self._pools:
+                workers = config["PASSWORD_HASH_WORKERS"]
+                self._pools[key] = (
+                    ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash"),
+                    threading.BoundedSemaphore(workers + config["PASSWORD_HASH_QUEUE_LIMIT"]),
+                )
+            return self._pools[key]
+
+    def _run(self, fn, *args):
+        config = self._config()
+        if config["PASSWORD_HASH_WORKERS"] <= 0:
+            return fn(*args)  # inline, e.g. in tests
+
+        pool, slots = self._pool(config)
+        if not slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = pool.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=config["PASSWORD_HASH_TIMEOUT"])
+        except TimeoutError:
+            raise HashingBusy() from None
+
+    def hash(self, password):
+        """A new hash of ``password`` at the configured cost."""
+        return self._run(generate_password_hash, password, self._config()["PASSWORD_HASH_METHOD"])
+
+    def verify(self, password_hash, password):
+        """True if ``password`` matches; an empty stored hash never matches."""
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if ``password_hash`` wasn't made with PASSWORD_HASH_METHOD."""
+        return _method_of(password_hash) != _normalise(self._config()["PASSWORD_HASH_METHOD"])
+
+
+def _method_of(password_hash):
+    return _normalise((password_hash or "").split("$", 1)[0])
+
+
+def _normalise(method):
+    # "pbkdf2:sha256" means werkzeug's default iteration count at the time it was hashed;
+    # stored hashes always spell the count out, so do the same for the config value
+    parts = method.split(":")
+    if parts[0] == "pbkdf2":
+        if len(parts) == 1:
+            parts.append("sha256")
+        if len(parts) == 2:
+            parts.append(str(DEFAULT_PBKDF2_ITERATIONS))
+    return ":".join(parts)
@@ -0,0 +1,226 @@
+# app/profiler.py
+# Opt-in per-request SQL profiler and slow-query log (SQL_PROFILER=True).
+#
+# SQLAlchemy cursor events time every statement on the primary and replica engines;
+# Flask's template signals time rendering. For each request the profiler keeps the
+# query count, total DB time, template time and the SQL_PROFILER_SLOWEST slowest
+# statements together with the line of app code that issued them, and
+#
+#   * adds a Server-Timing header (db, tpl and total), which the browser dev tools
+#     show in the network panel;
+#   * appends the request to a ring buffer of the last SQL_PROFILER_HISTORY requests,
+#     which /admin/perf aggregates per endpoint. The buffer is per process: with
+#     several workers, each page load shows the one that served it.
+#
+# Any statement slower than SQL_SLOW_QUERY_MS is logged as a warning, in requests and
+# in CLI commands alike. Template time includes any queries the template triggers
+# (lazy loads), so db and tpl can overlap.
+#
+# Off by default: finding the call site walks the stack, and every statement pays for
+# two event callbacks.
+
+import heapq
+import itertools
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+log = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(APP_DIR)
+STATEMENT_CHARS = 600  # statements are shortened to this in the buffer and the log
+
+
+class SQLProfiler:
+    """Flask extension recording per-request SQL and template timings."""
+
+    def __init__(self, app=None):
+        self._seq = itertools.count()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Instrument ``app``'s engines; call after the replica engines exist."""
+        from app import db
+
+        app.config.setdefault("SQL_PROFILER", False)
+        app.config.setdefault("SQL_PROFILER_HISTORY", 200)
+        app.config.setdefault("SQL_PROFILER_SLOWEST", 5)
+        app.config.setdefault("SQL_SLOW_QUERY_MS", 200)
+        if not app.config["SQL_PROFILER"]:
+            return
+
+        app.extensions["sql_profiler"] = _History(app.config["SQL_PROFILER_HISTORY"])
+        with app.app_context():
+            engines = [*db.engines.values(), *app.extensions.get("db_replicas", {}).values()]
+        for engine in engines:
+            self._instrument(engine, app.config["SQL_PROFILER_SLOWEST"], app.config["SQL_SLOW_QUERY_MS"])
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+
+    @staticmethod
+    def enabled(app=None):
+        return "sql_profiler" in (app or current_app).extensions
+
+    @staticmethod
+    def recent(app=None):
+        """The buffered requests, oldest first."""
+        return (app or current_app).extensions["sql_profiler"].snapshot()
+
+    # --- statements ---
+    def _instrument(self, engine, keep, slow_ms):
+        """Time every statement ``engine`` executes."""
+
+        # The start time lives on the statement's execution context, which is dropped
+        # with it: after_cursor_execute never runs for a statement that raises.
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before_execute(conn, cursor, statement, parameters, context, executemany):
+            context._profiler_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = (time.perf_counter() - context._profiler_started) * 1000
+            site = None
+
+            profile = g.get("sql_profile") if has_request_context() else None
+            if profile is not None:
+                profile["queries"] += 1
+                profile["db_ms"] += elapsed
+                slowest = profile["slowest"]  # a min-heap, so slowest[0] is the one to beat
+                if len(slowest) < keep or elapsed > slowest[0][0]:
+                    site = _call_site()
+                    entry = (elapsed, next(self._seq), _shorten(statement), site)
+                    if len(slowest) < keep:
+                        heapq.heappush(slowest, entry)
+                    else:
+                        heapq.heapreplace(slowest, entry)
+
+            if slow_ms and elapsed >= slow_ms:
+                log.warning("Slow query (%.1f ms) from %s: %s", elapsed, site or _call_site(), _shorten(statement))
+
+    # --- templates ---
+    @staticmethod
+    def _render_started(sender, template, context, **extra):
+        profile = g.get("sql_profile")
+        if profile is not None:
+            profile["rendering"].append(time.perf_counter())
+
+    @staticmethod
+    def _render_finished(sender, template, context, **extra):
+        profile = g.get("sql_profile")
+        if profile is not None and profile["rendering"]:
+            started = profile["rendering"].pop()
+            if not profile["rendering"]:  # only the outermost render_template counts
+                profile["template_ms"] += (time.perf_counter() - started) * 1000
+
+    # --- requests ---
+    @staticmethod
+    def _start():
+        if request.endpoint != "static":
+            g.sql_profile = {"started": time.perf_counter(), "queries": 0, "db_ms": 0.0,
+                             "template_ms": 0.0, "rendering": [], "slowest": []}
+
+    @staticmethod
+    def _finish(response):
+        profile = g.pop("sql_profile", None)
+        if profile is None:
+            return response
+        total = (time.perf_counter() - profile["started"]) * 1000
+
+        response.headers.add("Server-Timing", f'db;dur={profile["db_ms"]:.1f};desc="{profile["queries"]} queries"')
+        response.headers.add("Server-Timing", f'tpl;dur={profile["template_ms"]:.1f}')
+        response.headers.add("Server-Timing", f"total;dur={total:.1f}")
+
+        current_app.extensions["sql_profiler"].append({
+            "at": time.time(),
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint or "(none)",
+            "status": response.status_code,
+            "total_ms": total,
+            "db_ms": profile["db_ms"],
+            "template_ms": profile["template_ms"],
+            "queries": profile["queries"],
+            "slowest": [{"ms": ms, "statement": statement, "site": site}
+                        for ms, _, statement, site in sorted(profile["slowest"], reverse=True)],
+        })
+        return response
+
+
+class _History:
+    """Thread-safe ring buffer of request profiles."""
+
+    def __init__(self, size):
+        self._items = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def append(self, item):
+        with self._lock:
+            self._items.append(item)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._items)
+
+
+def _call_site(depth=3):
+    """The innermost frames of app code (views, helpers, templates) on the stack."""
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < depth:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and filename != __file__:
+            where = os.path.relpath(filename, ROOT_DIR)
+            if filename.endswith(".html"):
+                frames.append(where)  # compiled template line numbers don't match the source
+            else:
+                frames.append(f"{where}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return " < ".join(frames) or "(outside app code)"
+
+
+def _shorten(statement):
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= STATEMENT_CHARS else statement[:STATEMENT_CHARS] + " ..."
+
+
+def summarize(requests):
+    """Per-endpoint aggregates of buffered requests, slowest average first."""
+    by_endpoint = {}
+    for r in requests:
+        by_endpoint.setdefault(r["endpoint"], []).append(r)
+
+    rows = []
+    for endpoint, items in by_endpoint.items():
+        totals = sorted(r["total_ms"] for r in items)
+        rows.append({
+            "endpoint": endpoint,
+            "requests": len(items),
+            "avg_ms": statistics.fmean(totals),
+            "p95_ms": totals[min(len(totals) - 1, int(len(totals) * 0.95))],
+            "max_ms": totals[-1],
+            "avg_queries": statistics.fmean(r["queries"] for r in items),
+            "max_queries": max(r["queries"] for r in items),
+            "avg_db_ms": statistics.fmean(r["db_ms"] for r in items),
+            "avg_template_ms": statistics.fmean(r["template_ms"] for r in items),
+        })
+    return sorted(rows, key=lambda row: row["avg_ms"], reverse=True)
+
+
+def slowest_statements(requests, limit=20):
+    """The slowest statements across buffered requests, with where they ran."""
+    statements = [
+        {**s, "endpoint": r["endpoint"], "path": r["path"]}
+        for r in requests for s in r["slowest"]
+    ]
+    return heapq.nlargest(limit, statements, key=lambda s: s["ms"])
@@ -0,0 +1,106 @@
+# app/replicas.py
+# Read-replica routing for read-only views.
+#
+# With DATABASE_REPLICA_URLS set, each replica gets its own engine (tuned like the
+# primary) and db.session is a RoutingSession. In a GET/HEAD request to a view marked
+# read-only, queries go to one replica chosen for that request. Everything else goes
+# to the primary:
+#
+#   * views that aren't marked, and any POST/PUT/DELETE request;
+#   * flushes and INSERT/UPDATE/DELETE statements. After the first write, the rest of
+#     the request stays on the primary, so it reads its own writes;
+#   * code inside `with use_primary():`, for reads whose results outlive the request
+#     (cache fills). A fill from a lagging replica would be served stale for the
+#     whole TTL.
+#
+# Mark a single view with @read_only, or a whole blueprint with read_only_blueprint(bp).
+# Without replicas configured the marks do nothing and every query goes to the primary.
+
+import random
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+
+from app.database import engine_options, install_sqlite_pragmas
+
+READ_METHODS = ("GET", "HEAD")
+
+
+def replica_urls(config):
+    """DATABASE_REPLICA_URLS as a list (it may be a comma-separated string)."""
+    urls = config.get("DATABASE_REPLICA_URLS") or ()
+    if isinstance(urls, str):
+        urls = [url.strip() for url in urls.split(",")]
+    return [url for url in urls if url]
+
+
+class RoutingSession(Session):
+    """db.session that sends a read-only request's queries to a replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get("db_read_only"):
+            if self._flushing or getattr(clause, "is_dml", False):
+                g.db_wrote = True  # from here on this request reads its own writes
+            elif not g.get("db_wrote") and not g.get("db_primary", 0):
+                replica = _request_replica()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _request_replica():
+    # One replica per request, so consecutive queries see the same snapshot
+    if "db_replica" not in g:
+        engines = list(current_app.extensions["db_replicas"].values())
+        g.db_replica = random.choice(engines) if engines else None
+    return g.db_replica
+
+
+@contextmanager
+def use_primary():
+    """Send queries inside the block to the primary even in a read-only view."""
+    if not has_request_context():
+        yield
+        return
+    g.db_primary = g.get("db_primary", 0) + 1
+    try:
+        yield
+    finally:
+        g.db_primary -= 1
+
+
+def read_only(view):
+    """Mark a view whose GET/HEAD requests may be served from a replica."""
+    view.read_only = True
+    return view
+
+
+def read_only_blueprint(blueprint):
+    """Mark every view in ``blueprint`` read-only."""
+    blueprint.before_request(_mark_read_only)
+    return blueprint
+
+
+def _mark_read_only():
+    if request.method in READ_METHODS:
+        g.db_read_only = True
+
+
+def init_app(app):
+    """Create the replica engines and honour @read_only on views."""
+    replicas = {}
+    for i, url in enumerate(replica_urls(app.config)):
+        engine = create_engine(url, **engine_options(dict(app.config, SQLALCHEMY_DATABASE_URI=url)))
+        if engine.dialect.name == "sqlite":
+            install_sqlite_pragmas(engine, app.config)
+        replicas[f"replica_{i}"] = engine
+    app.extensions["db_replicas"] = replicas
+
+    # read_only_blueprint() registers its own hook
+    @app.before_request
+    def _read_only_views():
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, "read_only", False):
+            _mark_read_only()
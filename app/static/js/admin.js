@@ -0,0 +1,20 @@
+// Mobile sidebar: show/hide the backdrop with the collapsible sidebar
+document.addEventListener('DOMContentLoaded', function() {
+    const sidebar = document.getElementById('sidebarMenu');
+    const backdrop = document.getElementById('sidebarBackdrop');
+
+    // Close sidebar when clicking on backdrop
+    backdrop.addEventListener('click', function() {
+        sidebar.classList.remove('show');
+        backdrop.classList.remove('show');
+    });
+
+    // Handle sidebar show/hide events
+    sidebar.addEventListener('show.bs.collapse', function() {
+        backdrop.classList.add('show');
+    });
+
+    sidebar.addEventListener('hide.bs.collapse', function() {
+        backdrop.classList.remove('show');
+    });
+});
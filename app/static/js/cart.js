@@ -0,0 +1,141 @@
+// Batched cart updates.
+//
+// Add-to-cart buttons and the basket's quantity/remove controls queue operations
+// here instead of posting a form each. The queue is flushed to the JSON cart API as
+// one request once the user pauses for a moment, and the page is updated from the
+// cart summary it returns. If anything goes wrong we fall back to the plain forms.
+(function () {
+    const script = document.currentScript;
+    const batchUrl = script.dataset.batchUrl;
+    const FLUSH_DELAY = 300;
+
+    let queue = [];
+    let timer = null;
+    let inFlight = null;
+
+    function formatMoney(value) {
+        return '£' + value;
+    }
+
+    function queueOp(op, onDone) {
+        // Later ops for the same product supersede earlier 'set'/'remove' ops
+        if (op.op !== 'add') {
+            queue = queue.filter(function (q) { return q.op.prod_id !== op.prod_id; });
+        }
+        queue.push({ op: op, onDone: onDone });
+        clearTimeout(timer);
+        timer = setTimeout(flush, FLUSH_DELAY);
+    }
+
+    function flush() {
+        if (inFlight || queue.length === 0) {
+            return;
+        }
+        const batch = queue;
+        queue = [];
+        inFlight = fetch(batchUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+            credentials: 'same-origin',
+            body: JSON.stringify({ ops: batch.map(function (q) { return q.op; }) })
+        }).then(function (response) {
+            if (!response.ok || response.redirected) {
+                throw new Error('Cart update failed: ' + response.status);
+            }
+            return response.json();
+        }).then(function (data) {
+            renderCart(data.cart, data.warnings || []);
+            batch.forEach(function (q) { if (q.onDone) { q.onDone(null, data); } });
+        }).catch(function (error) {
+            batch.forEach(function (q) { if (q.onDone) { q.onDone(error); } });
+        }).finally(function () {
+            inFlight = null;
+            if (queue.length) {
+                flush();
+            }
+        });
+    }
+
+    function renderCart(cart, warnings) {
+        document.querySelectorAll('[data-cart-count]').forEach(function (el) {
+            el.textContent = cart.item_count;
+            el.hidden = cart.item_count === 0;
+        });
+
+        const cards = document.querySelectorAll('.cart-item-card[data-prod-id]');
+        if (!cards.length) {
+            return;
+        }
+        if (cart.lines.length === 0) {
+            window.location.reload();  // show the empty-basket state
+            return;
+        }
+        const lines = {};
+        cart.lines.forEach(function (line) { lines[line.prod_id] = line; });
+        cards.forEach(function (card) {
+            const line = lines[card.dataset.prodId];
+            if (!line) {
+                card.remove();
+                return;
+            }
+            card.querySelector('.qty-input-cart').value = line.qty;
+            card.querySelector('[data-item-total]').textContent = formatMoney(line.item_total);
+        });
+        document.querySelectorAll('[data-cart-lines]').forEach(function (el) {
+            el.textContent = cart.lines.length;
+        });
+        document.querySelector('[data-cart-subtotal]').textContent = formatMoney(cart.subtotal);
+        document.querySelector('[data-cart-shipping]').textContent =
+            cart.shipping === '0.00' ? 'Free' : formatMoney(cart.shipping);
+        document.querySelector('[data-cart-grand-total]').textContent = formatMoney(cart.grand_total);
+        warnings.forEach(function (warning) { console.warn(warning); });
+    }
+
+    // Add-to-cart forms (product cards and the product page)
+    document.querySelectorAll('form[data-cart-add]').forEach(function (form) {
+        form.addEventListener('submit', function (event) {
+            event.preventDefault();
+            const qtyInput = form.dataset.qtyInput && document.getElementById(form.dataset.qtyInput);
+            const button = form.querySelector('button[type="submit"]');
+            button.classList.add('is-adding');
+            queueOp(
+                { op: 'add', prod_id: parseInt(form.dataset.cartAdd, 10),
+                  qty: qtyInput ? parseInt(qtyInput.value, 10) || 1 : 1 },
+                function (error) {
+                    button.classList.remove('is-adding');
+                    if (error) {
+                        form.submit();
+                    }
+                }
+            );
+        });
+    });
+
+    // Basket page: +/- buttons set the quantity, the bin removes the line
+    document.querySelectorAll('.cart-item-card[data-prod-id]').forEach(function (card) {
+        const prodId = parseInt(card.dataset.prodId, 10);
+        const stock = parseInt(card.dataset.stock, 10);
+        const input = card.querySelector('.qty-input-cart');
+        const fallback = function (error) { if (error) { window.location.reload(); } };
+
+        function setQty(qty) {
+            if (qty < 1 || qty > stock) {
+                return;
+            }
+            input.value = qty;
+            queueOp({ op: 'set', prod_id: prodId, qty: qty }, fallback);
+        }
+
+        card.querySelector('.qty-decrease-cart').addEventListener('click', function () {
+            setQty(parseInt(input.value, 10) - 1);
+        });
+        card.querySelector('.qty-increase-cart').addEventListener('click', function () {
+            setQty(parseInt(input.value, 10) + 1);
+        });
+        card.querySelector('.cart-remove-form').addEventListener('submit', function (event) {
+            event.preventDefault();
+            card.style.opacity = 0.5;
+            queueOp({ op: 'remove', prod_id: prodId }, fallback);
+        });
+    });
+})();
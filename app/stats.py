@@ -0,0 +1,130 @@
+# app/stats.py
+# Incrementally maintained dashboard statistics.
+#
+# The admin dashboard used to run three COUNT(*)s and a SUM over the orders table on
+# every view. Instead, each write site calls bump() in the same transaction as the
+# change it records, and the dashboard reads the handful of site_stat rows back with
+# read_stats(). `flask stats reconcile` recomputes everything from the source tables
+# to correct any drift (run it from cron, e.g. nightly).
+
+import random
+from decimal import Decimal
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import ArchivedOrder, Order, Product, SiteStat, User
+from app.replicas import use_primary
+
+USERS = "users"
+PRODUCTS = "products"
+ORDERS = "orders"
+COMPLETED_REVENUE = "completed_revenue"
+
+# Shard rows per statistic; a checkout only locks one of them.
+SHARDS = 8
+
+
+def _compute(name):
+    # Source-of-truth queries, only used when seeding or reconciling.
+    if name == USERS:
+        return db.session.query(func.count(User.user_id)).scalar()
+    if name == PRODUCTS:
+        return db.session.query(func.count(Product.prod_id)).scalar()
+    # Archived orders (see app/archive.py) still count
+    if name == ORDERS:
+        return sum(db.session.query(func.count(model.order_id)).scalar() for model in (Order, ArchivedOrder))
+    if name == COMPLETED_REVENUE:
+        return sum(
+            db.session.query(func.coalesce(func.sum(model.grand_total), 0))
+            .filter(func.lower(model.status) == "completed")
+            .scalar()
+            for model in (Order, ArchivedOrder)
+        )
+    raise KeyError(name)
+
+
+def bump(name, delta):
+    """
+    Add ``delta`` to statistic ``name`` as part of the current transaction.
+
+    Uses a relative UPDATE (value = value + delta) on a random shard, so concurrent
+    writers never overwrite each other. If the statistic has not been seeded yet
+    nothing is written; read_stats() will compute it from scratch on first use.
+    """
+    if not delta:
+        return
+    db.session.execute(
+        update(SiteStat)
+        .where(SiteStat.name == name, SiteStat.shard == random.randrange(SHARDS))
+        .values(value=SiteStat.value + Decimal(delta))
+    )
+
+
+def reconcile(names=(USERS, PRODUCTS, ORDERS, COMPLETED_REVENUE)):
+    """
+    Recompute statistics from the source tables and rewrite their shard rows.
+
+    The shard rows are updated in place, never deleted: they are locked (and on
+    SQLite the write lock taken by zeroing shards 1..n) before the count is taken, so
+    a concurrent bump() either committed before it and is in the count, or waits and
+    lands on top of the new value.
+    """
+    values = {}
+    for name in names:
+        existing = set(db.session.scalars(
+            select(SiteStat.shard).where(SiteStat.name == name).with_for_update()
+        ))
+        db.session.execute(
+            update(SiteStat).where(SiteStat.name == name, SiteStat.shard != 0).values(value=0)
+        )
+        values[name] = Decimal(_compute(name) or 0)
+        db.session.execute(
+            update(SiteStat).where(SiteStat.name == name, SiteStat.shard == 0).values(value=values[name])
+        )
+        # First run (or shards added since): create the missing rows
+        for shard in sorted(set(range(SHARDS)) - existing):
+            db.session.add(SiteStat(name=name, shard=shard, value=values[name] if shard == 0 else 0))
+    db.session.commit()
+    return values
+
+
+def read_stats():
+    """Return all dashboard statistics from one small GROUP BY over site_stat."""
+    rows = (
+        db.session.query(SiteStat.name, func.sum(SiteStat.value))
+        .group_by(SiteStat.name)
+        .all()
+    )
+    values = {name: Decimal(total or 0) for name, total in rows}
+
+    missing = [n for n in (USERS, PRODUCTS, ORDERS, COMPLETED_REVENUE) if n not in values]
+    if missing:
+        # First run on an existing database: seed from the real tables once.
+        try:
+            with use_primary():  # seed from the real tables, not a lagging replica
+                values.update(reconcile(missing))
+        except IntegrityError:
+            # Another request seeded them at the same moment; theirs is as good.
+            db.session.rollback()
+            return read_stats()
+
+    return {
+        USERS: int(values[USERS]),
+        PRODUCTS: int(values[PRODUCTS]),
+        ORDERS: int(values[ORDERS]),
+        COMPLETED_REVENUE: values[COMPLETED_REVENUE],
+    }
+
+
+stats_cli = AppGroup("stats", help="Maintain the admin dashboard statistics.")
+
+
+@stats_cli.command("reconcile")
+def reconcile_command():
+    """Recompute dashboard statistics from the source tables."""
+    for name, value in reconcile().items():
+        click.echo(f"{name}: {value}")
@@ -1,11 +1,14 @@
 from flask import render_template
 from flask_mail import Message
-# Import mail and the Celery instance from the top-level app package
-from app import mail 
+# Emails are queued in the outbox and delivered by `flask outbox drain`
+from app.outbox import enqueue
 
 
 def send_welcome_email( recipient_email, username):
-    
+    """
+    Queues the welcome email. The row is committed together with the new user,
+    so no SMTP traffic happens inside the registration request.
+    """
     msg = Message(
         subject="Welcome to Our Community!",
         recipients=[recipient_email],
@@ -15,18 +18,12 @@ def send_welcome_email( recipient_email, username):
         )
     )
     
-    try:
-        # Flask-Mail works automatically inside the Celery ContextTask
-        mail.send(msg)
-        print(f"Background Task: Successfully sent welcome email to {recipient_email}")
-        return 'SUCCESS'
-    except Exception as e:
-        # Log failure and instruct Celery to retry later
-        print(f"Background Task: FAILED to send email to {recipient_email}. Retrying in 60s. Error: {e}")
-    
+    return enqueue(msg)
+
+
 def send_order_confirmation_email(user, order, order_items):
     """
-    Sends order confirmation email with details.
+    Queues the order confirmation email with details, inside the checkout transaction.
     """
     msg = Message(
         subject=f"Order #{order.order_id} Confirmed!",
@@ -95,9 +92,4 @@ Thanks for shopping with us!
     <p>Thanks for shopping with us!</p>
     """
 
-    try:
-        mail.send(msg)
-        print(f"Order confirmation email sent to {user.email}")
-    except Exception as e:
-        print(f"Failed to send order email: {e}")
-        # Optional: log or flash in production    
\ No newline at end of file
+    return enqueue(msg)
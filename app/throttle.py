@@ -0,0 +1,143 @@
+# app/throttle.py
+# Token-bucket throttling for login and registration attempts.
+#
+# Each client IP and each account email has a bucket holding up to BURST tokens,
+# refilled at PER_MINUTE tokens a minute. Every attempt takes a token from its
+# buckets before any password is hashed. With an empty bucket the attempt is refused
+# with a Retry-After, and costs no hashing at all. A successful login refills the
+# account's bucket, so the owner's own typos don't lock them out for long.
+#
+# Buckets live in process memory by default (each worker throttles on its own, which
+# multiplies the limits by the number of workers) or in Redis, where a small Lua
+# script updates them atomically for every worker at once.
+
+import threading
+import time
+from collections import OrderedDict
+
+REDIS_TOKEN_BUCKET = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or ARGV[1])
+local updated = tonumber(redis.call('HGET', KEYS[1], 'updated') or ARGV[3])
+local burst, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class MemoryBuckets:
+    """Per-process token buckets, least recently used dropped past max_entries."""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class RedisBuckets:
+    """Token buckets shared by every worker through Redis."""
+
+    def __init__(self, client, prefix="login-throttle:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(REDIS_TOKEN_BUCKET)
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis  # optional dependency, only needed for this backend
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def take(self, key, burst, rate):
+        return float(self._script(keys=[self.prefix + key], args=[burst, rate, time.time()]))
+
+    def reset(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class NullBuckets:
+    """Throttling switched off."""
+
+    def take(self, key, burst, rate):
+        return 0.0
+
+    def reset(self, key):
+        pass
+
+
+class LoginThrottle:
+    """Flask extension holding the per-IP and per-account login buckets."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("LOGIN_THROTTLE_BACKEND", "memory")
+        app.config.setdefault("LOGIN_THROTTLE_REDIS_URL", "redis://localhost:6379/0")
+        app.config.setdefault("LOGIN_IP_BURST", 20)
+        app.config.setdefault("LOGIN_IP_PER_MINUTE", 10)
+        app.config.setdefault("LOGIN_ACCOUNT_BURST", 5)
+        app.config.setdefault("LOGIN_ACCOUNT_PER_MINUTE", 2)
+        app.extensions["login_throttle"] = _make_buckets(app.config)
+
+    @staticmethod
+    def _buckets():
+        from flask import current_app
+
+        return current_app.extensions["login_throttle"], current_app.config
+
+    def check(self, ip, email=None):
+        """
+        Take a token for ``ip`` (and ``email``, if given).
+
+        Returns 0 if the attempt may go ahead, otherwise the seconds to wait.
+        """
+        buckets, config = self._buckets()
+        wait = buckets.take(f"ip:{ip}", config["LOGIN_IP_BURST"], config["LOGIN_IP_PER_MINUTE"] / 60)
+        if wait or email is None:
+            return wait
+        return buckets.take(
+            f"account:{email.strip().lower()}",
+            config["LOGIN_ACCOUNT_BURST"],
+            config["LOGIN_ACCOUNT_PER_MINUTE"] / 60,
+        )
+
+    def succeeded(self, email):
+        """Refill an account's bucket after a successful login."""
+        buckets, _ = self._buckets()
+        buckets.reset(f"account:{email.strip().lower()}")
+
+
+def _make_buckets(config):
+    kind = config["LOGIN_THROTTLE_BACKEND"]
+    if kind == "memory":
+        return MemoryBuckets()
+    if kind == "redis":
+        return RedisBuckets.from_url(config["LOGIN_THROTTLE_REDIS_URL"])
+    if kind in ("null", "none", None):
+        return NullBuckets()
+    raise ValueError(f"Unknown LOGIN_THROTTLE_BACKEND: {kind!r}")
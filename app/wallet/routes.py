@@ -1,6 +1,8 @@
-from flask import render_template, redirect, url_for, flash
+from flask import current_app, render_template, redirect, url_for, flash
 from flask_login import current_user, login_required
-from app import db 
+from sqlalchemy import update
+from app import db, identity_cache
+from app.models import User
 from .forms import WalletTopUpForm 
 from . import wallet_bp
 from decimal import Decimal
@@ -22,10 +24,18 @@ def top_up_wallet():
         # Ensure data is treated as Decimal for high precision
         top_up_amount = Decimal(form.amount.data)
         
-        # Transaction: Add amount to wallet
+        # Transaction: Add amount to wallet. A relative UPDATE, because current_user
+        # may be a cached snapshot from before a checkout on another worker
         try:
-            current_user.wallet_balance += top_up_amount
+            db.session.execute(
+                update(User)
+                .where(User.user_id == current_user.user_id)
+                .values(wallet_balance=User.wallet_balance + top_up_amount)
+                .execution_options(synchronize_session=False)
+            )
+            identity_cache.forget(current_user.user_id)
             db.session.commit()
+            db.session.refresh(current_user)  # the committed balance, for the message
             
             flash(
                 f"Successfully topped up £{top_up_amount:.2f}! New balance: £{current_user.wallet_balance:.2f}", 
@@ -34,10 +44,10 @@ def top_up_wallet():
             # Redirect to the wallet home route within the 'wallet' blueprint
             return redirect(url_for('wallet.wallet_home')) 
             
-        except Exception as e:
+        except Exception:
             db.session.rollback()
             flash("An error occurred during the transaction. Please try again.", "danger")
-            print(f"Wallet Top-Up Error: {e}")
+            current_app.logger.exception("Wallet top-up failed")
             
     current_balance = f"£{current_user.wallet_balance:.2f}"
     
@@ -0,0 +1,132 @@
+"""
+Login flood benchmark: catalogue latency while attackers hammer /login.
+
+Seeds a throwaway SQLite database with products and accounts, then for each setup
+runs ATTACKERS threads posting wrong passwords (each request from a fresh address,
+as in a credential-stuffing run from a botnet) while one shopper thread keeps
+loading /products. Prints login attempts/s broken down by outcome, and the
+shopper's page latency.
+
+Setups:
+    inline     hashing on the request thread, no throttling (the old behaviour)
+    bounded    PASSWORD_HASH_WORKERS threads with a queue limit, no throttling
+    throttled  bounded, plus the per-IP/per-account token buckets
+
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --attackers 32 --seconds 20
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import Product, User  # noqa: E402
+
+SETUPS = {
+    "inline": {"PASSWORD_HASH_WORKERS": 0, "LOGIN_THROTTLE_BACKEND": "null"},
+    "bounded": {"LOGIN_THROTTLE_BACKEND": "null"},
+    "throttled": {},
+}
+
+
+def seed(accounts, products, method):
+    password_hash = generate_password_hash("correct horse", method)  # one hash, shared
+    db.session.execute(insert(User), [
+        {"name": f"User {i}", "email": f"user{i}@example.com", "password_hash": password_hash}
+        for i in range(accounts)
+    ])
+    db.session.execute(insert(Product), [
+        {"name": f"Watch {i}", "sku": f"watch_{i}", "desc": "A watch.", "price": Decimal("50.00"),
+         "stock_level": 10, "category": "watch"}
+        for i in range(products)
+    ])
+    db.session.commit()
+
+
+def run(app, attackers, seconds, accounts):
+    stop = threading.Event()
+    outcomes = Counter()
+    latencies = []
+    addresses = itertools.count(1)
+
+    def attack(n):
+        client = app.test_client()
+        for attempt in itertools.count():
+            if stop.is_set():
+                return
+            address = next(addresses)
+            client.environ_base["REMOTE_ADDR"] = f"10.{address >> 16 & 255}.{address >> 8 & 255}.{address & 255}"
+            response = client.post("/login", data={
+                "email": f"user{(n + attempt) % accounts}@example.com", "password": "guess"
+            })
+            outcomes[{200: "hashed", 429: "throttled", 503: "busy"}.get(response.status_code, "other")] += 1
+
+    def shop():
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get("/products")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=attack, args=(n,)) for n in range(attackers)]
+    threads.append(threading.Thread(target=shop))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return outcomes, latencies
+
+
+def percentile(samples, pct):
+    return statistics.quantiles(samples, n=100)[pct - 1] if len(samples) > 1 else samples[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--attackers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--products", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'setup':<10} {'attempts/s':>10} {'hashed/s':>9} {'throttled/s':>12} {'busy/s':>7} "
+          f"{'catalog p50/p95/p99 ms':>24}")
+    for name, overrides in {"idle": None, **SETUPS}.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app({
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 30, "check_same_thread": False}},
+                "ASSETS_FINGERPRINT": False,
+                "WTF_CSRF_ENABLED": False,
+                "CATALOG_CACHE_BACKEND": "null",
+                **(overrides or {}),
+            })
+            with app.app_context():
+                db.create_all()
+                seed(args.accounts, args.products, app.config["PASSWORD_HASH_METHOD"])
+            outcomes, latencies = run(app, 0 if overrides is None else args.attackers,
+                                      args.seconds, args.accounts)
+            rate = {k: v / args.seconds for k, v in outcomes.items()}
+            print(f"{name:<10} {sum(rate.values()):>10.1f} {rate.get('hashed', 0):>9.1f} "
+                  f"{rate.get('throttled', 0):>12.1f} {rate.get('busy', 0):>7.1f} "
+                  f"{percentile(latencies, 50):>10.1f}/{percentile(latencies, 95):.1f}"
+                  f"/{percentile(latencies, 99):.1f}")
+
+
+if __name__ == "__main__":
+    main()
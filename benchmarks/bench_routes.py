@@ -0,0 +1,560 @@
+"""
+Route benchmark: latency, queries per request and throughput for every route.
+
+Seeds a throwaway SQLite database with a shop-sized dataset (products, users with
+carts, orders with lines, an import job), then:
+
+  1. requests each route in SCENARIOS --repeat times through the test client, as a
+     guest, a shopper or an admin, and records latency percentiles, SQL statements
+     per request and the status codes seen;
+  2. runs --concurrency shopper threads for --seconds over a weighted mix of the
+     storefront, cart and checkout routes, and records throughput and latency.
+
+State a write needs (a cart to check out, a product to delete) is prepared outside
+the timed part of each request. Results are written as JSON with --output; with
+--compare, the run is checked against such a baseline and the script exits with
+status 1 if a route issues more queries, or got slower than --tolerance allows.
+
+    python benchmarks/bench_routes.py --output benchmarks/baseline.json
+    python benchmarks/bench_routes.py --compare benchmarks/baseline.json
+    python benchmarks/bench_routes.py --products 200 --users 20 --orders 200 --repeat 5  # quick run
+
+Baselines are only comparable between runs on the same machine with the same
+dataset options; the comparison refuses to proceed if the options differ.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert, select, update  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.admin.importer import error_report_path  # noqa: E402
+from app.cart.basket import touch_cart  # noqa: E402
+from app.models import CartItem, ImportJob, Order, OrderItem, Product, User  # noqa: E402
+
+PASSWORD = "correct horse"
+CART_LINES = 3
+STATUSES = ("processing", "shipped", "completed", "cancelled")
+
+
+# ----------------------------- DATASET -----------------------------
+def seed(products, users, orders, carts, method):
+    """Bulk-insert the dataset and return the ids the scenarios refer to."""
+    rng = random.Random(42)
+    password_hash = generate_password_hash(PASSWORD, method)  # one hash, shared
+
+    db.session.execute(insert(Product), [
+        {"name": f"{category.title()} {i:05d}", "sku": f"{category}_{i + 1}", "desc": "Benchmark stock.",
+         "price": Decimal(rng.randint(20, 900)), "stock_level": 1_000_000, "category": category,
+         "image_url": f"uploads/products/item_{i % 34 + 1:02d}.jpg"}
+        for i, category in ((i, "watch" if i % 2 else "handbag") for i in range(products))
+    ])
+    db.session.execute(insert(User), [
+        {"name": "Admin", "email": "admin@example.com", "password_hash": password_hash, "is_admin": True}
+    ] + [
+        {"name": f"Shopper {i}", "email": f"user{i}@example.com", "password_hash": password_hash,
+         "wallet_balance": Decimal("1000000.00")}
+        for i in range(users)
+    ])
+    product_ids = db.session.scalars(select(Product.prod_id).order_by(Product.prod_id)).all()
+    user_ids = db.session.scalars(
+        select(User.user_id).where(User.is_admin.is_(False)).order_by(User.user_id)
+    ).all()
+
+    # Carts for the first `carts` shoppers; the last product is kept out of every cart
+    db.session.execute(insert(CartItem), [
+        {"user_id": user_id, "prod_id": prod_id, "qty": rng.randint(1, 3)}
+        for user_id in user_ids[:carts]
+        for prod_id in rng.sample(product_ids[:-1], CART_LINES)
+    ])
+
+    # Orders spread over the shoppers and the last year, 1-5 lines each
+    start = datetime(2025, 1, 1)
+    for offset in range(0, orders, 5000):
+        chunk = range(offset, min(offset + 5000, orders))
+        first_id = (db.session.scalar(select(db.func.max(Order.order_id))) or 0) + 1
+        db.session.execute(insert(Order), [
+            {"order_id": first_id + n, "user_id": user_ids[i % len(user_ids)],
+             "order_date": start + timedelta(minutes=rng.randint(0, 525_600)), "status": rng.choice(STATUSES),
+             "payment_method": "Wallet", "sub_total": Decimal("100.00"), "shipping_cost": Decimal("0.00"),
+             "grand_total": Decimal("100.00")}
+            for n, i in enumerate(chunk)
+        ])
+        db.session.execute(insert(OrderItem), [
+            {"order_id": first_id + n, "prod_id": prod_id, "qty": 1, "price_at_purchase": Decimal("20.00")}
+            for n in range(len(chunk))
+            for prod_id in rng.sample(product_ids, rng.randint(1, 5))
+        ])
+
+    job = ImportJob(filename="products.csv", status="done", rows_processed=10, rows_imported=9,
+                    rows_with_errors=1, finished_at=datetime.now(timezone.utc))
+    db.session.add(job)
+    db.session.commit()
+    with open(error_report_path(job.job_id), "w") as report:
+        report.write("line,error\n7,price: not a number\n")
+
+    shopper = user_ids[0]
+    return {
+        "user_id": shopper,
+        "shopper_ids": user_ids,
+        "product_id": product_ids[len(product_ids) // 2],
+        "spare_product_id": product_ids[-1],
+        "order_id": db.session.scalar(select(Order.order_id).where(Order.user_id == shopper).limit(1)),
+        "job_id": job.job_id,
+    }
+
+
+# ----------------------------- SCENARIOS -----------------------------
+# Setup functions run untimed before each request, inside an app context. They get
+# the fixture ids (with user_id set to the acting shopper) and return extra values
+# for the path and form fields.
+_serial = itertools.count(1)
+
+
+def fill_cart(fx):
+    """Give the shopper a fresh CART_LINES-line cart (checkout empties it)."""
+    db.session.execute(CartItem.__table__.delete().where(CartItem.user_id == fx["user_id"]))
+    db.session.execute(insert(CartItem), [
+        {"user_id": fx["user_id"], "prod_id": fx["product_id"] + n, "qty": 1} for n in range(CART_LINES)
+    ])
+    touch_cart(fx["user_id"])
+    db.session.commit()
+    return {}
+
+
+def spare_cart_line(fx):
+    """A line the request can change or remove without disturbing the rest of the cart."""
+    db.session.execute(CartItem.__table__.delete().where(
+        CartItem.user_id == fx["user_id"], CartItem.prod_id == fx["spare_product_id"]
+    ))
+    line = CartItem(user_id=fx["user_id"], prod_id=fx["spare_product_id"], qty=1)
+    db.session.add(line)
+    touch_cart(fx["user_id"])
+    db.session.commit()
+    return {"cart_item_id": line.cart_item_id}
+
+
+def doomed_product(fx):
+    product = Product(name="Doomed", sku=f"doomed_{next(_serial)}", price=Decimal("10.00"),
+                      stock_level=1, category="watch")
+    db.session.add(product)
+    db.session.flush()
+    # SQLite hands out the id of the product deleted last time again, and
+    # delete_product leaves that product's cart lines behind
+    db.session.execute(CartItem.__table__.delete().where(CartItem.prod_id == product.prod_id))
+    db.session.add(CartItem(user_id=fx["user_id"], prod_id=product.prod_id, qty=1))
+    db.session.commit()
+    return {"doomed_id": product.prod_id}
+
+
+def doomed_user(fx):
+    user = User(name="Doomed", email=f"doomed{next(_serial)}@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(CartItem(user_id=user.user_id, prod_id=fx["product_id"], qty=1))
+    for _ in range(3):
+        order = Order(user_id=user.user_id, payment_method="Wallet", sub_total=Decimal("20.00"),
+                      grand_total=Decimal("20.00"))
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.order_id, prod_id=fx["product_id"], qty=1,
+                                 price_at_purchase=Decimal("20.00")))
+    db.session.commit()
+    return {"doomed_id": user.user_id}
+
+
+def next_status(fx):
+    return {"status": STATUSES[next(_serial) % len(STATUSES)]}
+
+
+def pending_week(fx):
+    """Put the first week of March back to pending for the bulk move to process."""
+    db.session.execute(update(Order).where(Order.order_date >= datetime(2025, 3, 1),
+                                           Order.order_date < datetime(2025, 3, 8)).values(status="pending"))
+    db.session.commit()
+    return {}
+
+
+def new_email(fx):
+    return {"email": f"new{next(_serial)}@example.com"}
+
+
+@dataclass
+class Scenario:
+    endpoint: str
+    path: str                           # a format string over the fixtures and setup values
+    method: str = "GET"
+    role: str = "guest"                 # guest, user (a shopper) or admin
+    data: Optional[dict] = None         # form fields, formatted like path
+    json: Optional[Callable] = None     # (values) -> JSON body
+    setup: Optional[Callable] = None    # (values) -> dict, untimed
+    weight: int = 0                     # share of the load mix; 0 keeps it out
+    label: Optional[str] = None         # tells several scenarios of one endpoint apart
+
+    @property
+    def name(self):
+        return self.label or self.endpoint
+
+    def request(self, values):
+        """Keyword arguments for client.open()."""
+        values = {**values, **(self.setup(values) if self.setup else {})}
+        kwargs = {"method": self.method, "path": self.path.format(**values)}
+        if self.data is not None:
+            kwargs["data"] = {k: str(v).format(**values) for k, v in self.data.items()}
+        if self.json is not None:
+            kwargs["json"] = self.json(values)
+        return kwargs
+
+
+PRODUCT_FORM = {"name": "Benchmark Watch", "category": "watch", "price": "99.00", "stock_level": "5",
+                "description": "Edited by the benchmark."}
+
+SCENARIOS = [
+    # Storefront
+    Scenario("main.index", "/", weight=10),
+    Scenario("main.product_list", "/products", weight=20),
+    Scenario("main.product_list", "/products?sort=price_asc&per_page=48", label="main.product_list?sort", weight=5),
+    Scenario("main.product_detail", "/product/{product_id}", weight=20),
+    Scenario("main.search", "/search?q=watch", weight=8),
+    Scenario("main.search", "/search?q=handbag&category=handbag&page=2", label="main.search?category", weight=2),
+
+    # Operations
+    Scenario("metrics", "/metrics"),
+
+    # Accounts (login and register pay for a full password hash)
+    Scenario("auth.login", "/login"),
+    Scenario("auth.login", "/login", "POST", data={"email": "user0@example.com", "password": PASSWORD},
+             label="auth.login POST"),
+    Scenario("auth.register", "/register"),
+    Scenario("auth.register", "/register", "POST", setup=new_email, label="auth.register POST",
+             data={"name": "New Shopper", "email": "{email}", "password": PASSWORD, "confirm_password": PASSWORD}),
+    Scenario("auth.logout", "/logout", role="user"),
+
+    # Cart and orders
+    Scenario("cart.view_cart", "/cart", role="user", setup=fill_cart, weight=8),
+    Scenario("cart.cart_state", "/cart/api", role="user", weight=4),
+    Scenario("cart.add_to_cart", "/cart/add/{product_id}", "POST", role="user", weight=6),
+    Scenario("cart.cart_batch", "/cart/api/batch", "POST", role="user", weight=3,
+             json=lambda v: {"ops": [{"op": "set", "prod_id": v["product_id"], "qty": 2},
+                                     {"op": "add", "prod_id": v["product_id"] + 1, "qty": 1}]}),
+    Scenario("cart.update_cart_item_quantity", "/cart/update/{cart_item_id}", "POST", role="user",
+             setup=spare_cart_line, data={"qty": "2"}),
+    Scenario("cart.remove_from_cart", "/cart/remove/{cart_item_id}", "POST", role="user", setup=spare_cart_line),
+    Scenario("cart.checkout", "/checkout", "POST", role="user", setup=fill_cart, data={"payment_method": "Wallet"},
+             weight=2),
+    Scenario("cart.user_orders", "/orders", role="user", weight=4),
+
+    # Wallet
+    Scenario("wallet.wallet_home", "/wallet/", role="user", weight=1),
+    Scenario("wallet.top_up_wallet", "/wallet/topup", role="user"),
+    Scenario("wallet.top_up_wallet", "/wallet/topup", "POST", role="user", data={"amount": "10.00"},
+             label="wallet.top_up_wallet POST"),
+
+    # Admin
+    Scenario("admin.admin_dashboard", "/admin", role="admin"),
+    Scenario("admin.manage_users", "/admin/users", role="admin"),
+    Scenario("admin.manage_users", "/admin/users?q=Shopper 1", role="admin", label="admin.manage_users?q"),
+    Scenario("admin.manage_products", "/admin/products", role="admin"),
+    Scenario("admin.manage_products", "/admin/products", "POST", role="admin",
+             data={**PRODUCT_FORM, "submit": "single"}, label="admin.manage_products POST"),
+    Scenario("admin.add_product", "/admin/add_product", role="admin"),
+    Scenario("admin.edit_product", "/admin/products/{product_id}/edit", role="admin"),
+    Scenario("admin.edit_product", "/admin/products/{spare_product_id}/edit", "POST", role="admin",
+             data=PRODUCT_FORM, label="admin.edit_product POST"),
+    Scenario("admin.delete_product", "/admin/products/{doomed_id}/delete", "POST", role="admin",
+             setup=doomed_product),
+    Scenario("admin.import_status", "/admin/imports/{job_id}", role="admin"),
+    Scenario("admin.import_errors", "/admin/imports/{job_id}/errors.csv", role="admin"),
+    Scenario("admin.manage_orders", "/admin/orders", role="admin"),
+    Scenario("admin.manage_orders", "/admin/orders?status=shipped", role="admin", label="admin.manage_orders?status"),
+    Scenario("admin.order_details", "/admin/orders/{order_id}", role="admin"),
+    Scenario("admin.update_order_status", "/admin/orders/{order_id}/update_status", "POST", role="admin",
+             setup=next_status, data={"status": "{status}"}),
+    Scenario("admin.bulk_update_order_status", "/admin/orders/bulk_status", "POST", role="admin", setup=pending_week,
+             data={"status": "processing", "from_status": "pending", "date_from": "2025-03-01",
+                   "date_to": "2025-03-07"}),
+    Scenario("admin.delete_user", "/admin/users/{doomed_id}/delete", "POST", role="admin", setup=doomed_user),
+    Scenario("admin.perf", "/admin/perf", role="admin"),
+]
+
+
+def uncovered(app, scenarios=SCENARIOS):
+    """Endpoints of ``app`` that no scenario exercises (static files aside)."""
+    covered = {s.endpoint for s in scenarios}
+    return sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                  if rule.endpoint != "static" and rule.endpoint not in covered)
+
+
+# ----------------------------- MEASURING -----------------------------
+class QueryCount(threading.local):
+    """Statements sent to the engine by the current thread."""
+
+    value = 0
+
+    def __call__(self, *args):
+        self.value += 1
+
+
+def session_cookies(app, fixtures):
+    """Log each role in once and keep its session cookie.
+
+    Every timed request starts from a fresh client carrying one of these cookies, so
+    flashed messages and logouts don't leak from one request into the next.
+    """
+    cookies = {"guest": None}
+    for role, email in (("user", "user0@example.com"), ("admin", "admin@example.com")):
+        client = app.test_client()
+        response = client.post("/login", data={"email": email, "password": PASSWORD})
+        if response.status_code != 302:
+            raise SystemExit(f"Could not log in as {email} (status {response.status_code})")
+        cookies[role] = client.get_cookie("session").value
+    return cookies
+
+
+def timed_request(app, cookie, kwargs, queries):
+    client = app.test_client()
+    if cookie:
+        client.set_cookie("session", cookie)
+    before = queries.value
+    started = time.perf_counter()
+    response = client.open(**kwargs)
+    response.close()
+    return (time.perf_counter() - started) * 1000, queries.value - before, response.status_code
+
+
+def prepare(app, scenario, values):
+    with app.app_context():
+        try:
+            return scenario.request(values)
+        finally:
+            db.session.remove()
+
+
+def percentiles(samples):
+    if len(samples) < 2:
+        return {"p50_ms": samples[0], "p95_ms": samples[0], "p99_ms": samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50_ms": cuts[49], "p95_ms": cuts[94], "p99_ms": cuts[98]}
+
+
+def run_routes(app, fixtures, cookies, queries, repeat, warmup):
+    results = {}
+    for scenario in SCENARIOS:
+        latencies, counts, statuses = [], [], {}
+        for i in range(warmup + repeat):
+            kwargs = prepare(app, scenario, fixtures)
+            elapsed, count, status = timed_request(app, cookies[scenario.role], kwargs, queries)
+            if i >= warmup:
+                latencies.append(elapsed)
+                counts.append(count)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+        results[scenario.name] = {
+            "method": scenario.method,
+            "path": scenario.path,
+            "role": scenario.role,
+            **{k: round(v, 3) for k, v in percentiles(latencies).items()},
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "queries": round(statistics.fmean(counts), 2),
+            "statuses": statuses,
+            "errors": sum(n for status, n in statuses.items() if int(status) >= 400),
+        }
+    return results
+
+
+def run_load(app, fixtures, queries, concurrency, seconds):
+    mix = [s for s in SCENARIOS if s.weight and s.role in ("guest", "user")]
+    shoppers = fixtures["shopper_ids"]
+    if concurrency > len(shoppers):
+        raise SystemExit(f"--concurrency {concurrency} needs at least as many --users")
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies, counts, errors = [], [], []
+
+    def shopper(n):
+        rng = random.Random(n)
+        values = {**fixtures, "user_id": shoppers[n]}
+        client = app.test_client()
+        client.post("/login", data={"email": f"user{n}@example.com", "password": PASSWORD})
+        cookie = client.get_cookie("session").value
+        mine = ([], [], [])
+        while not stop.is_set():
+            scenario = rng.choices(mix, weights=[s.weight for s in mix])[0]
+            kwargs = prepare(app, scenario, values)
+            elapsed, count, status = timed_request(app, cookie if scenario.role == "user" else None, kwargs, queries)
+            mine[0].append(elapsed)
+            mine[1].append(count)
+            if status >= 400:
+                mine[2].append(scenario.name)
+        with lock:
+            latencies.extend(mine[0])
+            counts.extend(mine[1])
+            errors.extend(mine[2])
+
+    threads = [threading.Thread(target=shopper, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    if not latencies:
+        raise SystemExit("The load run finished no requests; try a longer --seconds")
+    return {
+        "concurrency": concurrency,
+        "seconds": seconds,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / seconds, 2),
+        **{k: round(v, 3) for k, v in percentiles(latencies).items()},
+        "queries": round(statistics.fmean(counts), 2),
+        "errors": len(errors),
+    }
+
+
+# ----------------------------- REPORTING -----------------------------
+def report(results):
+    print(f"{'route':<34} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}  statuses")
+    for name, r in results["routes"].items():
+        statuses = " ".join(f"{status}x{n}" for status, n in sorted(r["statuses"].items()))
+        print(f"{name:<34} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['queries']:>8.1f}  {statuses}")
+    load = results.get("load")
+    if load:
+        print(f"\nload: {load['concurrency']} shoppers for {load['seconds']}s: {load['throughput_rps']:.1f} req/s, "
+              f"p50/p95/p99 {load['p50_ms']:.1f}/{load['p95_ms']:.1f}/{load['p99_ms']:.1f} ms, "
+              f"{load['queries']:.1f} queries/request, {load['errors']} errors")
+
+
+def compare(results, baseline, tolerance, min_ms):
+    """Print the differences from ``baseline``; return the list of regressions."""
+    if baseline["meta"]["dataset"] != results["meta"]["dataset"]:
+        raise SystemExit(f"Baseline dataset {baseline['meta']['dataset']} differs from this run's "
+                         f"{results['meta']['dataset']}; rerun with the same options")
+
+    def slower(new, old):
+        return new > old * (1 + tolerance) and new - old > min_ms
+
+    regressions = []
+    print(f"\n{'route':<34} {'p50 ms (baseline)':>22} {'queries (baseline)':>20}")
+    for name, r in results["routes"].items():
+        old = baseline["routes"].get(name)
+        if old is None:
+            print(f"{name:<34} {'new route':>22}")
+            continue
+        flags = []
+        if r["queries"] > old["queries"]:
+            flags.append("more queries")
+        if slower(r["p50_ms"], old["p50_ms"]):
+            flags.append("slower")
+        if r["errors"] > old["errors"]:
+            flags.append("new errors")
+        regressions += [f"{name}: {flag}" for flag in flags]
+        print(f"{name:<34} {r['p50_ms']:>10.2f} ({old['p50_ms']:>8.2f}) {r['queries']:>9.1f} ({old['queries']:>7.1f})"
+              f"  {', '.join(flags)}")
+
+    load, old = results.get("load"), baseline.get("load")
+    if load and old:
+        print(f"\nload throughput {load['throughput_rps']:.1f} req/s (baseline {old['throughput_rps']:.1f}), "
+              f"p95 {load['p95_ms']:.1f} ms (baseline {old['p95_ms']:.1f})")
+        if load["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append("load: lower throughput")
+        if slower(load["p95_ms"], old["p95_ms"]):
+            regressions.append("load: slower p95")
+    return regressions
+
+
+def benchmark(args, tmp):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 30, "check_same_thread": False}},
+        "IMPORT_DIR": os.path.join(tmp, "imports"),
+        "ASSETS_FINGERPRINT": False,
+        "WTF_CSRF_ENABLED": False,
+        # Every scenario logs in from the same address
+        "LOGIN_THROTTLE_BACKEND": "null",
+        # Failing routes show up as 5xx in the report rather than as tracebacks
+        "LOG_LEVEL": "CRITICAL",
+    }, config_name="production")
+    queries = QueryCount()
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        fixtures = seed(args.products, args.users, args.orders, min(args.carts, args.users),
+                        app.config["PASSWORD_HASH_METHOD"])
+        print(f"Seeded {args.products:,} products, {args.users:,} users, {args.orders:,} orders "
+              f"in {time.perf_counter() - started:.1f}s")
+        event.listen(db.engine, "before_cursor_execute", queries)
+
+    missing = uncovered(app)
+    if missing:
+        print(f"No scenario for: {', '.join(missing)}")
+
+    results = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": f"{platform.machine()} x{os.cpu_count()}",
+            "dataset": {"products": args.products, "users": args.users, "orders": args.orders,
+                        "carts": args.carts},
+            "repeat": args.repeat,
+        },
+        "routes": run_routes(app, fixtures, session_cookies(app, fixtures), queries, args.repeat, args.warmup),
+    }
+    if args.concurrency and args.seconds:
+        results["load"] = run_load(app, fixtures, queries, args.concurrency, args.seconds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--carts", type=int, default=500, help="shoppers with a cart")
+    parser.add_argument("--repeat", type=int, default=20, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed requests per route first")
+    parser.add_argument("--concurrency", type=int, default=8, help="load run threads (0 skips it)")
+    parser.add_argument("--seconds", type=float, default=10, help="load run length")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to check this run against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = benchmark(args, tmp)
+    report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_ms)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
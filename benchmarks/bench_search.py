@@ -0,0 +1,108 @@
+"""
+Product search benchmark: full-text index vs. a ranked LIKE '%term%' scan.
+
+Seeds a throwaway SQLite database with N products (1,000,000 by default), going
+through the normal product table so the FTS triggers do the indexing, then times a
+mix of search queries (first page of 24, ranked, optionally filtered by category)
+against the FTS index and against the equivalent ranked LIKE query.
+
+    python benchmarks/bench_search.py                   # 1M products
+    python benchmarks/bench_search.py --products 50000  # quick run
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.main.search import search_products  # noqa: E402
+from app.models import Product  # noqa: E402
+
+ADJECTIVES = ["classic", "vintage", "leather", "steel", "gold", "silver", "canvas", "suede",
+              "quilted", "minimal", "chunky", "slim", "sport", "dress", "travel", "evening"]
+NOUNS = {
+    "watch": ["chronograph", "diver", "pilot", "field", "dress", "smart", "skeleton", "gmt"],
+    "handbag": ["tote", "clutch", "satchel", "hobo", "crossbody", "bucket", "backpack", "wallet"],
+}
+QUERIES = ["leather", "gold diver", "vintage tote", "sat", "quilted clutch", "gmt", "canvas back"]
+
+
+def seed(count, chunk=20000):
+    rng = random.Random(42)
+    started = time.perf_counter()
+    for offset in range(0, count, chunk):
+        rows = []
+        for i in range(offset, min(offset + chunk, count)):
+            category = "watch" if i % 2 else "handbag"
+            words = rng.sample(ADJECTIVES, 2) + [rng.choice(NOUNS[category])]
+            rows.append({
+                "name": " ".join(words).title(),
+                "sku": f"{category}_{i + 1}",
+                "desc": f"A {words[0]} {words[2]} in {rng.choice(ADJECTIVES)} finish.",
+                "price": Decimal(rng.randint(20, 900)),
+                "stock_level": rng.randint(0, 50),
+                "category": category,
+            })
+        db.session.execute(insert(Product), rows)
+        db.session.commit()
+    return time.perf_counter() - started
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def like_search(query, category):
+    """The search we'd otherwise bolt on: every word LIKE-matched, name hits first."""
+    terms = query.split()
+    params = {f"t{i}": f"%{t}%" for i, t in enumerate(terms)}
+    params["c"] = category
+    where = " AND ".join(f'(name LIKE :t{i} OR "desc" LIKE :t{i} OR sku LIKE :t{i})' for i in range(len(terms)))
+    return db.session.execute(
+        text(f"SELECT prod_id FROM product WHERE {where} AND (:c IS NULL OR category = :c) "
+             "ORDER BY CASE WHEN name LIKE :t0 THEN 0 ELSE 1 END, prod_id LIMIT 25"),
+        params,
+    ).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "ASSETS_FINGERPRINT": False,
+        })
+        with app.app_context():
+            db.create_all()
+            elapsed = seed(args.products)
+            print(f"Seeded {args.products:,} products (indexed by triggers) in {elapsed:.1f}s")
+            print(f"{'query':<16} {'category':<9} {'fts p50/max ms':>16} {'like p50/max ms':>17}")
+            for query in QUERIES:
+                for category in (None, "handbag"):
+                    fts = timed(lambda: search_products(query, category=category, per_page=24), args.repeat)
+                    like = timed(lambda: like_search(query, category), args.repeat)
+                    print(f"{query:<16} {category or '-':<9} "
+                          f"{fts[0]:>8.2f}/{fts[1]:<7.2f} {like[0]:>9.2f}/{like[1]:<7.2f}")
+            db.session.remove()
+
+
+if __name__ == "__main__":
+    main()
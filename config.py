@@ -18,9 +18,105 @@ class Config:
         "DATABASE_URL",
         "sqlite:///" + os.path.join(basedir, "instance", "app3.db")
     )
-    print("📂 Database path:", SQLALCHEMY_DATABASE_URI)
-
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replicas (comma-separated URLs), used by views marked read-only
+    DATABASE_REPLICA_URLS = os.getenv("DATABASE_REPLICA_URLS", "")
+
+    # Engine tuning (see app/database.py); the effective values are logged at startup.
+    # MySQL connection pool
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 280))  # below the server's wait_timeout
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() in ["true", "1", "t"]
+    # SQLite PRAGMAs, run on every new connection
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+    # Storefront catalogue (keyset pagination)
+    CATALOG_PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", 24))
+    CATALOG_MAX_PAGE_SIZE = int(os.getenv("CATALOG_MAX_PAGE_SIZE", 96))
+
+    # Customer order history page size
+    ORDER_HISTORY_PAGE_SIZE = int(os.getenv("ORDER_HISTORY_PAGE_SIZE", 10))
+
+    # Admin listings page size
+    ADMIN_ORDERS_PAGE_SIZE = int(os.getenv("ADMIN_ORDERS_PAGE_SIZE", 50))
+    ADMIN_USERS_PAGE_SIZE = int(os.getenv("ADMIN_USERS_PAGE_SIZE", 50))
+
+    # CSV product import
+    IMPORT_DIR = os.getenv("IMPORT_DIR", os.path.join(basedir, "instance", "imports"))
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+    IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", 1))
+
+    # User deletion: accounts with more orders than this are purged in the background,
+    # USER_PURGE_CHUNK_SIZE orders per transaction
+    USER_PURGE_INLINE_LIMIT = int(os.getenv("USER_PURGE_INLINE_LIMIT", 500))
+    USER_PURGE_CHUNK_SIZE = int(os.getenv("USER_PURGE_CHUNK_SIZE", 1000))
+    USER_PURGE_WORKERS = int(os.getenv("USER_PURGE_WORKERS", 1))
+
+    # Order archival (`flask orders archive`): completed/cancelled orders older than
+    # this many days move to the archive tables, ORDER_ARCHIVE_CHUNK_SIZE per transaction
+    ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", 365))
+    ORDER_ARCHIVE_CHUNK_SIZE = int(os.getenv("ORDER_ARCHIVE_CHUNK_SIZE", 1000))
+
+    # Static assets: content-hashed, precompressed copies in static/dist (built at startup)
+    ASSETS_FINGERPRINT = os.getenv("ASSETS_FINGERPRINT", "True").lower() in ["true", "1", "t"]
+
+    # Product image derivatives (0 = build inline on the request thread)
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
+    # Catalogue cache: "memory" (per-process LRU), "filesystem", "redis" or "null";
+    # MAX_ENTRIES bounds both the memory and the filesystem backend
+    CATALOG_CACHE_BACKEND = os.getenv("CATALOG_CACHE_BACKEND", "memory")
+    CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", 300))
+    CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", 1024))
+    CATALOG_CACHE_DIR = os.getenv(
+        "CATALOG_CACHE_DIR", os.path.join(basedir, "instance", "catalog_cache")
+    )
+    CATALOG_CACHE_REDIS_URL = os.getenv("CATALOG_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Logged-in user lookups (memory | redis | null); entries are dropped whenever the
+    # user row changes, the TTL only bounds changes made outside the app
+    IDENTITY_CACHE_BACKEND = os.getenv("IDENTITY_CACHE_BACKEND", "memory")
+    IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", 60))
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", 10000))
+    IDENTITY_CACHE_REDIS_URL = os.getenv("IDENTITY_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Password hashing: cost for new hashes (older ones are upgraded at login), threads
+    # per process and how many more hashes may queue before login answers 503
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:600000")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", 8))
+
+    # Reverse proxies in front of the app (load balancer, nginx, ...): how many of them
+    # append X-Forwarded-For/-Proto. The client address they report then becomes
+    # request.remote_addr, which the login throttle keys on; 0 trusts no such headers.
+    TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", 0))
+
+    # Login/registration throttling (token buckets: burst size and refill per minute)
+    LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+    LOGIN_THROTTLE_REDIS_URL = os.getenv("LOGIN_THROTTLE_REDIS_URL", "redis://localhost:6379/0")
+    LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", 20))
+    LOGIN_IP_PER_MINUTE = int(os.getenv("LOGIN_IP_PER_MINUTE", 10))
+    LOGIN_ACCOUNT_BURST = int(os.getenv("LOGIN_ACCOUNT_BURST", 5))
+    LOGIN_ACCOUNT_PER_MINUTE = int(os.getenv("LOGIN_ACCOUNT_PER_MINUTE", 2))
+
+    # Per-request SQL profiler: Server-Timing headers and /admin/perf (recent requests
+    # kept per process, slowest statements kept per request). Statements slower than
+    # SQL_SLOW_QUERY_MS are logged as warnings (0 turns that off).
+    SQL_PROFILER = os.getenv("SQL_PROFILER", "False").lower() in ["true", "1", "t"]
+    SQL_PROFILER_HISTORY = int(os.getenv("SQL_PROFILER_HISTORY", 200))
+    SQL_PROFILER_SLOWEST = int(os.getenv("SQL_PROFILER_SLOWEST", 5))
+    SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", 200))
+
+    # Prometheus /metrics: bearer token required to scrape it (unset = open). For
+    # several worker processes also set PROMETHEUS_MULTIPROC_DIR, see app/metrics.py.
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
 
     # Mail (Gmail defaults)
     MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
@@ -29,12 +125,42 @@ class Config:
     MAIL_USERNAME = os.getenv("MAIL_USERNAME", "your_email@example.com")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", "your_app_password")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", "noreply@your_app.com")
+
+    # Email outbox worker (flask outbox drain)
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+    OUTBOX_BACKOFF_SECONDS = int(os.getenv("OUTBOX_BACKOFF_SECONDS", 30))
+    OUTBOX_MAX_BACKOFF_SECONDS = int(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", 3600))
+    OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 5))
     
 class DevelopmentConfig(Config):
-    """Development-specific configuration."""
-    DEBUG = True
+    """Development-specific configuration (FLASK_CONFIG=development)."""
+    DEBUG = os.getenv("DEBUG", "True").lower() in ["true", "1", "t"]
+
+    # One developer: a small pool is plenty
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
 
 
 class ProductionConfig(Config):
-    """Production-specific configuration."""
-    DEBUG = False
+    """Production-specific configuration; also the default when FLASK_CONFIG is unset."""
+
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+
+class TestingConfig(Config):
+    """Base for test runs; the tests pass their own overrides on top."""
+    TESTING = True
+
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING")
+
+
+# Selected by create_app(config_name=...) or the FLASK_CONFIG environment variable
+config_profiles = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+    "testing": TestingConfig,
+    "default": ProductionConfig,
+}
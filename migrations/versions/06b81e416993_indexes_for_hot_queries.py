@@ -0,0 +1,80 @@
+"""indexes for hot queries
+
+Composite indexes behind the storefront sorts, order history, the admin order
+list and cart lookups, plus a unique (user_id, prod_id) on cart_item so a cart
+can't hold two lines for one product. Existing duplicate lines are merged first.
+
+Revision ID: 06b81e416993
+Revises: 1f1e9bf04ab3
+Create Date: 2026-10-17 13:02:39.828009
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '06b81e416993'
+down_revision = '1f1e9bf04ab3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    _merge_duplicate_cart_lines()
+
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.create_index('ix_cart_item_prod_id', ['prod_id'], unique=False)
+        batch_op.create_index('uq_cart_item_user_prod', ['user_id', 'prod_id'], unique=True)
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.create_index('ix_order_date', ['order_date', 'order_id'], unique=False)
+        batch_op.create_index('ix_order_status_date', ['status', 'order_date', 'order_id'], unique=False)
+        batch_op.create_index('ix_order_user_date', ['user_id', 'order_date', 'order_id'], unique=False)
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.create_index('ix_order_item_order_id', ['order_id'], unique=False)
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.create_index('ix_product_category_price', ['category', 'price', 'prod_id'], unique=False)
+        batch_op.create_index('ix_product_name', ['name', 'prod_id'], unique=False)
+        batch_op.create_index('ix_product_price', ['price', 'prod_id'], unique=False)
+
+
+def _merge_duplicate_cart_lines():
+    # Fold each product's lines into the oldest one. Done row by row rather than in one
+    # UPDATE ... SELECT, which MySQL refuses on the table being updated.
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        "SELECT user_id, prod_id, MIN(cart_item_id), SUM(COALESCE(qty, 1)) FROM cart_item "
+        "GROUP BY user_id, prod_id HAVING COUNT(*) > 1"
+    )).all()
+    for user_id, prod_id, keep_id, qty in duplicates:
+        bind.execute(
+            sa.text("UPDATE cart_item SET qty = :qty WHERE cart_item_id = :keep_id"),
+            {"qty": qty, "keep_id": keep_id},
+        )
+        bind.execute(
+            sa.text("DELETE FROM cart_item WHERE user_id = :user_id AND prod_id = :prod_id "
+                    "AND cart_item_id <> :keep_id"),
+            {"user_id": user_id, "prod_id": prod_id, "keep_id": keep_id},
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_price')
+        batch_op.drop_index('ix_product_name')
+        batch_op.drop_index('ix_product_category_price')
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_item_order_id')
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_user_date')
+        batch_op.drop_index('ix_order_status_date')
+        batch_op.drop_index('ix_order_date')
+
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.drop_index('uq_cart_item_user_prod')
+        batch_op.drop_index('ix_cart_item_prod_id')
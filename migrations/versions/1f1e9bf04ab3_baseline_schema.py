@@ -0,0 +1,216 @@
+"""baseline schema
+
+The schema as it stood before migrations were introduced, including the product
+full-text index. Safe to run on a database made by db.create_all(): existing
+tables are left alone.
+
+Revision ID: 1f1e9bf04ab3
+Revises: 
+Create Date: 2026-10-17 13:02:09.874765
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1f1e9bf04ab3'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+SQLITE_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, "desc", sku, category,
+        content='product', content_rowid='prod_id', prefix='2 3'
+    )""",
+    """INSERT INTO product_fts(product_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0, 0.0)')""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, "desc", sku, category)
+        VALUES (new.prod_id, new.name, new."desc", new.sku, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, "desc", sku, category)
+        VALUES ('delete', old.prod_id, old.name, old."desc", old.sku, old.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_au
+    AFTER UPDATE OF name, "desc", sku, category ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, "desc", sku, category)
+        VALUES ('delete', old.prod_id, old.name, old."desc", old.sku, old.category);
+        INSERT INTO product_fts(rowid, name, "desc", sku, category)
+        VALUES (new.prod_id, new.name, new."desc", new.sku, new.category);
+    END""",
+]
+
+
+def upgrade():
+    # Databases created before migrations existed (db.create_all()) already have some or
+    # all of these tables. Create only what's missing so they can be upgraded in place.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'email_outbox' not in existing:
+        op.create_table('email_outbox',
+        sa.Column('email_id', sa.Integer(), nullable=False),
+        sa.Column('sender', sa.String(length=255), nullable=True),
+        sa.Column('recipients', sa.Text(), nullable=False),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('html', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('locked_by', sa.String(length=32), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('email_id')
+        )
+        with op.batch_alter_table('email_outbox', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_email_outbox_status'), ['status'], unique=False)
+
+    if 'import_job' not in existing:
+        op.create_table('import_job',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('bytes_total', sa.Integer(), nullable=True),
+        sa.Column('bytes_done', sa.Integer(), nullable=True),
+        sa.Column('rows_processed', sa.Integer(), nullable=True),
+        sa.Column('rows_imported', sa.Integer(), nullable=True),
+        sa.Column('rows_with_errors', sa.Integer(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('job_id')
+        )
+
+    if 'product' not in existing:
+        op.create_table('product',
+        sa.Column('prod_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('sku', sa.String(length=50), nullable=False),
+        sa.Column('desc', sa.Text(), nullable=True),
+        sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('stock_level', sa.Integer(), nullable=True),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('image_url', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('prod_id'),
+        sa.UniqueConstraint('sku')
+        )
+
+    if 'site_stat' not in existing:
+        op.create_table('site_stat',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('value', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('name', 'shard')
+        )
+
+    if 'sku_counter' not in existing:
+        op.create_table('sku_counter',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('next_value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+        )
+
+    if 'user' not in existing:
+        op.create_table('user',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=128), nullable=True),
+        sa.Column('wallet_balance', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('date_joined', sa.DateTime(), nullable=True),
+        sa.Column('cart_version', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('user_id'),
+        sa.UniqueConstraint('email')
+        )
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_user_name'), ['name'], unique=False)
+
+    if 'cart_item' not in existing:
+        op.create_table('cart_item',
+        sa.Column('cart_item_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('prod_id', sa.Integer(), nullable=False),
+        sa.Column('qty', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['prod_id'], ['product.prod_id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+        sa.PrimaryKeyConstraint('cart_item_id')
+        )
+
+    if 'order' not in existing:
+        op.create_table('order',
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('order_date', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('payment_method', sa.String(length=50), nullable=False),
+        sa.Column('sub_total', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('grand_total', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('shipping_cost', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+        sa.PrimaryKeyConstraint('order_id')
+        )
+
+    if 'order_item' not in existing:
+        op.create_table('order_item',
+        sa.Column('order_item_id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('prod_id', sa.Integer(), nullable=False),
+        sa.Column('qty', sa.Integer(), nullable=True),
+        sa.Column('price_at_purchase', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['order.order_id'], ),
+        sa.ForeignKeyConstraint(['prod_id'], ['product.prod_id'], ),
+        sa.PrimaryKeyConstraint('order_item_id')
+        )
+
+    # Added to user after the first release; older databases lack it
+    if 'user' in existing and 'cart_version' not in {
+        c['name'] for c in sa.inspect(op.get_bind()).get_columns('user')
+    }:
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('cart_version', sa.Integer(), server_default='0', nullable=False))
+
+    _create_search_index()
+
+
+def _create_search_index():
+    # Product full-text search (app/main/search.py): the FTS5 table and its triggers
+    # on SQLite, a FULLTEXT index on MySQL. Copied here so this revision doesn't
+    # change if the app's search code does.
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+    elif bind.dialect.name == 'mysql':
+        indexes = {ix['name'] for ix in sa.inspect(bind).get_indexes('product')}
+        if 'ix_product_fulltext' not in indexes:
+            op.execute('ALTER TABLE product ADD FULLTEXT INDEX ix_product_fulltext (name, `desc`, sku)')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for name in ('product_fts_ai', 'product_fts_ad', 'product_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+        op.execute('DROP TABLE IF EXISTS product_fts')
+    op.drop_table('order_item')
+    op.drop_table('order')
+    op.drop_table('cart_item')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_name'))
+
+    op.drop_table('user')
+    op.drop_table('sku_counter')
+    op.drop_table('site_stat')
+    op.drop_table('product')
+    op.drop_table('import_job')
+    with op.batch_alter_table('email_outbox', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_email_outbox_status'))
+
+    op.drop_table('email_outbox')
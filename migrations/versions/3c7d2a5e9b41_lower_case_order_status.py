@@ -0,0 +1,34 @@
+"""lower-case order status
+
+Orders used to be created as 'Processing' while the admin pages wrote
+'processing'. Store every status in lower case so filters and the status index
+match one spelling.
+
+Revision ID: 3c7d2a5e9b41
+Revises: 06b81e416993
+Create Date: 2026-10-17 14:05:12.417305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7d2a5e9b41'
+down_revision = '06b81e416993'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    order = sa.table('order', sa.column('status', sa.String))
+    op.execute(
+        order.update()
+        .where(order.c.status != sa.func.lower(order.c.status))
+        .values(status=sa.func.lower(order.c.status))
+    )
+
+
+def downgrade():
+    # The original spellings aren't recorded, and lower case works with older code
+    pass
@@ -0,0 +1,46 @@
+"""user purge job
+
+Progress of background user deletions (app/admin/purge.py). Skipped when
+db.create_all() has already made the table.
+
+Revision ID: 8e2f4b7c1d63
+Revises: 3c7d2a5e9b41
+Create Date: 2026-10-17 15:21:47.903118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2f4b7c1d63'
+down_revision = '3c7d2a5e9b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'user_purge_job' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('user_purge_job',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('user_email', sa.String(length=120), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('orders_total', sa.Integer(), nullable=True),
+    sa.Column('orders_deleted', sa.Integer(), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    with op.batch_alter_table('user_purge_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_purge_job_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_purge_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_purge_job_user_id'))
+
+    op.drop_table('user_purge_job')
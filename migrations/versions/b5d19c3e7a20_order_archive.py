@@ -0,0 +1,66 @@
+"""order archive
+
+order_archive and order_item_archive, where `flask orders archive` moves old
+finished orders (app/archive.py). Skipped when db.create_all() has already made
+the tables.
+
+Revision ID: b5d19c3e7a20
+Revises: 8e2f4b7c1d63
+Create Date: 2026-10-17 16:08:33.512960
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d19c3e7a20'
+down_revision = '8e2f4b7c1d63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'order_archive' not in existing:
+        op.create_table('order_archive',
+        sa.Column('order_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('order_date', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('payment_method', sa.String(length=50), nullable=False),
+        sa.Column('sub_total', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('grand_total', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('shipping_cost', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+        sa.PrimaryKeyConstraint('order_id')
+        )
+        with op.batch_alter_table('order_archive', schema=None) as batch_op:
+            batch_op.create_index('ix_order_archive_user_date', ['user_id', 'order_date', 'order_id'], unique=False)
+
+    if 'order_item_archive' not in existing:
+        op.create_table('order_item_archive',
+        sa.Column('order_item_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('prod_id', sa.Integer(), nullable=False),
+        sa.Column('qty', sa.Integer(), nullable=True),
+        sa.Column('price_at_purchase', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['order_archive.order_id'], ),
+        sa.ForeignKeyConstraint(['prod_id'], ['product.prod_id'], ),
+        sa.PrimaryKeyConstraint('order_item_id')
+        )
+        with op.batch_alter_table('order_item_archive', schema=None) as batch_op:
+            batch_op.create_index('ix_order_item_archive_order_id', ['order_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order_item_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_item_archive_order_id')
+
+    op.drop_table('order_item_archive')
+    with op.batch_alter_table('order_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_archive_user_date')
+
+    op.drop_table('order_archive')
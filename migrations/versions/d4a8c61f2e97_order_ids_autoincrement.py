@@ -0,0 +1,61 @@
+"""order ids autoincrement
+
+On SQLite an INTEGER PRIMARY KEY without AUTOINCREMENT hands out max(id) + 1, so
+once the newest orders are archived their ids would be used again for new live
+orders. Rebuilds order and order_item with AUTOINCREMENT and starts their
+sequences above every id already in the live and archive tables. Other backends
+keep their own counters and are left alone.
+
+Revision ID: d4a8c61f2e97
+Revises: b5d19c3e7a20
+Create Date: 2026-10-17 18:42:10.271388
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a8c61f2e97'
+down_revision = 'b5d19c3e7a20'
+branch_labels = None
+depends_on = None
+
+# (live table, archive table, primary key)
+TABLES = (
+    ('order', 'order_archive', 'order_id'),
+    ('order_item', 'order_item_archive', 'order_item_id'),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+
+    for table, archive, key in TABLES:
+        sql = bind.execute(sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                           {"name": table}).scalar()
+        if 'AUTOINCREMENT' not in sql.upper():  # db.create_all() databases already have it
+            with op.batch_alter_table(table, recreate='always',
+                                      table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+                pass
+
+        highest = bind.execute(sa.text(
+            f'SELECT MAX(id) FROM (SELECT MAX({key}) AS id FROM "{table}" '
+            f'UNION ALL SELECT MAX({key}) FROM {archive})'
+        )).scalar()
+        if highest is not None:
+            bind.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table})
+            bind.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                         {"name": table, "seq": highest})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for table, _, _ in reversed(TABLES):
+        with op.batch_alter_table(table, recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+            pass
@@ -0,0 +1,42 @@
+"""user search nocase indexes
+
+SQLite's LIKE is case-insensitive, so the admin user search (a prefix LIKE on email
+or name) only uses an index built with the NOCASE collation. Other backends'
+default collations already ignore case and keep using ix_user_name and the email
+unique index.
+
+Revision ID: f2b7e9a4c158
+Revises: d4a8c61f2e97
+Create Date: 2026-10-17 20:05:37.640912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7e9a4c158'
+down_revision = 'd4a8c61f2e97'
+branch_labels = None
+depends_on = None
+
+INDEXES = (('ix_user_email_nocase', 'email'), ('ix_user_name_nocase', 'name'))
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+
+    existing = {ix['name'] for ix in sa.inspect(bind).get_indexes('user')}
+    for name, column in INDEXES:
+        if name not in existing:
+            op.create_index(name, 'user', [sa.text(f'{column} COLLATE NOCASE')], unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='user')
@@ -6,28 +6,154 @@ from app import (
 
 
 @pytest.fixture()
-def app():
+def app(tmp_path):
     # 1. Create a testing instance of your app
     app = create_app(
         {
             "TESTING": True,
             # Set a temporary database URI for testing (e.g., in-memory SQLite)
             "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            # Forms are posted directly by the test client, so skip CSRF tokens
+            "WTF_CSRF_ENABLED": False,
+            # Keep uploaded/generated files out of the source tree
+            "IMPORT_DIR": str(tmp_path / "imports"),
+            # Build image derivatives inline so tests can check them straight away
+            "IMAGE_WORKERS": 0,
+            # Assets are fingerprinted explicitly by the tests that need it
+            "ASSETS_FINGERPRINT": False,
+            # Cheap hashes, made inline; the throttling tests switch buckets back on
+            "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+            "PASSWORD_HASH_WORKERS": 0,
+            "LOGIN_THROTTLE_BACKEND": "null",
         }
     )
+    app.static_folder = str(tmp_path / "static")
 
     # 2. Set up the application context
     with app.app_context():
         # You'll usually initialise and populate your test database here
         db.create_all()
-        pass
 
     yield app
 
-    # 3. Clean up the application context if needed
-    db.drop_all()
+    # 3. Clean up the database once the test is done
+    with app.app_context():
+        db.drop_all()
 
 
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+
+def create_user(app, email="user@example.com", password="secret123", is_admin=False, **fields):
+    """Insert a user directly and return its id."""
+    from werkzeug.security import generate_password_hash
+    from app.models import User
+
+    with app.app_context():
+        user = User(
+            name=fields.pop("name", email.split("@")[0].title()),
+            email=email,
+            password_hash=generate_password_hash(password, method="pbkdf2:sha256:1000"),  # cheap for tests
+            is_admin=is_admin,
+            **fields,
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.user_id
+
+
+def login(client, email="user@example.com", password="secret123"):
+    return client.post("/login", data={"email": email, "password": password})
+
+
+@pytest.fixture()
+def admin_client(app, client):
+    """A test client logged in as an administrator."""
+    create_user(app, email="admin@example.com", is_admin=True)
+    login(client, email="admin@example.com")
+    return client
+
+
+def add_products(app, count, price=None):
+    """Insert ``count`` watches with predictable names, SKUs and images."""
+    from decimal import Decimal
+    from app.models import Product
+
+    with app.app_context():
+        for i in range(count):
+            db.session.add(
+                Product(
+                    name=f"Product {i:03d}",
+                    sku=f"watch_{i + 1}",
+                    desc="A test product description.",
+                    price=price if price is not None else Decimal(10 + i % 7),
+                    stock_level=10,
+                    category="watch",
+                    image_url=f"uploads/products/item_{i % 34 + 1:02d}.jpg",
+                )
+            )
+        db.session.commit()
+
+
+class QueryCounter:
+    """Context manager recording every SQL statement sent to the engine."""
+
+    def __init__(self, app):
+        self.app = app
+        self.statements = []
+        self.parameters = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+    def __enter__(self):
+        from sqlalchemy import event
+
+        with self.app.app_context():
+            self.engine = db.engine
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+def add_orders(app, user_id, count, lines=3):
+    """Insert ``count`` orders for ``user_id`` with ``lines`` items each (needs products)."""
+    from datetime import datetime, timedelta
+    from decimal import Decimal
+    from app.models import Order, OrderItem, Product
+
+    with app.app_context():
+        product_ids = [p.prod_id for p in Product.query.limit(lines).all()]
+        start = datetime(2025, 1, 1)
+        for i in range(count):
+            order = Order(
+                user_id=user_id,
+                order_date=start + timedelta(hours=i),
+                payment_method="Wallet",
+                sub_total=Decimal("30.00"),
+                grand_total=Decimal("35.00"),
+                shipping_cost=Decimal("5.00"),
+            )
+            db.session.add(order)
+            db.session.flush()
+            for prod_id in product_ids:
+                db.session.add(
+                    OrderItem(
+                        order_id=order.order_id,
+                        prod_id=prod_id,
+                        qty=1,
+                        price_at_purchase=Decimal("10.00"),
+                    )
+                )
+        db.session.commit()
@@ -0,0 +1,134 @@
+import re
+from datetime import datetime
+
+from app import db, stats
+from app.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from tests.conftest import add_orders, add_products, create_user, login
+
+
+def _history(app, count=12):
+    """``count`` hourly orders from 2025-01-01; every other one completed."""
+    add_products(app, 3)
+    user_id = create_user(app, email="buyer@example.com")
+    add_orders(app, user_id, count)
+    with app.app_context():
+        for order in Order.query.order_by(Order.order_id):
+            order.status = "completed" if order.order_id % 2 else "processing"
+        db.session.commit()
+    return user_id
+
+
+def test_archive_moves_old_finished_orders_in_chunks(app):
+    _history(app)
+    with app.app_context():
+        before = stats.reconcile()
+
+    runner = app.test_cli_runner()
+    # Two chunks of two, then stop; the next run carries on
+    result = runner.invoke(args=["orders", "archive", "--chunk-size", "2", "--max-chunks", "2"])
+    assert "Archived 4 orders" in result.output
+    result = runner.invoke(args=["orders", "archive", "--chunk-size", "2"])
+    assert "Archived 2 orders" in result.output
+
+    with app.app_context():
+        assert sorted(o.order_id for o in ArchivedOrder.query) == [1, 3, 5, 7, 9, 11]
+        assert {o.status for o in Order.query} == {"processing"}
+        assert ArchivedOrderItem.query.count() == 6 * 3
+        assert OrderItem.query.filter(OrderItem.order_id % 2 == 1).count() == 0
+        assert all(o.archived_at is not None for o in ArchivedOrder.query)
+        # Archived orders still count on the dashboard
+        assert stats.reconcile() == before
+
+
+def test_archive_leaves_recent_orders(app):
+    _history(app)
+    with app.app_context():
+        from app.archive import archive_orders
+
+        assert archive_orders(datetime(2025, 1, 1, 4), chunk_size=100) == 2  # orders 1 and 3
+        assert archive_orders(datetime(2025, 1, 1, 4), chunk_size=100) == 0
+
+
+def test_archive_matches_old_status_spellings(app):
+    from app.archive import archive_orders
+
+    _history(app, 4)
+    with app.app_context():
+        db.session.get(Order, 1).status = "Completed"
+        db.session.get(Order, 2).status = "Cancelled"
+        db.session.commit()
+
+        assert archive_orders(datetime(2026, 1, 1), chunk_size=100) == 3  # 1, 2 and 3
+        assert [o.order_id for o in Order.query] == [4]
+
+
+def test_history_and_details_read_the_archive(app, client):
+    from app.archive import archive_orders
+
+    app.config["ORDER_HISTORY_PAGE_SIZE"] = 5
+    _history(app)
+    with app.app_context():
+        archive_orders(datetime(2025, 1, 2), chunk_size=100)
+
+    login(client, email="buyer@example.com")
+
+    def walk(url, rel):
+        """[(url, order numbers)] for each page, following ``rel`` links."""
+        pages = []
+        while url:
+            html = client.get(url).get_data(as_text=True)
+            pages.append((url, [int(n) for n in re.findall(r"Order #(\d+)", html)]))
+            link = re.search(rf'href="([^"]+)" class="pagination-link" rel="{rel}"', html)
+            url = link.group(1).replace("&amp;", "&") if link else None
+        return pages
+
+    # Newest first across both tables, each order once; the same pages walking back
+    forward = walk("/orders", "next")
+    assert sum((ids for _, ids in forward), []) == list(range(12, 0, -1))
+    backward = walk(forward[-1][0], "prev")
+    assert [ids for _, ids in reversed(backward)] == [ids for _, ids in forward]
+
+    create_user(app, email="admin@example.com", is_admin=True)
+    admin = app.test_client()
+    login(admin, email="admin@example.com")
+    archived = admin.get("/admin/orders/3")
+    assert archived.status_code == 200
+    assert "Archived" in archived.get_data(as_text=True)
+    live = admin.get("/admin/orders/4").get_data(as_text=True)
+    assert "Archived" not in live and 'name="status"' in live
+    assert admin.get("/admin/orders/999").status_code == 404
+
+
+def test_deleting_a_user_removes_archived_orders(app, admin_client):
+    from app.archive import archive_orders
+
+    user_id = _history(app, 4)
+    with app.app_context():
+        archive_orders(datetime(2026, 1, 1), chunk_size=100)
+
+    admin_client.post(f"/admin/users/{user_id}/delete")
+    with app.app_context():
+        assert ArchivedOrder.query.count() == ArchivedOrderItem.query.count() == Order.query.count() == 0
+
+
+def test_new_orders_never_reuse_archived_ids(app, client):
+    from decimal import Decimal
+
+    from app.archive import archive_orders, find_order
+    from app.models import User
+
+    user_id = _history(app, 3)  # order 3, the newest, is completed
+    with app.app_context():
+        db.session.get(User, user_id).wallet_balance = Decimal("100.00")
+        db.session.commit()
+        assert archive_orders(datetime(2026, 1, 1), chunk_size=100) == 2  # orders 1 and 3
+
+    login(client, email="buyer@example.com")
+    client.post("/cart/add/1")
+    client.post("/checkout", data={"payment_method": "Wallet"})
+
+    with app.app_context():
+        placed = Order.query.order_by(Order.order_id.desc()).first()
+        assert placed.order_id == 4
+        assert min(i.order_item_id for i in placed.items) > max(i.order_item_id for i in ArchivedOrderItem.query)
+        assert find_order(3).archived and not find_order(4).archived
@@ -0,0 +1,46 @@
+import gzip
+import os
+
+import brotli
+
+from app import assets
+
+CSS = "body { color: #222; }\n" * 100
+
+
+def _build(app):
+    os.makedirs(os.path.join(app.static_folder, "css"))
+    with open(os.path.join(app.static_folder, "css", "base.css"), "w") as f:
+        f.write(CSS)
+    app.extensions["assets"] = assets.build(app.static_folder)
+    return app.extensions["assets"]["css/base.css"]
+
+
+def test_pages_link_fingerprinted_assets(app, client):
+    hashed = _build(app)
+    assert hashed.startswith("dist/css/base.") and hashed.endswith(".css")
+
+    html = client.get("/").get_data(as_text=True)
+    assert f'href="/static/{hashed}"' in html
+    # Files missing from the manifest keep their plain URL
+    assert 'href="/static/css/index.css"' in html
+
+
+def test_precompressed_variants_are_negotiated(app, client):
+    url = f"/static/{_build(app)}"
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.mimetype == "text/css"
+    assert brotli.decompress(response.data).decode() == CSS
+    assert "immutable" in response.headers["Cache-Control"]
+    assert "max-age=31536000" in response.headers["Cache-Control"]
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data).decode() == CSS
+
+    response = client.get(url)
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data(as_text=True) == CSS
@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+
+from app import create_app, db, password_hasher
+from app.models import User
+from app.passwords import HashingBusy
+from app.throttle import MemoryBuckets
+from tests.conftest import create_user, login
+
+
+@pytest.fixture()
+def throttled(app):
+    app.config.update(LOGIN_IP_BURST=6, LOGIN_ACCOUNT_BURST=3)
+    app.extensions["login_throttle"] = MemoryBuckets()
+    return app
+
+
+def _count_hashes(monkeypatch):
+    calls = []
+    import app.passwords as passwords
+
+    real = passwords.check_password_hash
+    monkeypatch.setattr(passwords, "check_password_hash", lambda *a: calls.append(1) or real(*a))
+    return calls
+
+
+def test_account_bucket_stops_guessing_before_hashing(throttled, client, monkeypatch):
+    create_user(throttled)
+    hashes = _count_hashes(monkeypatch)
+
+    for _ in range(3):
+        assert login(client, password="wrong").status_code == 200
+    response = login(client, password="wrong")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert len(hashes) == 3  # the refused attempt never reached the hasher
+
+    # Even the right password waits for the bucket to refill
+    assert login(client).status_code == 429
+
+
+def test_ip_bucket_spans_accounts_and_success_refills(throttled, client):
+    create_user(throttled)
+    for i in range(2):
+        login(client, password="wrong")
+    assert login(client).status_code == 302  # refills user@example.com's bucket
+    client.get("/logout")
+
+    # Spraying other accounts from the same address runs out of the IP bucket
+    statuses = [login(client, email=f"nobody{i}@example.com").status_code for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+    # Another address still gets through
+    other = throttled.test_client()
+    other.environ_base["REMOTE_ADDR"] = "203.0.113.9"
+    assert login(other).status_code == 302
+
+
+def test_login_upgrades_old_hashes(app, client):
+    user_id = create_user(app)  # pbkdf2:sha256:1000
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+
+    assert login(client).status_code == 302
+    with app.app_context():
+        upgraded = db.session.get(User, user_id).password_hash
+    assert upgraded.startswith("pbkdf2:sha256:2000$")
+
+    client.get("/logout")
+    assert login(client).status_code == 302
+    with app.app_context():
+        assert db.session.get(User, user_id).password_hash == upgraded  # no further rehash
+
+
+def test_full_hashing_queue_answers_503(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "ASSETS_FINGERPRINT": False,
+        "PASSWORD_HASH_WORKERS": 1,
+        "PASSWORD_HASH_QUEUE_LIMIT": 0,
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+    })
+    app.static_folder = str(tmp_path / "static")
+    with app.app_context():
+        db.create_all()
+    create_user(app)
+
+    release = threading.Event()
+    with app.app_context():
+        # Occupy the only slot, then try to log in
+        pool, slots = password_hasher._pool(app.config)
+        assert slots.acquire(blocking=False)
+        pool.submit(release.wait)
+        with pytest.raises(HashingBusy):
+            password_hasher.verify("pbkdf2:sha256:1000$x$y", "secret")
+
+    response = login(app.test_client())
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    release.set()
+    slots.release()
+    assert login(app.test_client()).status_code == 302
+
+
+def test_ip_bucket_uses_the_client_address_behind_a_proxy(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "ASSETS_FINGERPRINT": False,
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "PASSWORD_HASH_WORKERS": 0,
+        "TRUSTED_PROXIES": 1,
+        "LOGIN_IP_BURST": 3,
+    })
+    app.static_folder = str(tmp_path / "static")
+    with app.app_context():
+        db.create_all()
+    create_user(app)
+
+    def via_proxy(client_addr):
+        client = app.test_client()
+        client.environ_base.update(REMOTE_ADDR="10.0.0.2", HTTP_X_FORWARDED_FOR=client_addr)
+        return client
+
+    attacker = via_proxy("198.51.100.7")
+    statuses = [login(attacker, email=f"nobody{i}@example.com").status_code for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    # Another visitor behind the same proxy has a bucket of their own
+    assert login(via_proxy("203.0.113.9")).status_code == 302
+
+
+def test_forwarded_addresses_are_ignored_without_trusted_proxies(throttled):
+    spoofer = throttled.test_client()
+    statuses = []
+    for i in range(7):
+        spoofer.environ_base["HTTP_X_FORWARDED_FOR"] = f"198.51.100.{i}"  # a new one each time
+        statuses.append(login(spoofer, email=f"nobody{i}@example.com").status_code)
+    assert statuses[-1] == 429
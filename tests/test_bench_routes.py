@@ -0,0 +1,47 @@
+import copy
+
+import pytest
+
+import json
+import os
+
+from benchmarks.bench_routes import SCENARIOS, compare, uncovered
+
+BASELINE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks", "baseline.json")
+
+
+def test_every_route_has_a_scenario(app):
+    assert uncovered(app) == []
+
+
+def test_baseline_covers_every_scenario_without_errors():
+    # Regenerate it (--output) whenever a scenario is added or a route's queries change
+    with open(BASELINE) as f:
+        routes = json.load(f)["routes"]
+    assert sorted(routes) == sorted(s.name for s in SCENARIOS)
+    assert {name: r["statuses"] for name, r in routes.items() if r["errors"]} == {}
+
+
+def _results(p50, queries, throughput=100.0):
+    return {
+        "meta": {"dataset": {"products": 10, "users": 2, "orders": 5, "carts": 1}},
+        "routes": {"main.index": {"p50_ms": p50, "queries": queries, "errors": 0}},
+        "load": {"throughput_rps": throughput, "p95_ms": 20.0},
+    }
+
+
+def test_compare_flags_regressions_beyond_the_noise(capsys):
+    baseline = _results(p50=10.0, queries=2)
+
+    assert compare(_results(p50=12.0, queries=2), baseline, tolerance=0.25, min_ms=1.0) == []
+    assert compare(_results(p50=1.4, queries=2), _results(p50=1.0, queries=2), 0.25, min_ms=1.0) == []
+    assert compare(_results(p50=13.0, queries=2), baseline, 0.25, 1.0) == ["main.index: slower"]
+    assert compare(_results(p50=9.0, queries=3), baseline, 0.25, 1.0) == ["main.index: more queries"]
+    assert compare(_results(p50=10.0, queries=2, throughput=60.0), baseline, 0.25, 1.0) == [
+        "load: lower throughput"
+    ]
+
+    other = copy.deepcopy(baseline)
+    other["meta"]["dataset"]["orders"] = 50
+    with pytest.raises(SystemExit):
+        compare(_results(p50=10.0, queries=2), other, 0.25, 1.0)
@@ -0,0 +1,127 @@
+import threading
+import time
+
+from app import catalog_cache
+from app.cache import MISS, FileSystemBackend, MemoryBackend, RedisBackend
+from tests.conftest import add_products
+
+
+class _FakeRedisClient:
+    """Minimal in-process stand-in speaking the subset of the Redis API we use."""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False, px=None):
+        with self.lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+            return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def incr(self, key):
+        with self.lock:
+            value = int(self.data.get(key, b"0")) + 1
+            self.data[key] = str(value).encode()
+            return value
+
+
+def test_memory_backend_lru_and_ttl():
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")  # touch so "b" is least recently used
+    backend.set("c", 3)
+    assert backend.get("b") is MISS
+    assert backend.get("a") == 1
+
+    backend.set("short", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get("short") is MISS
+
+
+def test_filesystem_and_redis_backends_round_trip(tmp_path):
+    for backend in (FileSystemBackend(str(tmp_path)), RedisBackend(_FakeRedisClient())):
+        assert backend.get("k") is MISS
+        backend.set("k", {"v": [1, 2]}, ttl=60)
+        assert backend.get("k") == {"v": [1, 2]}
+        backend.set("none", None)
+        assert backend.get("none") is None
+        assert backend.incr("gen") == 1
+        assert backend.get_counter("gen") == 1
+        backend.delete("k")
+        assert backend.get("k") is MISS
+
+
+def test_single_flight_loads_cold_key_once(app):
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+
+    def worker():
+        with app.app_context():
+            results.append(catalog_cache.get_or_set("cold", slow_loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["value"] * 50
+    assert len(calls) == 1
+
+
+def test_catalog_cached_until_admin_edit(app, admin_client):
+    from app import db
+    from app.models import Product
+
+    add_products(app, 3)
+    assert "Product 000" in admin_client.get("/product/1").get_data(as_text=True)
+
+    # A write that bypasses the admin routes is not seen: the page comes from cache.
+    with app.app_context():
+        db.session.get(Product, 1).name = "Renamed Directly"
+        db.session.commit()
+    assert "Renamed Directly" not in admin_client.get("/product/1").get_data(as_text=True)
+
+    response = admin_client.post(
+        "/admin/products/1/edit",
+        data={
+            "name": "Renamed By Admin",
+            "category": "watch",
+            "price": "12.00",
+            "stock_level": "4",
+            "description": "Updated.",
+        },
+    )
+    assert response.status_code == 302
+    assert "Renamed By Admin" in admin_client.get("/product/1").get_data(as_text=True)
+    assert "Renamed By Admin" in admin_client.get("/products").get_data(as_text=True)
+
+
+def test_filesystem_backend_stays_bounded(app, tmp_path):
+    backend = FileSystemBackend(str(tmp_path), max_entries=3)
+    for i in range(10):  # e.g. a crawler walking distinct page cursors
+        backend.set(f"page:{i}", i)
+    assert len(list(tmp_path.glob("*.cache"))) == 3
+
+    # Moving to a new generation deletes the old one's files; the counter survives
+    app.extensions["catalog_cache"].backend = backend
+    with app.app_context():
+        catalog_cache.get_or_set("page:x", lambda: "x")
+        catalog_cache.invalidate()
+        assert list(tmp_path.glob("*.cache")) == []
+        assert catalog_cache.get_or_set("page:x", lambda: "fresh") == "fresh"
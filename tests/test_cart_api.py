@@ -0,0 +1,106 @@
+from app.models import CartItem
+from tests.conftest import QueryCounter, add_products, create_user, login
+
+
+def _client(app, client):
+    create_user(app)
+    login(client)
+    add_products(app, 5)  # prices 10..14, stock 10
+    return client
+
+
+def test_batch_applies_all_ops_and_returns_summary(app, client):
+    client = _client(app, client)
+    ops = [
+        {"op": "add", "prod_id": 1},
+        {"op": "add", "prod_id": 1, "qty": 2},
+        {"op": "add", "prod_id": 2, "qty": 4},
+        {"op": "set", "prod_id": 2, "qty": 50},  # capped at stock
+        {"op": "add", "prod_id": 3},
+        {"op": "remove", "prod_id": 3},
+    ]
+    response = client.post("/cart/api/batch", json={"ops": ops})
+    assert response.status_code == 200
+    data = response.get_json()
+
+    cart = data["cart"]
+    assert [(line["prod_id"], line["qty"]) for line in cart["lines"]] == [(1, 3), (2, 10)]
+    assert cart["item_count"] == 13
+    assert cart["subtotal"] == "140.00"  # 3 x 10 + 10 x 11
+    assert cart["shipping"] == "0.00"
+    assert cart["grand_total"] == "140.00"
+    assert data["warnings"] == ["Only 10 of Product 001 in stock."]
+
+    with app.app_context():
+        assert CartItem.query.count() == 2
+
+
+def test_batch_cost_does_not_grow_with_ops(app, client):
+    client = _client(app, client)
+    once = [{"op": "add", "prod_id": prod_id} for prod_id in range(1, 6)]
+    with QueryCounter(app) as small:
+        client.post("/cart/api/batch", json={"ops": once})
+    with QueryCounter(app) as large:
+        client.post("/cart/api/batch", json={"ops": once * 10})
+    # Ten times the operations, same statements: the batch is applied in memory
+    assert large.count <= small.count
+
+
+def test_malformed_batch_changes_nothing(app, client):
+    client = _client(app, client)
+    ops = [{"op": "add", "prod_id": 1}, {"op": "set", "prod_id": 2, "qty": -1}]
+    response = client.post("/cart/api/batch", json={"ops": ops})
+    assert response.status_code == 400
+    assert "Operation 1" in response.get_json()["error"]
+    with app.app_context():
+        assert CartItem.query.count() == 0
+
+    # Plain form posts are refused, so other sites can't drive the cart
+    assert client.post("/cart/api/batch", data={"ops": "x"}).status_code == 415
+
+
+def test_cart_page_renders_summary(app, client):
+    client = _client(app, client)
+    client.post("/cart/api/batch", json={"ops": [{"op": "set", "prod_id": 4, "qty": 2}]})
+    html = client.get("/cart").get_data(as_text=True)
+    assert 'data-prod-id="4"' in html
+    assert "£26.00" in html  # 2 x 13
+    assert "£31.00" in html  # plus £5 shipping
+
+
+def _cart_queries(counter):
+    return [s for s in counter.statements if "cart_item" in s]
+
+
+def test_cart_page_is_one_query_for_any_number_of_lines(app, client):
+    create_user(app)
+    login(client)
+    add_products(app, 20)
+    counts = []
+    for prod_ids in (range(1, 3), range(1, 21)):
+        client.post("/cart/api/batch", json={"ops": [{"op": "set", "prod_id": p, "qty": 1} for p in prod_ids]})
+        with QueryCounter(app) as counter:
+            assert client.get("/cart").status_code == 200
+        counts.append(counter.count)
+        assert len(_cart_queries(counter)) == 1
+    assert counts[0] == counts[1]
+
+
+def test_navbar_badge_is_cached_until_the_cart_changes(app, client):
+    client = _client(app, client)
+    client.post("/cart/api/batch", json={"ops": [{"op": "add", "prod_id": 1, "qty": 3}]})
+
+    with QueryCounter(app) as counter:
+        html = client.get("/products").get_data(as_text=True)
+    assert "data-cart-count>3</span>" in html
+    assert _cart_queries(counter) == []
+
+    # The same account changes its cart from another device
+    other = app.test_client()
+    login(other)
+    other.post("/cart/add/2")
+
+    with QueryCounter(app) as counter:
+        html = client.get("/products").get_data(as_text=True)
+    assert "data-cart-count>4</span>" in html
+    assert len(_cart_queries(counter)) == 1
@@ -0,0 +1,93 @@
+import threading
+import time
+from decimal import Decimal
+
+from app import create_app, db
+from app.models import CartItem, Order, Product, User
+from tests.conftest import create_user, login
+
+BUYERS = 40
+STOCK = 15
+
+
+def _file_app(tmp_path):
+    # A real file database: in-memory SQLite shares one connection between threads,
+    # which would serialise the checkouts and hide any race.
+    app = create_app(
+        {
+            "TESTING": True,
+            "WTF_CSRF_ENABLED": False,
+            # Every buyer logs in from the same address, with a cheap test hash
+            "LOGIN_THROTTLE_BACKEND": "null",
+            "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'stress.db'}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {
+                "connect_args": {"timeout": 30, "check_same_thread": False},
+                "pool_size": BUYERS,
+            },
+        }
+    )
+    with app.app_context():
+        db.create_all()
+        db.session.add(
+            Product(
+                name="Hot Watch",
+                sku="watch_hot",
+                desc="Everybody wants one.",
+                price=Decimal("50.00"),
+                stock_level=STOCK,
+                category="watch",
+            )
+        )
+        db.session.commit()
+    return app
+
+
+def test_concurrent_checkouts_never_oversell(tmp_path, capsys):
+    """Many buyers race for one hot product: exactly STOCK orders, stock never negative."""
+    app = _file_app(tmp_path)
+
+    clients = []
+    for i in range(BUYERS):
+        email = f"buyer{i}@example.com"
+        create_user(app, email=email, wallet_balance=Decimal("100.00"))
+        client = app.test_client()
+        login(client, email=email)
+        client.post("/cart/add/1")
+        clients.append(client)
+
+    barrier = threading.Barrier(BUYERS)
+    failures = []
+
+    def buy(client):
+        barrier.wait()
+        response = client.post("/checkout", data={"payment_method": "Wallet"})
+        if response.status_code != 302:
+            failures.append(response.status_code)
+
+    threads = [threading.Thread(target=buy, args=(c,)) for c in clients]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    assert not failures
+    with app.app_context():
+        orders = Order.query.count()
+        stock = db.session.get(Product, 1).stock_level
+        spent = sum(
+            Decimal("100.00") - u.wallet_balance
+            for u in User.query.all()
+        )
+        assert stock == 0
+        assert orders == STOCK
+        # Every order paid exactly once (50.00 + 5.00 shipping), nobody else charged
+        assert spent == orders * Decimal("55.00")
+        # Losers keep their basket so they can try again later
+        assert CartItem.query.count() == BUYERS - STOCK
+
+    with capsys.disabled():
+        print(f"\n{BUYERS} concurrent checkouts in {elapsed:.3f}s "
+              f"({BUYERS / elapsed:.1f} checkouts/s, {orders / elapsed:.1f} orders/s)")
@@ -0,0 +1,58 @@
+from sqlalchemy import text
+
+from app import create_app, db
+from app.database import engine_options
+
+
+def _app(tmp_path, profile=None, **config):
+    return create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",
+                       "ASSETS_FINGERPRINT": False, **config}, config_name=profile)
+
+
+def test_sqlite_connections_get_the_pragmas(tmp_path):
+    app = _app(tmp_path, SQLITE_BUSY_TIMEOUT_MS=1234)
+    with app.app_context():
+        pragma = lambda name: db.session.execute(text(f"PRAGMA {name}")).scalar()  # noqa: E731
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 1234
+        assert pragma("mmap_size") == app.config["SQLITE_MMAP_SIZE"]
+
+
+def test_mysql_gets_a_tuned_pool_and_explicit_options_win(app):
+    config = dict(app.config, SQLALCHEMY_DATABASE_URI="mysql://shop:secret@db/shop",
+                  SQLALCHEMY_ENGINE_OPTIONS={"pool_size": 3})
+    options = engine_options(config)
+    assert options == {
+        "pool_size": 3,
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_pre_ping": True,
+    }
+
+
+def test_profiles(tmp_path):
+    assert _app(tmp_path).config["CONFIG_PROFILE"] == "testing"
+    production = _app(tmp_path, profile="production")
+    assert (production.config["CONFIG_PROFILE"], production.debug) == ("production", False)
+    development = _app(tmp_path, profile="development")
+    assert development.debug and development.config["DB_POOL_SIZE"] == 5
+
+
+def test_production_is_the_default_profile(tmp_path, monkeypatch):
+    import config
+
+    monkeypatch.delenv("FLASK_CONFIG", raising=False)
+    monkeypatch.setattr(config.Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(config.Config, "ASSETS_FINGERPRINT", False)
+    app = create_app()
+    assert (app.config["CONFIG_PROFILE"], app.debug) == ("production", False)
+
+
+def test_startup_logs_effective_settings(tmp_path, caplog):
+    with caplog.at_level("INFO"):
+        _app(tmp_path, LOG_LEVEL="INFO", profile="production")
+    message = next(r.getMessage() for r in caplog.records if r.name == "app" and "Database" in r.getMessage())
+    assert "[production profile]" in message
+    assert "journal_mode=wal" in message and "busy_timeout=5000" in message
@@ -0,0 +1,95 @@
+from sqlalchemy import update
+
+from app import db, stats
+from app.models import Order
+from tests.conftest import QueryCounter, add_orders, add_products, create_user, login
+
+JSON = {"Accept": "application/json"}
+
+
+def _orders(app, count=6):
+    add_products(app, 3)
+    customer = create_user(app, email="buyer@example.com")
+    add_orders(app, customer, count)  # hourly from 2025-01-01 00:00
+    with app.app_context():
+        return [o.order_id for o in Order.query.order_by(Order.order_id)]
+
+
+def _statuses(app):
+    with app.app_context():
+        return [o.status for o in Order.query.order_by(Order.order_id)]
+
+
+def _set(app, ids, status):
+    with app.app_context():
+        db.session.execute(update(Order).where(Order.order_id.in_(ids)).values(status=status))
+        db.session.commit()
+
+
+def test_bulk_update_ticked_orders(app, admin_client):
+    """Ticked orders move in one UPDATE; orders that can't move are reported."""
+    ids = _orders(app)
+    _set(app, ids[:2], "pending")
+    _set(app, ids[2:3], "Processing")  # the old spelling
+    _set(app, ids[3:4], "cancelled")
+
+    with QueryCounter(app) as queries:
+        response = admin_client.post("/admin/orders/bulk_status", headers=JSON,
+                                     data={"status": "processing", "order_ids": ids[:4]})
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "processing", "updated": {"pending": 2, "processing": 1},
+                                   "skipped": {"cancelled": 1}}
+    assert sum(s.lstrip().upper().startswith("UPDATE") for s in queries.statements) == 1
+    assert _statuses(app) == ["processing"] * 3 + ["cancelled"] + ["processing"] * 2
+
+
+def test_bulk_update_by_filter(app, admin_client):
+    """A status and date filter selects the orders; completing them counts their revenue."""
+    ids = _orders(app, 30)  # 2025-01-01 00:00 .. 2025-01-02 05:00
+    _set(app, ids, "shipped")
+
+    response = admin_client.post("/admin/orders/bulk_status", data={
+        "status": "completed", "from_status": "shipped", "date_from": "2025-01-01", "date_to": "2025-01-01",
+    }, follow_redirects=True)
+    assert "24 order(s) marked completed." in response.get_data(as_text=True)
+    assert _statuses(app) == ["completed"] * 24 + ["shipped"] * 6
+    with app.app_context():
+        assert stats.read_stats()[stats.COMPLETED_REVENUE] == 24 * 35
+
+
+def test_bulk_update_rejects_bad_requests(app, admin_client):
+    ids = _orders(app, 2)
+
+    # Not a status
+    response = admin_client.post("/admin/orders/bulk_status", headers=JSON,
+                                 data={"status": "lost", "order_ids": ids})
+    assert response.status_code == 400
+    # Nothing selected at all
+    response = admin_client.post("/admin/orders/bulk_status", headers=JSON, data={"status": "shipped"})
+    assert response.status_code == 400
+    assert _statuses(app) == ["processing", "processing"]
+
+    # Non-admins don't get to try
+    create_user(app, email="shopper@example.com")
+    shopper = app.test_client()
+    login(shopper, email="shopper@example.com")
+    response = shopper.post("/admin/orders/bulk_status", data={"status": "shipped", "order_ids": ids})
+    assert response.status_code == 302
+    assert _statuses(app) == ["processing", "processing"]
+
+
+def test_single_update_stores_lower_case(app, admin_client):
+    ids = _orders(app, 1)
+    admin_client.post(f"/admin/orders/{ids[0]}/update_status", data={"status": "Shipped"})
+    assert _statuses(app) == ["shipped"]
+
+
+def test_admin_flash_categories_map_to_alert_styles(admin_client):
+    with admin_client.session_transaction() as session:
+        session["_flashes"] = [("message", "plain"), ("error", "broken"), ("success", "done")]
+
+    html = admin_client.get("/admin/orders").get_data(as_text=True)
+    assert "alert-message" not in html and "alert-error" not in html
+    assert html.count("alert alert-info") == 1
+    assert html.count("alert alert-danger") == 1
+    assert html.count("alert alert-success") == 1
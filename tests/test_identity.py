@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from app import db
+from app.models import User
+from tests.conftest import QueryCounter, add_products, create_user, login
+
+
+def _user_queries(counter):
+    return [s for s in counter.statements if "FROM user" in s]
+
+
+def test_authenticated_requests_reuse_the_cached_user(app, client):
+    create_user(app)
+    login(client)
+    client.get("/wallet/")
+
+    with QueryCounter(app) as counter:
+        assert client.get("/wallet/").status_code == 200
+    assert _user_queries(counter) == []
+
+
+def test_wallet_top_up_shows_the_new_balance(app, client):
+    user_id = create_user(app, wallet_balance=Decimal("5.00"))
+    login(client)
+    assert "5.00" in client.get("/wallet/").get_data(as_text=True)
+
+    client.post("/wallet/topup", data={"amount": "20"})
+    assert "25.00" in client.get("/wallet/").get_data(as_text=True)
+    with app.app_context():
+        assert db.session.get(User, user_id).wallet_balance == Decimal("25.00")
+
+
+def test_top_up_keeps_a_debit_made_by_another_worker(app, client):
+    from sqlalchemy import update
+
+    user_id = create_user(app, wallet_balance=Decimal("100.00"))
+    login(client)
+    client.get("/wallet/")  # this worker now holds a snapshot with 100.00
+
+    # A checkout served by another worker process debits the wallet; its
+    # identity_cache.forget() only reaches that worker's own cache
+    with app.app_context():
+        db.session.execute(update(User).where(User.user_id == user_id).values(wallet_balance=Decimal("45.00")))
+        db.session.commit()
+
+    client.post("/wallet/topup", data={"amount": "10"})
+    with app.app_context():
+        assert db.session.get(User, user_id).wallet_balance == Decimal("55.00")
+    assert "55.00" in client.get("/wallet/").get_data(as_text=True)
+
+
+def test_admin_changes_apply_on_the_next_request(app, client, admin_client):
+    user_id = create_user(app)
+    other = app.test_client()
+    login(other)
+    assert other.get("/wallet/").status_code == 200
+
+    # Promoting the user through the ORM drops the cached copy
+    with app.app_context():
+        db.session.get(User, user_id).is_admin = True
+        db.session.commit()
+    assert other.get("/admin").status_code == 200
+
+    # So does deleting them: the old session no longer authenticates
+    admin_client.post(f"/admin/users/{user_id}/delete")
+    response = other.get("/wallet/")
+    assert response.status_code == 302
+    assert "/login" in response.headers["Location"]
+
+
+def test_cart_changes_reach_the_cached_user(app, client):
+    create_user(app)
+    login(client)
+    add_products(app, 2)
+    client.get("/products")
+
+    client.post("/cart/add/1")
+    assert "data-cart-count>1</span>" in client.get("/products").get_data(as_text=True)
+    client.post("/cart/add/2")
+    assert "data-cart-count>2</span>" in client.get("/products").get_data(as_text=True)
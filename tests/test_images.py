@@ -0,0 +1,113 @@
+import io
+import json
+import os
+
+from PIL import Image
+
+from app import db
+from app.models import Product
+
+
+def _png(size=(1600, 1000)):
+    data = io.BytesIO()
+    Image.new("RGBA", size, (200, 30, 30, 128)).save(data, "PNG")
+    data.seek(0)
+    return data
+
+
+def _add_product(client, name, image):
+    return client.post(
+        "/admin/products",
+        data={
+            "name": name,
+            "category": "watch",
+            "price": "99.00",
+            "stock_level": "3",
+            "description": "A test product",
+            "image": (image, "photo.png"),
+            "submit": "single",
+        },
+        content_type="multipart/form-data",
+    )
+
+
+def test_uploads_are_deduplicated_and_resized(app, admin_client):
+    assert _add_product(admin_client, "First", _png()).status_code == 302
+    assert _add_product(admin_client, "Second", _png()).status_code == 302
+
+    with app.app_context():
+        urls = {p.image_url for p in Product.query}
+    assert len(urls) == 1  # same bytes, same stored file
+    image_url = urls.pop()
+
+    uploads = os.path.join(app.static_folder, "uploads", "products")
+    originals = [f for f in os.listdir(uploads) if os.path.isfile(os.path.join(uploads, f))]
+    assert originals == [os.path.basename(image_url)]
+
+    stem = os.path.splitext(os.path.basename(image_url))[0]
+    derived = os.path.join(uploads, "derived")
+    with open(os.path.join(derived, f"{stem}.json")) as f:
+        assert json.load(f) == {"thumb": 160, "card": 480, "detail": 1200}
+    for variant, width in (("thumb", 160), ("card", 480), ("detail", 1200)):
+        for ext in ("jpg", "webp"):
+            with Image.open(os.path.join(derived, f"{stem}-{variant}.{ext}")) as img:
+                assert img.width == width
+    # Listing pages fetch the card variant, a fraction of the original's size
+    card = os.path.getsize(os.path.join(derived, f"{stem}-card.webp"))
+    assert card < os.path.getsize(os.path.join(app.static_folder, image_url)) / 4
+
+
+def test_listing_emits_srcset_once_derivatives_exist(app, admin_client):
+    _add_product(admin_client, "Resized", _png())
+    with app.app_context():
+        # An imported row pointing at an image nobody has resized yet
+        db.session.add(
+            Product(name="Legacy", sku="watch_legacy", desc="Old stock", price=10, stock_level=1,
+                    category="watch", image_url="uploads/products/legacy.jpg")
+        )
+        db.session.commit()
+
+    html = admin_client.get("/products").get_data(as_text=True)
+    assert 'type="image/webp"' in html
+    assert "-card.webp 480w" in html and "-detail.jpg 1200w" in html
+    assert 'src="/static/uploads/products/legacy.jpg"' in html
+
+
+def test_missing_manifests_are_not_reread_on_every_render(app, monkeypatch):
+    from app import images
+
+    image_url = "uploads/products/pending.jpg"
+    manifest = os.path.join(app.static_folder, images.manifest_url(image_url))
+    with app.test_request_context():
+        assert images.product_image(image_url) is None
+
+        # Built by another worker process: seen once the retry interval is up
+        os.makedirs(os.path.dirname(manifest), exist_ok=True)
+        with open(manifest, "w") as f:
+            json.dump({"thumb": 160, "card": 480, "detail": 1200}, f)
+        assert images.product_image(image_url) is None
+        now = images.time.monotonic()
+        monkeypatch.setattr(images.time, "monotonic", lambda: now + images.MANIFEST_RETRY_SECONDS)
+        assert images.product_image(image_url).srcset().endswith("1200w")
+
+
+def test_failed_upload_leaves_no_temp_file(app):
+    from werkzeug.datastructures import FileStorage
+
+    from app.images import UPLOAD_DIR, store_upload
+
+    class _Dropped(io.RawIOBase):
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            raise OSError("connection reset")
+
+    with app.test_request_context():
+        try:
+            store_upload(FileStorage(stream=_Dropped(), filename="photo.png"))
+        except OSError:
+            pass
+        else:
+            raise AssertionError("the failed read was swallowed")
+    assert os.listdir(os.path.join(app.static_folder, UPLOAD_DIR)) == []
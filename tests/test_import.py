@@ -0,0 +1,70 @@
+import io
+
+from app.models import ImportJob, Product
+
+HEADER = "name,category,price,stock_level,description,image_url\n"
+
+
+def _csv(rows):
+    return io.BytesIO((HEADER + "".join(rows)).encode("utf-8"))
+
+
+def _upload(client, data, background=False):
+    form = {"csv_file": (data, "products.csv"), "submit": "batch"}
+    if background:
+        form["background"] = "y"
+    return client.post("/admin/products", data=form, content_type="multipart/form-data")
+
+
+def test_import_in_chunks_with_error_report(app, admin_client):
+    app.config["IMPORT_CHUNK_SIZE"] = 7
+    rows = [f"Bag {i},handbag,{10 + i}.50,{i},Nice bag,uploads/products/item_01.jpg\n" for i in range(40)]
+    rows.insert(5, "Broken,handbag,free,3,,\n")
+    rows.insert(9, "Odd,shoe,10,3,,\n")
+    rows.insert(12, "Remote image,watch,10,3,,http://example.com/x.jpg\n")
+
+    response = _upload(admin_client, _csv(rows))
+    assert response.status_code == 302
+
+    with app.app_context():
+        job = ImportJob.query.one()
+        assert job.status == "done"
+        assert job.rows_processed == 43
+        assert job.rows_imported == 41  # bad image path imports without the image
+        assert job.rows_with_errors == 3
+        skus = [p.sku for p in Product.query.order_by(Product.prod_id)]
+        assert len(set(skus)) == 41
+        assert skus[0] == "handbag_1"
+
+    report = admin_client.get(f"/admin/imports/{job.job_id}/errors.csv").get_data(as_text=True)
+    lines = report.strip().splitlines()
+    assert lines[0].startswith("row,error")
+    assert lines[1].startswith("7,Invalid price 'free'")
+    assert "Invalid category 'shoe'" in report
+    assert "image_url must be in uploads/products/" in report
+
+    # Single adds continue the same SKU sequence
+    admin_client.post(
+        "/admin/products",
+        data={"name": "One", "category": "watch", "price": "5", "stock_level": "1", "submit": "single"},
+    )
+    with app.app_context():
+        assert Product.query.filter_by(name="One").one().sku == "watch_42"
+
+
+def test_background_import_reports_progress(app, admin_client, monkeypatch):
+    import app.admin.routes as routes
+    from app.admin.importer import submit_import
+
+    futures = []
+    monkeypatch.setattr(routes, "submit_import", lambda job_id: futures.append(submit_import(job_id)))
+
+    rows = [f"Watch {i},watch,99.00,2,,\n" for i in range(25)]
+    response = _upload(admin_client, _csv(rows), background=True)
+    assert response.status_code == 302
+    assert "/admin/imports/" in response.headers["Location"]
+
+    futures[0].result(timeout=10)
+    page = admin_client.get(response.headers["Location"]).get_data(as_text=True)
+    assert "Done" in page
+    assert "<strong>Products imported:</strong> 25" in page
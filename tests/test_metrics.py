@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+import textwrap
+from decimal import Decimal
+
+from prometheus_client import REGISTRY
+
+from app import create_app, db
+from tests.conftest import add_products, create_user, login
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_timed_and_counted(app, client):
+    labels = {"blueprint": "main", "endpoint": "main.product_list", "method": "GET"}
+    before = _sample("http_requests_total", status="200", **labels)
+    observed = _sample("http_request_duration_seconds_count", **labels)
+
+    client.get("/products")
+    client.get("/products")
+    client.get("/no-such-page")
+
+    assert _sample("http_requests_total", status="200", **labels) == before + 2
+    assert _sample("http_request_duration_seconds_count", **labels) == observed + 2
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'http_requests_total{blueprint="",endpoint="(unmatched)",method="GET",status="404"}' in body
+    assert 'email_outbox_messages{status="pending"} 0.0' in body
+
+
+def test_checkout_outcomes(app, client):
+    create_user(app, wallet_balance=Decimal("100.00"))
+    add_products(app, 1)
+    login(client)
+    placed, rejected = _sample("checkouts_total", outcome="placed"), _sample("checkouts_total", outcome="rejected")
+
+    client.post("/cart/add/1")
+    client.post("/checkout", data={"payment_method": "Wallet"})
+    client.post("/checkout", data={"payment_method": "Wallet"})  # the basket is empty now
+
+    assert _sample("checkouts_total", outcome="placed") == placed + 1
+    assert _sample("checkouts_total", outcome="rejected") == rejected + 1
+    # The confirmation email waits in the outbox
+    assert 'email_outbox_messages{status="pending"} 1.0' in client.get("/metrics").get_data(as_text=True)
+
+
+def test_token_and_pool_gauges(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",  # a QueuePool
+        "ASSETS_FINGERPRINT": False,
+        "METRICS_TOKEN": "s3cret",
+    })
+    app.static_folder = str(tmp_path / "static")
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert 'db_pool_checked_out{bind="default"}' in body
+    assert 'db_pool_overflow{bind="default"}' in body
+
+
+WORKER = textwrap.dedent("""
+    import sys
+    from app import create_app, db
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///%s", "ASSETS_FINGERPRINT": False})
+    app.static_folder = %r
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    for _ in range(int(sys.argv[1])):
+        client.get("/")
+    sys.stdout.write(client.get("/metrics").get_data(as_text=True))
+""")
+
+
+def test_workers_are_added_up_through_the_shared_directory(tmp_path):
+    shared = tmp_path / "metrics"
+    shared.mkdir()
+    script = WORKER % (tmp_path / "app.db", str(tmp_path / "static"))
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(shared)}
+
+    def worker(requests):
+        return subprocess.run([sys.executable, "-c", script, str(requests)], cwd=ROOT, env=env,
+                              capture_output=True, text=True, check=True).stdout
+
+    worker(3)
+    worker(4)
+    body = worker(0)  # a third process serves /metrics for all of them
+    assert len(list(shared.glob("counter_*.db"))) == 2  # one file per process that counted something
+    assert 'http_requests_total{blueprint="main",endpoint="main.index",method="GET",status="200"} 7.0' in body
@@ -0,0 +1,75 @@
+import os
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import upgrade
+from sqlalchemy import inspect, text
+
+from app import create_app, db
+from app.main.search import search_products
+from app.models import CartItem, Order
+from tests.conftest import add_orders, add_products, create_user
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+NEW_INDEXES = ("ix_cart_item_prod_id", "uq_cart_item_user_prod", "ix_order_date", "ix_order_status_date",
+               "ix_order_user_date", "ix_order_item_order_id", "ix_product_category_price",
+               "ix_product_name", "ix_product_price")
+
+
+def _file_app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",
+        "ASSETS_FINGERPRINT": False,
+    })
+    app.static_folder = str(tmp_path / "static")
+    return app
+
+
+def _schema_drift(app):
+    with app.app_context(), db.engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={
+            "include_name": lambda name, type_, parents: not (type_ == "table" and name.startswith("product_fts")),
+        })
+        return compare_metadata(context, db.metadata)
+
+
+def test_migrations_build_the_models_schema(tmp_path):
+    app = _file_app(tmp_path)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+    assert _schema_drift(app) == []
+
+    # Triggers from the baseline keep the search index in step
+    add_products(app, 3)
+    with app.app_context():
+        assert len(search_products("product").items) == 3
+
+
+def test_upgrade_adopts_a_create_all_database(tmp_path):
+    app = _file_app(tmp_path)
+    with app.app_context():
+        db.create_all()
+        for name in NEW_INDEXES:
+            db.session.execute(text(f"DROP INDEX {name}"))
+        db.session.commit()
+    user_id = create_user(app)
+    add_products(app, 2)
+    with app.app_context():
+        # Duplicate lines that the old schema allowed
+        db.session.add_all([CartItem(user_id=user_id, prod_id=1, qty=2),
+                            CartItem(user_id=user_id, prod_id=1, qty=3),
+                            CartItem(user_id=user_id, prod_id=2, qty=1)])
+        db.session.commit()
+    add_orders(app, user_id, 2)
+    with app.app_context():
+        Order.query.first().status = "Processing"  # the old default spelling
+        db.session.commit()
+
+        upgrade(directory=MIGRATIONS)
+
+        lines = sorted((i.prod_id, i.qty) for i in CartItem.query)
+        assert lines == [(1, 5), (2, 1)]
+        assert {o.status for o in Order.query} == {"processing"}
+        indexes = {ix["name"] for ix in inspect(db.engine).get_indexes("cart_item")}
+        assert "uq_cart_item_user_prod" in indexes
+    assert _schema_drift(app) == []
@@ -0,0 +1,121 @@
+import socketserver
+import threading
+
+import pytest
+
+from app import create_app, db
+from app.models import EmailOutbox
+from app.outbox import drain
+from app.tasks import send_welcome_email
+
+
+class _DebugSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib to deliver messages to a list."""
+
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost debugging server")
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            verb = line.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif verb == "DATA":
+                self.reply("354 end with <CRLF>.<CRLF>")
+                data = []
+                while (chunk := self.rfile.readline().decode()) != ".\r\n":
+                    data.append(chunk)
+                self.server.messages.append("".join(data))
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+@pytest.fixture()
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _DebugSMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _mail_app(port):
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "MAIL_SERVER": "127.0.0.1",
+            "MAIL_PORT": port,
+            "MAIL_USE_TLS": False,
+            "MAIL_USERNAME": None,
+            "MAIL_PASSWORD": None,
+            "MAIL_SUPPRESS_SEND": False,
+            "OUTBOX_BATCH_SIZE": 2,
+        }
+    )
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_drain_sends_batches_over_reused_connection(smtp_server):
+    app = _mail_app(smtp_server.server_address[1])
+    with app.test_request_context():
+        for i in range(3):
+            send_welcome_email(f"person{i}@example.com", f"Person {i}")
+        db.session.commit()
+
+        assert drain() == {"sent": 3, "retry": 0, "failed": 0}
+        assert EmailOutbox.query.filter_by(status="sent").count() == 3
+
+    assert len(smtp_server.messages) == 3
+    # Batch size 2: two connections for three emails, not one per email
+    assert smtp_server.connections == 2
+
+
+def test_drain_backs_off_and_gives_up_when_server_is_down():
+    app = _mail_app(port=1)  # nothing listens here
+    app.config["OUTBOX_MAX_ATTEMPTS"] = 2
+    with app.test_request_context():
+        send_welcome_email("someone@example.com", "Someone")
+        db.session.commit()
+
+        assert drain() == {"sent": 0, "retry": 1, "failed": 0}
+        row = EmailOutbox.query.one()
+        assert row.attempts == 1 and row.status == "pending"
+        # Not due again until the backoff expires
+        assert drain() == {"sent": 0, "retry": 0, "failed": 0}
+
+        row.next_attempt_at = row.created_at
+        db.session.commit()
+        assert drain() == {"sent": 0, "retry": 0, "failed": 1}
+        assert EmailOutbox.query.one().status == "failed"
+
+
+def test_registration_queues_email_instead_of_sending(app, client):
+    response = client.post(
+        "/register",
+        data={
+            "name": "New Person",
+            "email": "new@example.com",
+            "password": "secret123",
+            "confirm_password": "secret123",
+        },
+    )
+    assert response.status_code == 302
+    with app.app_context():
+        row = EmailOutbox.query.one()
+        assert row.recipients == "new@example.com"
+        assert row.status == "pending"
@@ -0,0 +1,104 @@
+import logging
+
+import pytest
+
+from app import create_app, db
+from tests.conftest import add_products, create_user, login
+
+
+@pytest.fixture()
+def profiled(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "WTF_CSRF_ENABLED": False,
+        "ASSETS_FINGERPRINT": False,
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "PASSWORD_HASH_WORKERS": 0,
+        "LOGIN_THROTTLE_BACKEND": "null",
+        "CATALOG_CACHE_BACKEND": "null",
+        "SQL_PROFILER": True,
+        "SQL_PROFILER_SLOWEST": 2,
+    })
+    app.static_folder = str(tmp_path / "static")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _timings(response):
+    return {entry.split(";")[0]: entry for entry in response.headers.getlist("Server-Timing")}
+
+
+def test_requests_carry_server_timing(profiled):
+    add_products(profiled, 3)
+    response = profiled.test_client().get("/products")
+
+    timings = _timings(response)
+    assert set(timings) == {"db", "tpl", "total"}
+    assert 'desc="' in timings["db"] and "queries" in timings["db"]
+
+    recent = profiled.extensions["sql_profiler"].snapshot()
+    assert [r["endpoint"] for r in recent] == ["main.product_list"]
+    assert recent[0]["queries"] >= 1 and recent[0]["template_ms"] > 0
+    assert 1 <= len(recent[0]["slowest"]) <= 2
+    assert recent[0]["slowest"][0]["site"].startswith("app/")
+
+
+def test_perf_page_is_admin_only_and_aggregates(profiled):
+    create_user(profiled, email="admin@example.com", is_admin=True)
+    create_user(profiled)
+    add_products(profiled, 2)
+
+    shopper = profiled.test_client()
+    login(shopper)
+    assert shopper.get("/admin/perf").status_code == 302
+
+    admin = profiled.test_client()
+    login(admin, email="admin@example.com")
+    for _ in range(3):
+        admin.get("/products")
+    page = admin.get("/admin/perf").get_data(as_text=True)
+    assert "main.product_list" in page
+    assert "SELECT" in page and "app/main/catalog.py" in page
+
+
+def test_slow_statements_are_logged(profiled, caplog):
+    with caplog.at_level(logging.WARNING, logger="app.profiler"):
+        profiled.test_client().get("/products")  # nothing near the default 200 ms
+    assert not caplog.records
+
+    slow = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "ASSETS_FINGERPRINT": False,
+        "CATALOG_CACHE_BACKEND": "null",
+        "SQL_PROFILER": True,
+        "SQL_SLOW_QUERY_MS": 0.0001,
+    })
+    with slow.app_context():
+        db.create_all()
+    with caplog.at_level(logging.WARNING, logger="app.profiler"):
+        slow.test_client().get("/products")
+    assert any("Slow query" in r.getMessage() and "app/main/catalog.py" in r.getMessage()
+               for r in caplog.records)
+
+
+def test_failed_statements_leave_no_state_on_the_connection(profiled):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    with profiled.app_context():
+        with db.engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM no_such_table"))
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+            # Pooled connections live on; nothing per-statement may pile up on them
+            assert not any(key.startswith("profiler") for key in conn.info)
+
+
+def test_profiler_is_off_by_default(app, admin_client):
+    response = admin_client.get("/admin/perf")
+    assert "SQL profiler is off" in response.get_data(as_text=True)
+    assert "Server-Timing" not in admin_client.get("/products").headers
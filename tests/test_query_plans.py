@@ -0,0 +1,103 @@
+import re
+
+from app import db
+from app.admin.queries import order_list_page, user_list_page
+from app.cart.basket import cart_lines
+from app.main.catalog import CATALOG_SORTS, catalog_page
+from app.models import CartItem, Product
+from tests.conftest import QueryCounter, add_orders, add_products, create_user, login
+
+# A plan step reading a whole table, or sorting rows an index should have delivered in
+# order. "SCAN product USING INDEX ..." is an ordered index walk that stops at the
+# LIMIT, and sorting the few rows an index SEARCH found (one user's cart) is cheap.
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+SORT = re.compile(r"USE TEMP B-TREE FOR (ORDER|GROUP) BY")
+PRIMARY_KEYS = {"product": "prod_id", "order": "order_id", "user": "user_id", "cart_item": "cart_item_id"}
+
+
+def _plans(app, counter):
+    plans = []
+    with app.app_context():
+        conn = db.session.connection()
+        for statement, params in zip(counter.statements, counter.parameters):
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params).all()
+            plans.append((statement, [row[-1] for row in rows]))
+    return plans
+
+
+def _rowid_walk(table, statement):
+    # "SCAN t" with ORDER BY t's primary key and a LIMIT walks the table in key order
+    # and stops early: that's the keyset "newest first" page, not a full scan
+    pk = PRIMARY_KEYS.get(table)
+    return pk and "LIMIT" in statement and re.search(rf'ORDER BY "?{table}"?\.{pk}\b', statement)
+
+
+def _assert_indexed(app, counter):
+    plans = _plans(app, counter)
+    assert plans
+    for statement, steps in plans:
+        scans = [s for s in steps if FULL_SCAN.match(s) and not _rowid_walk(FULL_SCAN.match(s)[1], statement)]
+        unbounded = any(s.startswith("SCAN") for s in steps)
+        sorts = [s for s in steps if SORT.search(s) and unbounded]
+        assert not scans + sorts, f"{scans + sorts} in plan for:\n{statement}\n{steps}"
+
+
+def _seed(app):
+    # Deliberately no ANALYZE: statistics from a few dozen rows would (rightly) make
+    # SQLite prefer scans, while without them it plans as it would for large tables
+    user_id = create_user(app)
+    add_products(app, 30)
+    add_orders(app, user_id, 30)
+    with app.app_context():
+        db.session.add_all(CartItem(user_id=user_id, prod_id=p, qty=1) for p in (1, 2, 3))
+        db.session.commit()
+    return user_id
+
+
+def test_storefront_and_account_pages_use_indexes(app, client):
+    _seed(app)
+    login(client)
+    with QueryCounter(app) as counter:
+        for sort in CATALOG_SORTS:
+            assert client.get(f"/products?sort={sort}").status_code == 200
+        assert client.get("/orders").status_code == 200
+        assert client.get("/cart").status_code == 200
+        assert client.post("/cart/add/2").status_code == 302
+    _assert_indexed(app, counter)
+
+
+def test_admin_and_filter_queries_use_indexes(app):
+    user_id = _seed(app)
+    with QueryCounter(app) as counter, app.app_context():
+        order_list_page(per_page=20)
+        order_list_page(per_page=20, status="processing")
+        cart_lines(user_id).all()
+        (Product.query.filter_by(category="watch")
+         .order_by(Product.price, Product.prod_id).limit(24).all())
+        db.session.query(CartItem.user_id).filter_by(prod_id=3).distinct().all()
+    _assert_indexed(app, counter)
+
+
+def test_user_search_uses_the_nocase_indexes(app):
+    _seed(app)
+    with QueryCounter(app) as counter, app.app_context():
+        user_list_page(per_page=20, search="Shop")
+    (statement, steps), = [p for p in _plans(app, counter) if "LIKE" in p[0]]
+    assert any("USING INDEX ix_user_email_nocase" in s for s in steps), steps
+    assert any("USING INDEX ix_user_name_nocase" in s for s in steps), steps
+    _assert_indexed(app, counter)
+
+
+def test_cart_lines_are_unique_per_product(app):
+    user_id = _seed(app)
+    with app.app_context():
+        db.session.add(CartItem(user_id=user_id, prod_id=1, qty=1))
+        try:
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            assert "UNIQUE" in str(exc)
+        else:
+            raise AssertionError("duplicate cart line was accepted")
@@ -0,0 +1,85 @@
+import sqlite3
+from decimal import Decimal
+
+from flask import jsonify, request
+
+from app import create_app, db
+from app.models import Product
+from app.replicas import read_only
+from tests.conftest import add_products, create_user, login
+
+
+def _product(name):
+    return Product(name=name, sku=name.lower().replace(" ", "_"), desc="Just in.",
+                   price=Decimal("50.00"), stock_level=5, category="watch")
+
+
+def _apps(tmp_path):
+    """A primary and a replica file; the replica is a copy that then falls behind."""
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{primary}",
+        "DATABASE_REPLICA_URLS": f"sqlite:///{replica}",
+        "WTF_CSRF_ENABLED": False,
+        "ASSETS_FINGERPRINT": False,
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "PASSWORD_HASH_WORKERS": 0,
+        "LOGIN_THROTTLE_BACKEND": "null",
+        "CATALOG_CACHE_BACKEND": "null",
+    })
+    app.static_folder = str(tmp_path / "static")
+    with app.app_context():
+        db.create_all()
+    add_products(app, 3)
+
+    # "Replicate", then write to the primary only: the replica is now lagging
+    with sqlite3.connect(primary) as src, sqlite3.connect(replica) as dst:
+        src.backup(dst)
+    create_user(app)
+    with app.app_context():
+        db.session.add(_product("Fresh Watch"))
+        db.session.commit()
+    return app
+
+
+def test_read_only_views_read_from_the_replica(tmp_path):
+    app = _apps(tmp_path)
+    client = app.test_client()
+
+    # Search is a storefront view: the replica hasn't seen the new product yet
+    assert "Product 001" in client.get("/search?q=product").get_data(as_text=True)
+    assert "Fresh Watch" not in client.get("/search?q=fresh").get_data(as_text=True)
+
+    # Catalogue cache fills and logins use the primary
+    assert "Fresh Watch" in client.get("/products").get_data(as_text=True)
+    assert login(client).status_code == 302  # user only exists on the primary
+    assert "Logout" in client.get("/search?q=fresh").get_data(as_text=True)
+
+
+def test_writes_switch_the_rest_of_the_request_to_the_primary(tmp_path):
+    app = _apps(tmp_path)
+
+    @read_only
+    def probe():
+        before = Product.query.count()
+        if request.args.get("write"):
+            db.session.add(_product("Probe Watch"))
+            db.session.flush()
+        after = Product.query.count()
+        db.session.rollback()
+        return jsonify(before=before, after=after)
+
+    app.add_url_rule("/probe", view_func=probe, methods=["GET", "POST"])
+    client = app.test_client()
+
+    assert client.get("/probe").get_json() == {"before": 3, "after": 3}
+    # Read-your-writes: after the flush the count comes from the primary
+    assert client.get("/probe?write=1").get_json() == {"before": 3, "after": 5}
+    # Non-GET requests never touch the replica
+    assert client.post("/probe").get_json() == {"before": 4, "after": 4}
+
+
+def test_marks_are_harmless_without_replicas(app, admin_client):
+    add_products(app, 2)
+    assert "Product 001" in admin_client.get("/search?q=product").get_data(as_text=True)
+    assert admin_client.get("/admin").status_code == 200
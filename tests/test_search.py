@@ -0,0 +1,92 @@
+import io
+from decimal import Decimal
+
+from app import db
+from app.main.search import search_products
+from app.models import Product
+from tests.conftest import QueryCounter
+
+
+def _product(name, desc, category="watch", sku=None):
+    return Product(
+        name=name,
+        sku=sku or f"{category}_{abs(hash(name)) % 100000}",
+        desc=desc,
+        price=Decimal("50.00"),
+        stock_level=5,
+        category=category,
+    )
+
+
+def _names(results):
+    return [p.name for p in results.items]
+
+
+def test_search_ranks_and_filters(app):
+    with app.app_context():
+        db.session.add_all(
+            [
+                _product("Leather Tote", "Roomy everyday bag", category="handbag"),
+                _product("Diver Watch", "Steel case, leather strap"),
+                _product("Chronograph", "Classic dial"),
+                _product("Leather Clutch", "Evening leather bag", category="handbag"),
+            ]
+        )
+        db.session.commit()
+
+        # Name hits outrank description-only hits
+        results = search_products("leather")
+        assert set(_names(results)[:2]) == {"Leather Tote", "Leather Clutch"}
+        assert _names(results)[2] == "Diver Watch"
+        assert "Chronograph" not in _names(results)
+
+        assert _names(search_products("leather", category="watch")) == ["Diver Watch"]
+        # Every word must match, and the last one may be a prefix
+        assert _names(search_products("leather even")) == ["Leather Clutch"]
+        # Punctuation and FTS operators in user input are just separators
+        assert _names(search_products('"chrono*')) == ["Chronograph"]
+        assert search_products('NEAR( "dial OR').items == []
+        assert search_products("   ").items == []
+
+
+def test_index_follows_edits_deletes_and_imports(app, admin_client):
+    with app.app_context():
+        db.session.add(_product("Pilot Watch", "Aviator style", sku="watch_1"))
+        db.session.commit()
+        assert _names(search_products("watch_1")) == ["Pilot Watch"]
+
+    admin_client.post(
+        "/admin/products/1/edit",
+        data={"name": "Field Watch", "category": "watch", "price": "50.00",
+              "stock_level": "5", "description": "Rugged"},
+    )
+    with app.app_context():
+        assert search_products("pilot").items == []
+        assert _names(search_products("rugged")) == ["Field Watch"]
+
+    csv_data = b"name,category,price,stock_level,description\nSatchel,handbag,80,2,Rugged canvas\n"
+    admin_client.post(
+        "/admin/products",
+        data={"csv_file": (io.BytesIO(csv_data), "p.csv"), "submit": "batch"},
+        content_type="multipart/form-data",
+    )
+    with app.app_context():
+        assert _names(search_products("rugged", category="handbag")) == ["Satchel"]
+
+    admin_client.post("/admin/products/1/delete")
+    with app.app_context():
+        assert _names(search_products("rugged")) == ["Satchel"]
+
+
+def test_search_page_is_one_query(app, client):
+    with app.app_context():
+        db.session.add_all([_product(f"Gold Watch {i}", "Gold plated") for i in range(30)])
+        db.session.commit()
+
+    with QueryCounter(app) as counter:
+        response = client.get("/search?q=gold&category=watch")
+    assert response.status_code == 200
+    assert counter.count == 1
+    html = response.get_data(as_text=True)
+    assert html.count('class="modern-product-card"') == app.config["CATALOG_PAGE_SIZE"]
+    assert 'rel="next"' in html
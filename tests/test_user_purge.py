@@ -0,0 +1,105 @@
+from app import db, stats
+from app.models import CartItem, Order, OrderItem, User, UserPurgeJob
+from tests.conftest import QueryCounter, add_orders, add_products, create_user, login
+
+
+def _buyer(app, orders):
+    add_products(app, 3)
+    user_id = create_user(app, email="buyer@example.com")
+    add_orders(app, user_id, orders)
+    with app.app_context():
+        db.session.add(CartItem(user_id=user_id, prod_id=1, qty=2))
+        Order.query.first().status = "completed"
+        db.session.commit()
+    return user_id
+
+
+def _remaining(app, user_id):
+    with app.app_context():
+        return (db.session.get(User, user_id) is not None, Order.query.count(), OrderItem.query.count(),
+                CartItem.query.count())
+
+
+def test_delete_user_is_set_based(app, admin_client):
+    """Deleting a user takes the same few statements whatever their order count."""
+    user_id = _buyer(app, 40)
+    with app.app_context():
+        Order.query.order_by(Order.order_id.desc()).first().status = "Completed"  # the old spelling
+        db.session.commit()
+    admin_client.get("/admin")  # seed the dashboard totals
+
+    with QueryCounter(app) as queries:
+        response = admin_client.post(f"/admin/users/{user_id}/delete")
+    assert response.status_code == 302
+    deletes = [s for s in queries.statements if s.lstrip().upper().startswith("DELETE")]
+    assert len(deletes) == 4  # order lines, orders, cart, user
+    assert queries.count < 20
+    assert _remaining(app, user_id) == (False, 0, 0, 0)
+
+    with app.app_context():
+        totals = stats.read_stats()
+        assert totals[stats.USERS] == 1  # the admin
+        assert totals[stats.ORDERS] == 0
+        assert totals[stats.COMPLETED_REVENUE] == 0
+
+
+def test_big_account_is_purged_in_background_chunks(app, admin_client, monkeypatch):
+    import app.admin.routes as routes
+    from app.admin.purge import submit_purge
+
+    app.config.update(USER_PURGE_INLINE_LIMIT=10, USER_PURGE_CHUNK_SIZE=4)
+    user_id = _buyer(app, 11)
+    # The buyer is still logged in somewhere
+    shopper = app.test_client()
+    login(shopper, email="buyer@example.com")
+    assert shopper.get("/orders").status_code == 200
+
+    futures = []
+    monkeypatch.setattr(routes, "submit_purge", lambda job_id: futures.append(job_id))
+    response = admin_client.post(f"/admin/users/{user_id}/delete", follow_redirects=True)
+    assert "being deleted in the background" in response.get_data(as_text=True)
+    with app.app_context():
+        assert db.session.get(User, user_id).is_active is False
+
+    # Existing sessions end, and new logins are refused, while the purge is pending
+    assert shopper.get("/orders").status_code == 302
+    assert shopper.post("/checkout", data={"payment_method": "Wallet"}).status_code == 302
+    assert "account has been deactivated" in login(shopper, email="buyer@example.com").get_data(as_text=True)
+    assert shopper.get("/orders").status_code == 302
+
+    # Deleting again reports the job instead of starting a second one
+    response = admin_client.post(f"/admin/users/{user_id}/delete", follow_redirects=True)
+    assert "already being deleted" in response.get_data(as_text=True)
+    assert len(futures) == 1
+
+    with app.app_context():
+        submit_purge(futures[0]).result(timeout=10)
+        job = db.session.get(UserPurgeJob, futures[0])
+        assert (job.status, job.orders_total, job.orders_deleted) == ("done", 11, 11)
+        with QueryCounter(app) as queries:
+            submit_purge(futures[0]).result(timeout=10)  # finished: nothing to claim
+        assert not any(s.lstrip().upper().startswith("DELETE") for s in queries.statements)
+    assert _remaining(app, user_id) == (False, 0, 0, 0)
+
+
+def test_purge_command_resumes_interrupted_jobs(app):
+    from app.admin.purge import create_purge_job
+
+    app.config.update(USER_PURGE_CHUNK_SIZE=3)
+    user_id = _buyer(app, 7)
+    with app.app_context():
+        job, created = create_purge_job(db.session.get(User, user_id))
+        assert created
+        job.status = "running"  # as left by a worker that died half-way
+        db.session.commit()
+
+    runner = app.test_cli_runner()
+    # A running job may still belong to a live worker: left alone by default
+    assert "No unfinished purges." in runner.invoke(args=["users", "purge"]).output
+    assert _remaining(app, user_id)[1] == 7
+
+    result = runner.invoke(args=["users", "purge", "--resume-running"])
+    assert "done, 7 orders deleted" in result.output
+    assert _remaining(app, user_id) == (False, 0, 0, 0)
+    with app.app_context():
+        assert UserPurgeJob.query.one().finished_at is not None